@@ -1,13 +1,19 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from pydantic import BaseModel, Field
+from typing import Optional, List
 import logging
 
 # Se o Pylance reclamar, verifique se em app/services/product_service.py 
 # existe a definição: class ProductScraperService:
 from app.services import product_service
 from app.services.youtube_analyzer import YouTubeAnalyzer
-from app.models.product import ProductResponse
+from app.services.scrapers import circuit_breakers
+from app.services.dedupe import job_dedupe
+from app.services.scheduler import fair_scheduler
+from app.services.job_executor import job_executor
+from app.services.llm_cache import llm_cache
+from app.core.cache import cache, CacheKey
+from app.models.product import ProductResponse, BulkProductResponse, Marketplace
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -16,8 +22,13 @@ class ScrapeRequest(BaseModel):
     url: str
     bypass_cache: bool = False
 
+class BatchScrapeRequest(BaseModel):
+    urls: List[str] = Field(..., min_length=1, max_length=product_service.ProductScraperService.BATCH_MAX_URLS)
+    bypass_cache: bool = False
+
 class YoutubeRequest(BaseModel):
     youtube_url: str
+    force_reanalysis: bool = False
 
 @router.post("/products/scrape", response_model=ProductResponse)
 async def scrape_single_product(data: ScrapeRequest):
@@ -32,11 +43,70 @@ async def scrape_single_product(data: ScrapeRequest):
         logger.error(f"Erro no scrape: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/products/batch", response_model=BulkProductResponse)
+async def scrape_products_batch(data: BatchScrapeRequest, bypass_cache: bool = False):
+    # O front envia bypass_cache como query param; o body também é aceito
+    return await product_service.ProductScraperService.scrape_batch(
+        urls=data.urls,
+        bypass_cache=data.bypass_cache or bypass_cache
+    )
+
+@router.get("/metrics/singleflight")
+async def singleflight_metrics():
+    return {
+        "product_scrape": {
+            "in_process": product_service.scrape_flight.stats(),
+            "distributed": await product_service.distributed_scrape_flight.stats(),
+        }
+    }
+
+@router.delete("/cache/{marketplace}")
+async def clear_cache(marketplace: str, background_tasks: BackgroundTasks):
+    """Invalida o cache de produtos de um marketplace (ou `all`) e libera a memória em background."""
+    if marketplace == "all":
+        targets = list(Marketplace)
+    else:
+        try:
+            targets = [Marketplace(marketplace)]
+        except ValueError:
+            raise HTTPException(status_code=404, detail=f"Marketplace desconhecido: {marketplace}")
+    if not cache.is_connected:
+        raise HTTPException(status_code=503, detail="Cache indisponível")
+
+    versions = {}
+    for target in targets:
+        namespace = CacheKey.product_namespace(target.value)
+        versions[target.value] = await cache.bump_namespace(namespace)
+        background_tasks.add_task(cache.sweep_namespace, namespace)
+    return {"invalidated": versions}
+
+@router.get("/metrics/cache")
+async def cache_metrics():
+    return cache.stats()
+
+@router.get("/metrics/dedupe")
+async def dedupe_metrics():
+    return await job_dedupe.stats()
+
+@router.get("/metrics/llm")
+async def llm_metrics():
+    """Hit rate, tokens e latência economizados pelo cache de respostas do LLM."""
+    return await llm_cache.stats()
+
+@router.get("/metrics/queues")
+async def queue_metrics():
+    """Profundidade, slots em uso e tempo de espera por tier das filas de jobs."""
+    return {**await fair_scheduler.stats(), "in_process": job_executor.stats()}
+
+@router.get("/metrics/circuit-breakers")
+async def circuit_breaker_metrics():
+    return await circuit_breakers.stats()
+
 @router.post("/youtube/analyze")
 async def analyze_video(data: YoutubeRequest):
     try:
         analyzer = YouTubeAnalyzer()
-        result = await analyzer.analyze(data.youtube_url)
+        result = await analyzer.analyze(data.youtube_url, force_reanalysis=data.force_reanalysis)
         return result
     except Exception as e:
         logger.error(f"Erro no youtube: {e}")
@@ -1,11 +1,18 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional, Any, cast
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+import os
 import logging
-import asyncio
+import json
 
 from app.services.orchestrator import AdOrchestrator
-from app.core.tasks import process_job_task
+from app.services.video_did import DIDService
+from app.services.job_events import job_events
+from app.core.cache import cache
+from app.core.tasks import schedule_job, schedule_batch
+from app.services.job_executor import job_executor
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -14,30 +21,189 @@ class JobCreateRequest(BaseModel):
     product_url: str
     youtube_url: Optional[str] = None
     style: str = "charismatic_fomo"
+    priority: Literal["high", "default", "low"] = "default"
+
+# Limite de jobs por lote (campanhas de agências)
+BATCH_MAX_JOBS = int(os.getenv("JOB_BATCH_MAX", "1000"))
+
+class JobBatchItem(BaseModel):
+    product_url: str
+    youtube_url: Optional[str] = None
+    style: Optional[str] = None
+
+class JobBatchRequest(BaseModel):
+    items: List[JobBatchItem] = Field(..., min_length=1, max_length=BATCH_MAX_JOBS)
+    # Estilo padrão dos itens que não definem o seu
+    style: str = "charismatic_fomo"
+    # Lotes vão para o tier baixo para não atrasar jobs interativos
+    priority: Literal["high", "default", "low"] = "low"
+
+def _executor_full() -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Fila de processamento cheia; tente novamente mais tarde",
+        headers={"Retry-After": str(job_executor.retry_after())},
+    )
+
+# Status aceitos no filtro da listagem
+JobStatus = Literal["queued", "processing", "rendering", "completed", "failed", "attached"]
+
+@router.get("/jobs")
+async def list_jobs(
+    status: Optional[List[JobStatus]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    """Jobs do usuário (resumo), mais recentes primeiro; `next_cursor` busca a próxima página."""
+    user_id = "test_deploy_user"
+    try:
+        return await AdOrchestrator().list_jobs(user_id, statuses=status, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/jobs")
 async def create_job(req: JobCreateRequest):
     orchestrator = AdOrchestrator()
     user_id = "test_deploy_user"
+    if not job_executor.has_capacity():
+        # Celery fora e fila local cheia: recusa antes de gravar o job
+        raise _executor_full()
 
     try:
-        # Agora o método enqueue_job existe no orchestrator.py
-        job_id = await orchestrator.enqueue_job(
+        job = await orchestrator.enqueue_job(
             product_url=req.product_url, 
             youtube_url=req.youtube_url, 
             style=req.style, 
-            user_id=user_id
+            user_id=user_id,
+            priority=req.priority,
         )
+        if job["status"] != "queued":
+            # Duplicado: já pronto ou anexado a um job idêntico em andamento
+            return job
 
-        try:
-            # Tenta disparar via Celery
-            cast(Any, process_job_task).delay(job_id)
-        except Exception as e:
-            logger.warning(f"Celery offline, usando Background Task: {e}")
-            # Fallback para tarefa em segundo plano do Python
-            asyncio.create_task(orchestrator.process_job(job_id=job_id))
+        # Fila justa por usuário dentro do tier; o que não chegar ao broker roda aqui
+        unsent = await schedule_job(job["job_id"], user_id, req.priority)
+        if unsent:
+            logger.warning(f"Celery offline, executando {len(unsent)} job(s) no processo da API")
+            if job["job_id"] in await job_executor.run_locally(unsent):
+                raise _executor_full()
 
-        return {"job_id": job_id, "status": "queued"}
+        return job
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao criar job: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/jobs/batch")
+async def create_job_batch(req: JobBatchRequest):
+    """Cria até `JOB_BATCH_MAX` jobs com um `insert_many` e os despacha de uma vez."""
+    orchestrator = AdOrchestrator()
+    user_id = "test_deploy_user"
+    if not job_executor.has_capacity():
+        raise _executor_full()
+
+    try:
+        batch = await orchestrator.enqueue_batch(
+            [{**item.model_dump(), "style": item.style or req.style} for item in req.items],
+            user_id=user_id,
+            priority=req.priority,
+        )
+        queued = [job["job_id"] for job in batch["jobs"] if job["status"] == "queued"]
+        unsent = await schedule_batch(queued, user_id, req.priority, batch["batch_id"]) if queued else []
+        if unsent:
+            logger.warning(f"Celery offline, executando {len(unsent)} job(s) no processo da API")
+            rejected = set(await job_executor.run_locally(unsent))
+            for job in batch["jobs"]:
+                if job["job_id"] in rejected:
+                    # Descartado: reenviar este item
+                    job["status"] = "rejected"
+            if rejected and rejected.issuperset(queued):
+                raise _executor_full()
+        return batch
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao criar lote: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    status = await AdOrchestrator().batch_status(batch_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Lote não encontrado")
+    return status
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Último estado do job, lido só do Redis (sem tocar no Mongo)."""
+    if not cache.is_connected:
+        raise HTTPException(status_code=503, detail="Status de jobs indisponível (Redis offline)")
+    state = await job_events.get(job_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="Job não encontrado ou expirado")
+    return {"job_id": job_id, **state}
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Server-Sent Events com o progresso do job até ele terminar."""
+    if not cache.is_connected:
+        raise HTTPException(status_code=503, detail="Status de jobs indisponível (Redis offline)")
+    if not await job_events.get(job_id):
+        raise HTTPException(status_code=404, detail="Job não encontrado ou expirado")
+
+    async def events():
+        async for state in job_events.stream(job_id):
+            if await request.is_disconnected():
+                break
+            if state is None:
+                # Comentário SSE: mantém proxies e o navegador com a conexão aberta
+                yield ": ping\n\n"
+                continue
+            yield f"event: status\ndata: {json.dumps({'job_id': job_id, **state})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/scripts/stream")
+async def stream_script(product_url: str, style: str = "charismatic_fomo", youtube_url: Optional[str] = None):
+    """Prévia do roteiro em Server-Sent Events, token a token, sem criar job."""
+    orchestrator = AdOrchestrator()
+    try:
+        context = await orchestrator.preview_context(product_url, youtube_url)
+    except Exception as e:
+        logger.error(f"Erro ao preparar a prévia do roteiro: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        parts = []
+        try:
+            async for token in orchestrator.llm.stream_ad_script(context, style):
+                parts.append(token)
+                yield f"event: token\ndata: {json.dumps({'text': token})}\n\n"
+        except Exception as e:
+            logger.error(f"Stream do roteiro interrompido: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return
+        yield f"event: done\ndata: {json.dumps({'script': ''.join(parts)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/webhooks/did/{job_id}")
+async def did_webhook(job_id: str, request: Request, token: str = ""):
+    """Callback do D-ID ao fim da renderização; conclui o job sem ocupar um worker."""
+    if not DIDService.verify_webhook(job_id, token):
+        raise HTTPException(status_code=403, detail="Token inválido")
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    talk = await request.json()
+    status = await AdOrchestrator().complete_render(job_id, talk)
+    return {"job_id": job_id, "status": status}
@@ -2,6 +2,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.cache import cache
+from app.core.http import http_clients
 from app.services.scrapers.base import ScraperRegistry
 from app.services.scrapers.generic_scraper import GenericEcomScraper
 from app.models.product import Marketplace
@@ -13,12 +14,14 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     logger.info("🚀 Iniciando InfinityAd Backend...")
     await cache.connect()
+    await http_clients.start()
     
-    # Registro manual dos scrapers (Substitui o .initialize que dava erro)
-    #ScraperRegistry.register(Marketplace.CUSTOM, GenericEcomScraper)
+    # Carrega os scrapers do pacote e monta o índice de hosts
+    ScraperRegistry.bootstrap()
     
     logger.info("✓ Backend pronto para receber requisições")
     yield
+    await http_clients.close()
     await cache.disconnect()
     logger.info("✓ Backend finalizado")
 
@@ -2,18 +2,41 @@
 Camada de Cache Distribuído com Redis.
 Implementação type-safe com TTL configurável.
 """
+import asyncio
+import functools
+import hashlib
+import inspect
 import json
 import logging
-from typing import Optional, Generic, TypeVar, Type
+import math
+import random
+import struct
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import Optional, Generic, TypeVar, Type, Any, Awaitable, Callable, Dict, Set, Tuple
 from datetime import timedelta
 from redis.asyncio import Redis, from_url
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+import msgpack
 import os
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T', bound=BaseModel)
 
+# Remove o lock apenas se o token ainda for o do dono
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
 
 class CacheConfig:
     """Configuração centralizada de cache."""
@@ -22,6 +45,215 @@ class CacheConfig:
     PRODUCT_TTL = 7200  # 2 horas
     SCRAPER_TTL = 1800  # 30 min
     ANALYSIS_TTL = 3600  # 1 hora
+    # Soft TTL (stale-while-revalidate): depois dele o valor ainda é servido
+    # até o TTL "hard" acima, enquanto um único refresh roda em background
+    PRODUCT_SOFT_TTL = int(os.getenv("CACHE_PRODUCT_SOFT_TTL", "5400"))  # 1h30
+    ANALYSIS_SOFT_TTL = int(os.getenv("CACHE_ANALYSIS_SOFT_TTL", "2700"))  # 45 min
+    # Recomputação antecipada probabilística (XFetch): maior = refresh mais cedo
+    SWR_BETA = float(os.getenv("CACHE_SWR_BETA", "1.0"))
+    SWR_LOCK_MS = 60_000
+    SCRIPT_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))  # 24 horas
+    # Último estado de cada job (hash `job_status:{id}`) lido pelo GET /jobs/{id}
+    JOB_STATUS_TTL = int(os.getenv("CACHE_JOB_STATUS_TTL", "86400"))
+    # Falhas permanentes (ex: página inexistente) ficam em cache por pouco tempo
+    NEGATIVE_TTL = int(os.getenv("CACHE_NEGATIVE_TTL", "300"))
+    # L1: LRU em memória na frente do Redis (invalidado via pub/sub)
+    L1_ENABLED = os.getenv("CACHE_L1_ENABLED", "false").lower() in ("1", "true", "yes")
+    L1_MAX_ITEMS = int(os.getenv("CACHE_L1_MAX_ITEMS", "2048"))
+    # Limite de permanência no L1 (teto de staleness se uma invalidação se perder)
+    L1_TTL = int(os.getenv("CACHE_L1_TTL", "60"))
+    INVALIDATION_CHANNEL = "cache:invalidate"
+    # Por quanto tempo cada processo reaproveita a versão lida de um namespace
+    NAMESPACE_TTL = float(os.getenv("CACHE_NAMESPACE_TTL", "2"))
+    SWEEP_BATCH = 500
+    # Codec dos valores (ver `CODECS`) e compressão zlib acima do limite
+    CODEC = os.getenv("CACHE_CODEC", "msgpack")
+    COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+    COMPRESS_LEVEL = 1
+
+
+class CacheEntry(Generic[T]):
+    """Valor do cache com os metadados de frescor (soft TTL e custo de recomputação)."""
+    __slots__ = ("value", "fresh_until", "compute_time")
+
+    def __init__(self, value: T, fresh_until: Optional[float] = None, compute_time: float = 0.0):
+        self.value = value
+        # Epoch (time.time()) a partir do qual o valor é "stale"; None = sem soft TTL
+        self.fresh_until = fresh_until
+        self.compute_time = compute_time
+
+    @property
+    def is_stale(self) -> bool:
+        return self.fresh_until is not None and time.time() >= self.fresh_until
+
+    def should_refresh(self, beta: float = 1.0) -> bool:
+        """
+        XFetch: recomputa antes do soft TTL com probabilidade que cresce conforme
+        ele se aproxima (e com o custo da recomputação), espalhando os refreshes.
+        """
+        if self.fresh_until is None:
+            return False
+        early = -self.compute_time * beta * math.log(1.0 - random.random())
+        return time.time() + early >= self.fresh_until
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: Any) -> TypeAdapter:
+    """TypeAdapter por tipo (construir um é caro; reutilizar é barato)."""
+    return TypeAdapter(model)
+
+
+class CacheCodec(ABC):
+    """Serialização de valores do cache. Cada codec tem um `codec_id` fixo gravado no envelope."""
+    name: str
+    codec_id: int
+
+    @abstractmethod
+    def dumps(self, value: Any, model: Any) -> bytes: pass
+
+    @abstractmethod
+    def loads(self, data: bytes, model: Any) -> Any: pass
+
+
+class MsgpackCodec(CacheCodec):
+    """Binário compacto; a validação parte de objetos Python já decodificados."""
+    name = "msgpack"
+    codec_id = 1
+
+    def dumps(self, value: Any, model: Any) -> bytes:
+        return msgpack.packb(_adapter(model).dump_python(value, mode="json"))
+
+    def loads(self, data: bytes, model: Any) -> Any:
+        return _adapter(model).validate_python(msgpack.unpackb(data))
+
+
+class JsonCodec(CacheCodec):
+    """JSON via pydantic-core (legível com redis-cli quando não comprimido)."""
+    name = "json"
+    codec_id = 2
+
+    def dumps(self, value: Any, model: Any) -> bytes:
+        return _adapter(model).dump_json(value)
+
+    def loads(self, data: bytes, model: Any) -> Any:
+        return _adapter(model).validate_json(data)
+
+
+CODECS: Dict[int, CacheCodec] = {codec.codec_id: codec for codec in (MsgpackCodec(), JsonCodec())}
+
+# Envelope: magic, versão do envelope, id do codec, flags. 0xC1 nunca aparece
+# no início de JSON (entradas antigas) nem é usado pelo msgpack.
+ENVELOPE_MAGIC = 0xC1
+ENVELOPE_VERSION = 1
+FLAG_ZLIB = 0x01
+# Com FLAG_SWR, o cabeçalho é seguido de (fresh_until, compute_time) em doubles
+FLAG_SWR = 0x02
+_SWR_META = struct.Struct("<dd")
+
+
+def encode_value(
+    value: Any,
+    model: Any = None,
+    codec: Optional[str] = None,
+    fresh_until: Optional[float] = None,
+    compute_time: float = 0.0,
+) -> bytes:
+    """Serializa `value` no envelope versionado (comprime payloads grandes)."""
+    name = codec or CacheConfig.CODEC
+    selected = next((c for c in CODECS.values() if c.name == name), None)
+    if selected is None:
+        raise ValueError(f"Codec de cache desconhecido: {name}")
+    payload = selected.dumps(value, model or type(value))
+    flags = 0
+    if len(payload) >= CacheConfig.COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(payload, CacheConfig.COMPRESS_LEVEL)
+        if len(compressed) < len(payload):
+            payload, flags = compressed, FLAG_ZLIB
+    meta = b""
+    if fresh_until is not None:
+        flags |= FLAG_SWR
+        meta = _SWR_META.pack(fresh_until, compute_time)
+    return bytes((ENVELOPE_MAGIC, ENVELOPE_VERSION, selected.codec_id, flags)) + meta + payload
+
+
+def decode_entry(data: bytes, model: Any) -> CacheEntry:
+    """Desserializa uma entrada do cache; entradas JSON antigas (sem envelope) continuam legíveis."""
+    if isinstance(data, str):
+        data = data.encode()
+    if not data or data[0] != ENVELOPE_MAGIC:
+        return CacheEntry(_adapter(model).validate_json(data))
+    version, codec_id, flags = data[1], data[2], data[3]
+    if version != ENVELOPE_VERSION or codec_id not in CODECS:
+        raise ValueError(f"Envelope de cache não suportado (versão {version}, codec {codec_id})")
+    payload = data[4:]
+    fresh_until, compute_time = None, 0.0
+    if flags & FLAG_SWR:
+        fresh_until, compute_time = _SWR_META.unpack_from(payload)
+        payload = payload[_SWR_META.size:]
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    return CacheEntry(CODECS[codec_id].loads(payload, model), fresh_until, compute_time)
+
+
+def decode_value(data: bytes, model: Any) -> Any:
+    return decode_entry(data, model).value
+
+
+class LocalCache:
+    """
+    LRU em memória de models já validados, com expiração por entrada.
+    Os objetos são compartilhados entre chamadas: tratar como somente leitura.
+    """
+
+    def __init__(self, max_items: int, max_ttl: int):
+        self.max_items = max_items
+        self.max_ttl = max_ttl
+        # chave -> (expira_em, entrada, tamanho serializado)
+        self._data: "OrderedDict[str, Tuple[float, CacheEntry, int]]" = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str, model: Type[T]) -> Optional[CacheEntry[T]]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, entry, _ = item
+        if expires_at <= time.monotonic() or not isinstance(entry.value, model):
+            self.discard(key)
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CacheEntry, size: int, ttl: int):
+        self.discard(key)
+        self._data[key] = (time.monotonic() + min(ttl, self.max_ttl), entry, size)
+        self.bytes += size
+        while len(self._data) > self.max_items:
+            _, (_, _, evicted) = self._data.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def discard(self, key: str):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def discard_pattern(self, pattern: str):
+        for key in [k for k in self._data if fnmatchcase(k, pattern)]:
+            self.discard(key)
+
+    def clear(self):
+        self._data.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "l1_items": len(self._data),
+            "l1_max_items": self.max_items,
+            # Aproximação: tamanho do JSON serializado de cada entrada
+            "l1_bytes": self.bytes,
+            "l1_evictions": self.evictions,
+        }
 
 
 class RedisCache:
@@ -31,10 +263,24 @@ class RedisCache:
     """
     _instance: Optional['RedisCache'] = None
     _client: Optional[Redis] = None
+    # Cliente sem decode de respostas, para os valores binários (codec)
+    _raw: Optional[Redis] = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._local = LocalCache(CacheConfig.L1_MAX_ITEMS, CacheConfig.L1_TTL)
+            cls._instance._listener = None
+            # L1 só é consultado enquanto a assinatura de invalidações está ativa
+            cls._instance._l1_ready = False
+            # Incrementado a cada invalidação: leituras concorrentes não repopulam o L1 com dado velho
+            cls._instance._generation = 0
+            cls._instance._origin = uuid.uuid4().hex
+            cls._instance._stats = Counter()
+            # namespace -> (válido_até, versão)
+            cls._instance._ns_versions = {}
+            # chave -> task de refresh em background (um por chave por processo)
+            cls._instance._refreshing = {}
         return cls._instance
     
     async def connect(self):
@@ -43,39 +289,144 @@ class RedisCache:
             try:
                 self._client = await from_url(CacheConfig.REDIS_URL, decode_responses=True)
                 await self._client.ping()
+                self._raw = await from_url(CacheConfig.REDIS_URL, decode_responses=False)
                 logger.info("✓ Redis conectado")
             except Exception as e:
                 logger.error(f"Falha ao conectar Redis: {e}")
                 self._client = None
+                self._raw = None
+                return
+            if CacheConfig.L1_ENABLED:
+                self._listener = asyncio.create_task(self._listen_invalidations())
     
     async def disconnect(self):
         """Desconecta do Redis."""
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._raw:
+            await self._raw.close()
+            self._raw = None
         if self._client:
             await self._client.close()
             self._client = None
     
+    async def _listen_invalidations(self):
+        """Aplica no L1 as invalidações publicadas pelas outras réplicas."""
+        backoff = 0.5
+        while self._client is not None:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(CacheConfig.INVALIDATION_CHANNEL)
+                self._l1_ready = True
+                backoff = 0.5
+                logger.info("✓ Cache L1 ativo (invalidação via pub/sub)")
+                async for message in pubsub.listen():
+                    self._apply_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Assinatura de invalidação caiu: {e}")
+            finally:
+                # Sem assinatura não há como saber o que mudou: descarta o L1
+                self._l1_ready = False
+                self._local.clear()
+                await pubsub.aclose()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+    
+    def _apply_invalidation(self, data: str):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if message.get("origin") == self._origin:
+            return
+        self._stats["invalidations_received"] += 1
+        self._generation += 1
+        for key in message.get("keys", ()):
+            self._local.discard(key)
+        if message.get("pattern"):
+            self._local.discard_pattern(message["pattern"])
+        for namespace, version in (message.get("namespaces") or {}).items():
+            self._remember_version(namespace, version)
+    
+    def _invalidation(
+        self, keys: list[str] = (), pattern: Optional[str] = None, namespaces: Optional[Dict[str, int]] = None
+    ) -> str:
+        """Invalida localmente e retorna a mensagem a publicar para as outras réplicas."""
+        self._generation += 1
+        for key in keys:
+            self._local.discard(key)
+        if pattern:
+            self._local.discard_pattern(pattern)
+        return json.dumps({"origin": self._origin, "keys": list(keys), "pattern": pattern, "namespaces": namespaces})
+    
+    def _remember(self, key: str, entry: CacheEntry, size: int, ttl: int, generation: int):
+        if self._l1_ready and generation == self._generation:
+            self._local.put(key, entry, size, ttl)
+    
     async def get(self, key: str, model: Type[T]) -> Optional[T]:
         """
         Recupera valor do cache e desserializa para Pydantic model.
+        Com L1 ativo, devolve o objeto em memória (compartilhado: não modificar).
         """
+        entry = await self.get_entry(key, model)
+        return entry.value if entry is not None else None
+    
+    async def get_entry(self, key: str, model: Type[T]) -> Optional[CacheEntry[T]]:
+        """Como `get`, mas com os metadados de frescor (soft TTL) da entrada."""
         if not self._client:
             return None
+        if self._l1_ready:
+            entry = self._local.get(key, model)
+            if entry is not None:
+                self._stats["l1_hits"] += 1
+                return entry
+        generation = self._generation
         try:
-            data = await self._client.get(key)
+            data = await self._raw.get(key)
             if data:
-                return model.parse_raw(data)
+                entry = decode_entry(data, model)
+                self._stats["l2_hits"] += 1
+                self._remember(key, entry, len(data), CacheConfig.L1_TTL, generation)
+                return entry
         except Exception as e:
             logger.warning(f"Cache GET erro para {key}: {e}")
+        self._stats["misses"] += 1
         return None
     
-    async def set(self, key: str, value: BaseModel, ttl: int = CacheConfig.DEFAULT_TTL) -> bool:
+    async def set(
+        self,
+        key: str,
+        value: BaseModel,
+        ttl: int = CacheConfig.DEFAULT_TTL,
+        soft_ttl: Optional[int] = None,
+        compute_time: float = 0.0,
+    ) -> bool:
         """
         Armazena Pydantic model no cache com TTL.
+        Com `soft_ttl`, a entrada fica "stale" depois dele, mas continua servível até `ttl`.
         """
         if not self._client:
             return False
         try:
-            await self._client.setex(key, ttl, value.json())
+            fresh_until = time.time() + soft_ttl if soft_ttl else None
+            entry = CacheEntry(value, fresh_until, compute_time)
+            data = encode_value(value, fresh_until=fresh_until, compute_time=compute_time)
+            if CacheConfig.L1_ENABLED:
+                pipe = self._raw.pipeline(transaction=False)
+                pipe.setex(key, ttl, data)
+                pipe.publish(CacheConfig.INVALIDATION_CHANNEL, self._invalidation([key]))
+                generation = self._generation
+                await pipe.execute()
+                self._remember(key, entry, len(data), ttl, generation)
+            else:
+                await self._raw.setex(key, ttl, data)
             return True
         except Exception as e:
             logger.warning(f"Cache SET erro para {key}: {e}")
@@ -87,23 +438,102 @@ class RedisCache:
             return False
         try:
             result = await self._client.delete(key)
+            if CacheConfig.L1_ENABLED:
+                await self._client.publish(CacheConfig.INVALIDATION_CHANNEL, self._invalidation([key]))
             return result > 0
         except Exception as e:
             logger.warning(f"Cache DELETE erro para {key}: {e}")
             return False
     
     async def clear_pattern(self, pattern: str) -> int:
-        """Deleta todas as chaves matching pattern (ex: 'product:shopee:*')."""
+        """
+        Deleta todas as chaves matching pattern (ex: 'product:shopee:*').
+        Usa SCAN + UNLINK em lotes para não bloquear o Redis; para invalidar
+        um marketplace inteiro prefira `bump_namespace` (O(1)).
+        """
         if not self._client:
             return 0
         try:
-            keys = await self._client.keys(pattern)
-            if keys:
-                return await self._client.delete(*keys)
+            if CacheConfig.L1_ENABLED:
+                await self._client.publish(CacheConfig.INVALIDATION_CHANNEL, self._invalidation(pattern=pattern))
+            return await self._unlink_matching(pattern, lambda key: True)
         except Exception as e:
             logger.warning(f"Cache CLEAR erro para pattern {pattern}: {e}")
         return 0
     
+    async def _unlink_matching(self, pattern: str, should_delete) -> int:
+        removed = 0
+        batch: list[str] = []
+        async for key in self._client.scan_iter(match=pattern, count=CacheConfig.SWEEP_BATCH):
+            if should_delete(key):
+                batch.append(key)
+            if len(batch) >= CacheConfig.SWEEP_BATCH:
+                removed += await self._client.unlink(*batch)
+                batch = []
+        if batch:
+            removed += await self._client.unlink(*batch)
+        return removed
+    
+    def _remember_version(self, namespace: str, version: int):
+        self._ns_versions[namespace] = (time.monotonic() + CacheConfig.NAMESPACE_TTL, int(version))
+    
+    async def namespace_version(self, namespace: str) -> int:
+        """
+        Versão atual de um namespace (0 se nunca foi invalidado).
+        Fica memorizada por `NAMESPACE_TTL`s; com L1 ativo, bumps de outras réplicas chegam via pub/sub.
+        """
+        memo = self._ns_versions.get(namespace)
+        if memo and memo[0] > time.monotonic():
+            return memo[1]
+        if not self._client:
+            return 0
+        try:
+            version = int(await self._client.get(CacheKey.namespace(namespace)) or 0)
+        except Exception as e:
+            logger.warning(f"Cache NAMESPACE erro para {namespace}: {e}")
+            return memo[1] if memo else 0
+        self._remember_version(namespace, version)
+        return version
+    
+    async def bump_namespace(self, namespace: str) -> int:
+        """
+        Invalida todas as chaves de um namespace com um único INCR.
+        As chaves antigas deixam de ser lidas e expiram pelo TTL (ou pelo `sweep_namespace`).
+        """
+        if not self._client:
+            return 0
+        try:
+            version = await self._client.incr(CacheKey.namespace(namespace))
+            self._remember_version(namespace, version)
+            if CacheConfig.L1_ENABLED:
+                message = self._invalidation(pattern=f"{namespace}:*", namespaces={namespace: version})
+                await self._client.publish(CacheConfig.INVALIDATION_CHANNEL, message)
+            logger.info(f"🧹 Namespace {namespace} invalidado (versão {version})")
+            return version
+        except Exception as e:
+            logger.warning(f"Cache BUMP erro para {namespace}: {e}")
+            return 0
+    
+    async def sweep_namespace(self, namespace: str) -> int:
+        """
+        Libera memória das versões antigas de um namespace (SCAN + UNLINK incremental).
+        Só remove chaves de versões anteriores à atual, então é seguro rodar a qualquer momento.
+        """
+        if not self._client:
+            return 0
+        try:
+            current = int(await self._client.get(CacheKey.namespace(namespace)) or 0)
+            if not current:
+                return 0
+            removed = await self._unlink_matching(
+                f"{namespace}:*", lambda key: CacheKey.version_of(namespace, key) < current
+            )
+            logger.info(f"🧹 Sweep de {namespace}: {removed} chaves antigas removidas")
+            return removed
+        except Exception as e:
+            logger.warning(f"Cache SWEEP erro para {namespace}: {e}")
+            return 0
+    
     async def exists(self, key: str) -> bool:
         """Verifica se chave existe."""
         if not self._client:
@@ -125,15 +555,217 @@ class RedisCache:
             return -2
     
     async def mget(self, keys: list[str], model: Type[T]) -> list[Optional[T]]:
-        """Recupera múltiplos valores do cache."""
+        """Recupera múltiplos valores do cache (só as chaves fora do L1 vão ao Redis)."""
         if not self._client:
             return [None] * len(keys)
+        results: list[Optional[T]] = [None] * len(keys)
+        pending = list(range(len(keys)))
+        if self._l1_ready:
+            pending = []
+            for i, key in enumerate(keys):
+                entry = self._local.get(key, model)
+                if entry is None:
+                    pending.append(i)
+                else:
+                    results[i] = entry.value
+            self._stats["l1_hits"] += len(keys) - len(pending)
+        if not pending:
+            return results
+        generation = self._generation
         try:
-            values = await self._client.mget(keys)
-            return [model.parse_raw(v) if v else None for v in values]
+            values = await self._raw.mget([keys[i] for i in pending])
         except Exception as e:
             logger.warning(f"Cache MGET erro: {e}")
-            return [None] * len(keys)
+            self._stats["misses"] += len(pending)
+            return results
+        for i, data in zip(pending, values):
+            if data:
+                try:
+                    entry = decode_entry(data, model)
+                except Exception as e:
+                    logger.warning(f"Cache MGET decode erro para {keys[i]}: {e}")
+                    self._stats["misses"] += 1
+                    continue
+                results[i] = entry.value
+                self._stats["l2_hits"] += 1
+                self._remember(keys[i], entry, len(data), CacheConfig.L1_TTL, generation)
+            else:
+                self._stats["misses"] += 1
+        return results
+    
+    async def set_many(
+        self, items: dict[str, BaseModel], ttl: int = CacheConfig.DEFAULT_TTL, soft_ttl: Optional[int] = None
+    ) -> bool:
+        """Armazena vários models em um único round trip (pipeline sem transação)."""
+        if not self._client or not items:
+            return False
+        try:
+            pipe = self._raw.pipeline(transaction=False)
+            fresh_until = time.time() + soft_ttl if soft_ttl else None
+            payloads = {key: encode_value(value, fresh_until=fresh_until) for key, value in items.items()}
+            for key, data in payloads.items():
+                pipe.setex(key, ttl, data)
+            if CacheConfig.L1_ENABLED:
+                pipe.publish(CacheConfig.INVALIDATION_CHANNEL, self._invalidation(list(items)))
+            generation = self._generation
+            await pipe.execute()
+            for key, value in items.items():
+                self._remember(key, CacheEntry(value, fresh_until), len(payloads[key]), ttl, generation)
+            return True
+        except Exception as e:
+            logger.warning(f"Cache SET_MANY erro: {e}")
+            return False
+    
+    async def acquire_lock(self, key: str, token: str, ttl_ms: int) -> bool:
+        """Lock distribuído simples (SET NX PX). Retorna True se adquirido."""
+        if not self._client:
+            return False
+        try:
+            return bool(await self._client.set(key, token, nx=True, px=ttl_ms))
+        except Exception as e:
+            logger.warning(f"Cache LOCK erro para {key}: {e}")
+            return False
+    
+    async def release_lock(self, key: str, token: str) -> bool:
+        """Libera o lock somente se ainda pertence a `token` (compare-and-delete atômico)."""
+        if not self._client:
+            return False
+        try:
+            return bool(await self._client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token))
+        except Exception as e:
+            logger.warning(f"Cache UNLOCK erro para {key}: {e}")
+            return False
+    
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        """Incrementa um contador dentro de um hash."""
+        if not self._client:
+            return 0
+        try:
+            return await self._client.hincrby(key, field, amount)
+        except Exception as e:
+            logger.warning(f"Cache HINCRBY erro para {key}: {e}")
+            return 0
+    
+    async def hgetall(self, key: str) -> dict[str, str]:
+        """Retorna todos os campos de um hash."""
+        if not self._client:
+            return {}
+        try:
+            return await self._client.hgetall(key)
+        except Exception as e:
+            logger.warning(f"Cache HGETALL erro para {key}: {e}")
+            return {}
+    
+    async def publish_hash(self, key: str, fields: dict[str, Any], channel: str, ttl: int) -> bool:
+        """Atualiza campos de um hash e publica a mudança em `channel` (um round trip)."""
+        if not self._client:
+            return False
+        try:
+            pipe = self._client.pipeline(transaction=True)
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, ttl)
+            pipe.publish(channel, json.dumps(fields))
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Cache HSET/PUBLISH erro para {key}: {e}")
+            return False
+
+    async def publish_hashes(self, updates: list[tuple[str, dict[str, Any], str]], ttl: int) -> bool:
+        """`publish_hash` para vários hashes (key, campos, canal) em um único pipeline."""
+        if not self._client or not updates:
+            return False
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for key, fields, channel in updates:
+                pipe.hset(key, mapping=fields)
+                pipe.expire(key, ttl)
+                pipe.publish(channel, json.dumps(fields))
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Cache HSET/PUBLISH em lote erro ({len(updates)} hashes): {e}")
+            return False
+
+    def pubsub(self) -> Optional[Any]:
+        """Nova conexão pub/sub (None sem Redis); quem chama fecha com `aclose()`."""
+        if not self._client:
+            return None
+        return self._client.pubsub(ignore_subscribe_messages=True)
+
+    async def eval(self, script: str, keys: list[str], args: list[Any]) -> Any:
+        """Executa um script Lua (operações atômicas de múltiplos comandos)."""
+        if not self._client:
+            return None
+        try:
+            return await self._client.eval(script, len(keys), *keys, *args)
+        except Exception as e:
+            logger.warning(f"Cache EVAL erro para {keys}: {e}")
+            return None
+    
+    async def smembers(self, key: str) -> Set[str]:
+        """Retorna os membros de um set."""
+        if not self._client:
+            return set()
+        try:
+            return await self._client.smembers(key)
+        except Exception as e:
+            logger.warning(f"Cache SMEMBERS erro para {key}: {e}")
+            return set()
+    
+    def refresh_in_background(self, key: str, refresh: Callable[[], Awaitable[Any]]):
+        """
+        Dispara `refresh` (que recalcula e grava `key`) em background, no máximo
+        um por chave neste processo e, via lock no Redis, um por chave no cluster.
+        """
+        if key in self._refreshing or not self._client:
+            return
+
+        async def run():
+            lock_key = CacheKey.lock(f"refresh:{key}")
+            token = uuid.uuid4().hex
+            if not await self.acquire_lock(lock_key, token, CacheConfig.SWR_LOCK_MS):
+                return
+            try:
+                await refresh()
+                self._stats["background_refreshes"] += 1
+            except Exception as e:
+                logger.warning(f"Refresh em background falhou para {key}: {e}")
+                self._stats["background_refresh_errors"] += 1
+            finally:
+                await self.release_lock(lock_key, token)
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+    
+    def revalidate(self, key: str, entry: CacheEntry, refresh: Callable[[], Awaitable[Any]]):
+        """Agenda o refresh de uma entrada servida do cache, se ela estiver stale (ou quase)."""
+        if entry.should_refresh(CacheConfig.SWR_BETA):
+            if entry.is_stale:
+                self._stats["stale_hits"] += 1
+            self.refresh_in_background(key, refresh)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratio por camada e uso de memória do L1."""
+        l1, l2, misses = self._stats["l1_hits"], self._stats["l2_hits"], self._stats["misses"]
+        lookups = l1 + l2 + misses
+        return {
+            "l1_enabled": CacheConfig.L1_ENABLED,
+            "l1_ready": self._l1_ready,
+            "lookups": lookups,
+            "l1_hits": l1,
+            "l2_hits": l2,
+            "misses": misses,
+            "l1_hit_ratio": round(l1 / lookups, 4) if lookups else 0.0,
+            "l2_hit_ratio": round(l2 / lookups, 4) if lookups else 0.0,
+            "invalidations_received": self._stats["invalidations_received"],
+            "stale_hits": self._stats["stale_hits"],
+            "background_refreshes": self._stats["background_refreshes"],
+            "background_refresh_errors": self._stats["background_refresh_errors"],
+            "functions": {name: dict(counts) for name, counts in _cached_stats.items()},
+            **self._local.stats(),
+        }
     
     @property
     def is_connected(self) -> bool:
@@ -149,8 +781,28 @@ class CacheKey:
     """Builder para construir chaves de cache de forma padronizada."""
     
     @staticmethod
-    def product(marketplace: str, product_id: str) -> str:
-        """Chave para dados de produto."""
+    def namespace(namespace: str) -> str:
+        """Contador de versão de um namespace."""
+        return f"ns:{namespace}"
+    
+    @staticmethod
+    def version_of(namespace: str, key: str) -> int:
+        """Versão de uma chave do namespace (chaves sem `v<n>:` são da versão 0)."""
+        segment = key[len(namespace) + 1:].split(":", 1)
+        if len(segment) == 2 and segment[0][:1] == "v" and segment[0][1:].isdigit():
+            return int(segment[0][1:])
+        return 0
+    
+    @staticmethod
+    def product_namespace(marketplace: str) -> str:
+        """Namespace das chaves de produto de um marketplace."""
+        return f"product:{marketplace}"
+    
+    @staticmethod
+    def product(marketplace: str, product_id: str, version: int = 0) -> str:
+        """Chave para dados de produto (versão 0 mantém o formato antigo)."""
+        if version:
+            return f"product:{marketplace}:v{version}:{product_id}"
         return f"product:{marketplace}:{product_id}"
     
     @staticmethod
@@ -167,8 +819,191 @@ class CacheKey:
     def job_status(job_id: str) -> str:
         """Chave para status de job."""
         return f"job_status:{job_id}"
+
+    @staticmethod
+    def job_events(job_id: str) -> str:
+        """Canal pub/sub com as atualizações de um job."""
+        return f"job_events:{job_id}"
+    
+    @staticmethod
+    def lock(key: str) -> str:
+        """Chave de lock distribuído para outra chave."""
+        return f"lock:{key}"
+    
+    @staticmethod
+    def singleflight_stats(name: str) -> str:
+        """Hash com contadores de coalescência entre processos."""
+        return f"singleflight_stats:{name}"
+    
+    @staticmethod
+    def circuit(host: str) -> str:
+        """Hash com o estado do circuit breaker de um host."""
+        return f"circuit:{host}"
+    
+    @staticmethod
+    def circuit_hosts() -> str:
+        """Set com os hosts que já tiveram circuit breaker."""
+        return "circuit_hosts"
+    
+    @staticmethod
+    def hot_products() -> str:
+        """Sorted set com a popularidade das chaves de produto."""
+        return "hot_products"
+    
+    @staticmethod
+    def refresh_meta(product_key: str) -> str:
+        """Hash com URL e histórico de refresh de uma chave de produto."""
+        return f"refresh_meta:{product_key}"
+    
+    @staticmethod
+    def refresh_budget(marketplace: str) -> str:
+        """Contador de scrapes de refresh do minuto corrente."""
+        return f"refresh_budget:{marketplace}"
+    
+    @staticmethod
+    def llm_response(model: str, temperature: float, prompt_hash: str) -> str:
+        """Lista de variantes de resposta do LLM (hash tag: a rotação cai no mesmo slot)."""
+        payload = json.dumps([model, temperature, prompt_hash])
+        return f"llm:{{{hashlib.sha256(payload.encode()).hexdigest()[:32]}}}"
+
+    @staticmethod
+    def llm_rotation(key: str) -> str:
+        """Contador de rotação das variantes de uma resposta do LLM."""
+        return f"{key}:rr"
+
+    @staticmethod
+    def llm_stats() -> str:
+        """Hash com contadores do cache de respostas do LLM."""
+        return "llm_cache_stats"
+    
+    @staticmethod
+    def artifact(fingerprint: str) -> str:
+        """Hash com o resultado (roteiro + vídeo) de um job concluído, por conteúdo."""
+        return f"artifact:{fingerprint}"
+
+    @staticmethod
+    def job_inflight(fingerprint: str) -> str:
+        """Job em andamento que produz o artefato `fingerprint`."""
+        return f"job_inflight:{fingerprint}"
+
+    @staticmethod
+    def dedupe_stats() -> str:
+        """Hash com contadores de deduplicação de jobs."""
+        return "dedupe_stats"
+
+    @staticmethod
+    def negative(key: str) -> str:
+        """Falha cacheada (negative caching) de outra chave."""
+        return f"neg:{key}"
     
     @staticmethod
     def scraper_metadata(marketplace: str) -> str:
         """Chave para metadados do scraper."""
         return f"scraper_meta:{marketplace}"
+
+
+class CachedFailure(BaseModel):
+    error_type: str
+    message: str
+
+
+class CachedFailureError(Exception):
+    """Falha servida do negative cache (a original aconteceu há menos de `negative_ttl`s)."""
+
+    def __init__(self, failure: CachedFailure):
+        super().__init__(failure.message)
+        self.error_type = failure.error_type
+
+
+# Contadores por função decorada com @cached
+_cached_stats: Dict[str, Counter] = {}
+
+
+def cached(
+    key: Callable[..., Optional[str]],
+    model: Any,
+    ttl: int = CacheConfig.DEFAULT_TTL,
+    soft_ttl: Optional[int] = None,
+    bypass: Optional[str] = None,
+    negative_ttl: Optional[int] = None,
+    negative_if: Optional[Callable[[BaseException], bool]] = None,
+    flight: Any = None,
+    distributed: Any = None,
+    name: Optional[str] = None,
+):
+    """
+    Cache declarativo para funções async.
+
+    - `key` recebe os mesmos argumentos da função e monta a chave (via `CacheKey`);
+      retornando None, a chamada passa direto sem cache.
+    - `bypass`: nome do argumento booleano que força recalcular (ex: `force_reanalysis`).
+    - `soft_ttl`: stale-while-revalidate: entrada stale (ou escolhida pelo XFetch) é
+      servida e recalculada em background (ver `RedisCache.revalidate`).
+    - `negative_ttl`: cacheia falhas (filtradas por `negative_if`) e as repete como `CachedFailureError`.
+    - Misses concorrentes da mesma chave são coalescidos (`flight`, um SingleFlight;
+      `distributed`, um RedisSingleFlight opcional para coalescer entre processos).
+    Resultados None não são cacheados.
+    """
+    from app.core.singleflight import SingleFlight
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        label = name or fn.__qualname__
+        counts = _cached_stats.setdefault(label, Counter())
+        coalescer = flight or SingleFlight(label)
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs)
+            if cache_key is None:
+                counts["uncached"] += 1
+                return await fn(*args, **kwargs)
+
+            async def compute_and_store():
+                start = time.monotonic()
+                try:
+                    value = await fn(*args, **kwargs)
+                except Exception as e:
+                    counts["errors"] += 1
+                    if negative_ttl and (negative_if is None or negative_if(e)):
+                        failure = CachedFailure(error_type=type(e).__name__, message=str(e))
+                        await cache.set(CacheKey.negative(cache_key), failure, ttl=negative_ttl)
+                    raise
+                if value is not None:
+                    await cache.set(cache_key, value, ttl=ttl, soft_ttl=soft_ttl, compute_time=time.monotonic() - start)
+                return value
+
+            async def execute():
+                if distributed is None:
+                    return await compute_and_store()
+                return await distributed.do(cache_key, compute_and_store, load=lambda: cache.get(cache_key, model))
+
+            async def refresh():
+                return await coalescer.do(cache_key, execute)
+
+            skip = False
+            if bypass:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                skip = bool(bound.arguments.get(bypass))
+
+            if skip:
+                counts["bypassed"] += 1
+            else:
+                entry = await cache.get_entry(cache_key, model)
+                if entry is not None:
+                    counts["stale_hits" if entry.is_stale else "hits"] += 1
+                    cache.revalidate(cache_key, entry, refresh)
+                    return entry.value
+                if negative_ttl:
+                    failure = await cache.get(CacheKey.negative(cache_key), CachedFailure)
+                    if failure is not None:
+                        counts["negative_hits"] += 1
+                        raise CachedFailureError(failure)
+                counts["coalesced" if coalescer.in_flight(cache_key) else "misses"] += 1
+            return await refresh()
+
+        wrapper.cache_stats = counts
+        return wrapper
+
+    return decorator
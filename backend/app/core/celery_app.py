@@ -19,3 +19,45 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
 )
+
+# Refresh em background dos produtos mais acessados (rodar `celery beat`)
+from app.services.hot_products import RefreshConfig
+from app.services.video_did import DIDConfig
+from app.services.scheduler import SchedulerConfig
+from app.services.dedupe import DedupeConfig
+
+# Tiers de prioridade (jobs.high/default/low) para o trabalho curto e uma fila
+# separada para esperas longas; rode workers com `-Q` por fila ou por grupo.
+celery_app.conf.task_routes = {
+    "app.core.tasks.process_job_task": {"queue": SchedulerConfig.queue("default")},
+    "app.core.tasks.await_render_task": {"queue": SchedulerConfig.IO_QUEUE},
+    "app.core.tasks.sweep_pending_renders_task": {"queue": SchedulerConfig.IO_QUEUE},
+    "app.core.tasks.sweep_orphan_followers_task": {"queue": SchedulerConfig.IO_QUEUE},
+}
+
+celery_app.conf.beat_schedule = {
+    "refresh-hot-products": {
+        "task": "app.core.tasks.refresh_hot_products_task",
+        "schedule": RefreshConfig.INTERVAL,
+        # Rodadas atrasadas não se acumulam
+        "options": {"expires": RefreshConfig.INTERVAL},
+    },
+    # Despacha as sub-filas justas (o fim de cada job também despacha)
+    "dispatch-fair-queues": {
+        "task": "app.core.tasks.dispatch_fair_queues_task",
+        "schedule": SchedulerConfig.PUMP_INTERVAL,
+        "options": {"expires": SchedulerConfig.PUMP_INTERVAL},
+    },
+    # Conclui renderizações do D-ID cujo webhook se perdeu
+    "sweep-pending-renders": {
+        "task": "app.core.tasks.sweep_pending_renders_task",
+        "schedule": DIDConfig.SWEEP_INTERVAL,
+        "options": {"expires": DIDConfig.SWEEP_INTERVAL},
+    },
+    # Seguidores de jobs idênticos cujo dono morreu, falhou ou nunca foi gravado
+    "sweep-orphan-followers": {
+        "task": "app.core.tasks.sweep_orphan_followers_task",
+        "schedule": DedupeConfig.SWEEP_INTERVAL,
+        "options": {"expires": DedupeConfig.SWEEP_INTERVAL},
+    },
+}
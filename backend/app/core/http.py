@@ -0,0 +1,96 @@
+"""
+Gerenciador de clientes HTTP compartilhados.
+Mantém pools keep-alive reutilizáveis para scrapers e provedores de vídeo.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (habilita HTTP/2 no httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPClientConfig:
+    """Configuração centralizada dos pools HTTP."""
+    MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    ENABLE_HTTP2 = os.getenv("HTTP_ENABLE_HTTP2", "true").lower() == "true"
+    DEFAULT_TIMEOUT = 30.0
+
+
+class HTTPClientManager:
+    """
+    Pool de `httpx.AsyncClient` por nome (ex: "scrapers", "did").
+    Design: Singleton, iniciado/fechado pelo lifespan do FastAPI e pelo worker Celery.
+
+    Cada cliente mantém conexões keep-alive por host (origem), então
+    requisições repetidas ao mesmo marketplace reaproveitam TCP/TLS.
+    """
+    _instance: Optional['HTTPClientManager'] = None
+    _clients: Dict[str, httpx.AsyncClient] = {}
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    @property
+    def http2_enabled(self) -> bool:
+        return HTTPClientConfig.ENABLE_HTTP2 and HTTP2_AVAILABLE
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=HTTPClientConfig.MAX_CONNECTIONS,
+            max_keepalive_connections=HTTPClientConfig.MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTPClientConfig.KEEPALIVE_EXPIRY,
+        )
+        logger.debug(f"Criando pool HTTP '{name}' (http2={self.http2_enabled})")
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=HTTPClientConfig.DEFAULT_TIMEOUT,
+            http2=self.http2_enabled,
+        )
+
+    async def start(self):
+        """Associa o gerenciador ao event loop atual."""
+        self._loop = asyncio.get_running_loop()
+        logger.info(f"✓ Pools HTTP prontos (http2={self.http2_enabled})")
+
+    async def close(self):
+        """Fecha todos os clientes e libera as conexões."""
+        clients = list(self._clients.values())
+        self._clients = {}
+        self._loop = None
+        if clients:
+            await asyncio.gather(*(c.aclose() for c in clients), return_exceptions=True)
+
+    def get(self, name: str = "default") -> httpx.AsyncClient:
+        """
+        Empresta o cliente compartilhado `name`, criando-o sob demanda.
+        Conexões httpx ficam presas ao event loop em que nasceram; se o loop
+        mudou (ex: um `asyncio.run` por task), os clientes são recriados.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._clients = {}
+            self._loop = loop
+
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build(name)
+            self._clients[name] = client
+        return client
+
+
+# Singleton global
+http_clients = HTTPClientManager()
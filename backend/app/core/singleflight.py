@@ -0,0 +1,131 @@
+"""
+Coalescência de requisições (single-flight).
+Chamadas concorrentes com a mesma chave aguardam uma única execução.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.core.cache import cache, CacheKey
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """
+    Single-flight em memória (por processo/event loop).
+    O primeiro chamador dispara `fn`; os demais aguardam o mesmo resultado
+    (ou a mesma exceção).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.deduplicated = 0
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # marca como consumida mesmo sem chamadores restantes
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is loop:
+            self.deduplicated += 1
+        else:
+            # A execução roda em uma task própria: cancelar um chamador
+            # (ex: cliente desconectou) não interrompe os demais
+            task = loop.create_task(fn())
+            self._inflight[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._inflight),
+        }
+
+
+class RedisSingleFlight:
+    """
+    Single-flight entre processos (réplicas da API e workers Celery) usando
+    um lock no Redis. Quem obtém o lock executa `fn` (que deve gravar o
+    resultado no cache); os demais fazem polling de `load` até o valor aparecer.
+    Sem Redis, degrada para a execução direta.
+    """
+
+    def __init__(self, name: str, lock_ttl: float = 60.0, wait_timeout: float = 30.0, poll_interval: float = 0.25):
+        self.name = name
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.executions = 0
+        self.deduplicated = 0
+        self.fallbacks = 0
+
+    async def _count(self, field: str):
+        await cache.hincrby(CacheKey.singleflight_stats(self.name), field)
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        load: Callable[[], Awaitable[Optional[T]]],
+    ) -> T:
+        if not cache.is_connected:
+            return await fn()
+
+        lock_key = CacheKey.lock(key)
+        token = uuid.uuid4().hex
+        if await cache.acquire_lock(lock_key, token, int(self.lock_ttl * 1000)):
+            self.executions += 1
+            await self._count("executions")
+            try:
+                return await fn()
+            finally:
+                await cache.release_lock(lock_key, token)
+
+        # Outro processo já está executando: aguarda o resultado aparecer no cache
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            value = await load()
+            if value is not None:
+                self.deduplicated += 1
+                await self._count("deduplicated")
+                return value
+            if not await cache.exists(lock_key):
+                # Dono terminou sem gravar (falhou) ou o lock expirou
+                break
+
+        logger.info(f"Single-flight '{self.name}': sem resultado para {key}, executando localmente")
+        self.fallbacks += 1
+        await self._count("fallbacks")
+        return await fn()
+
+    async def stats(self) -> Dict[str, Any]:
+        shared = await cache.hgetall(CacheKey.singleflight_stats(self.name))
+        return {
+            "local": {
+                "executions": self.executions,
+                "deduplicated": self.deduplicated,
+                "fallbacks": self.fallbacks,
+            },
+            "cluster": {k: int(v) for k, v in shared.items()},
+        }
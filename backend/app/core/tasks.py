@@ -1,20 +1,155 @@
 from app.core.celery_app import celery_app
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from celery import group
 from celery.utils.log import get_task_logger
 from app.services.orchestrator import AdOrchestrator
-import asyncio
+from app.services.price_refresher import price_refresher
+from app.core.worker_loop import worker_loop
+from app.services.scheduler import fair_scheduler, SchedulerConfig
+from app.services.video_did import DIDConfig
+from typing import Collection, List, Optional
+import os
 
 logger = get_task_logger(__name__)
 
+# Novas tentativas de um job que falhou (retomam do último estágio concluído)
+JOB_MAX_RETRIES = int(os.getenv("JOB_MAX_RETRIES", "2"))
+JOB_RETRY_DELAY = int(os.getenv("JOB_RETRY_DELAY", "30"))
+
+# Um loop e um conjunto de conexões por processo filho (pool prefork).
+# No pool solo o loop sobe na primeira task.
+@worker_process_init.connect
+def _start_worker_loop(**_):
+    worker_loop.start()
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _stop_worker_loop(**_):
+    worker_loop.stop()
+
+async def dispatch_fair_queue(tier: str, claim: Collection[str] = ()) -> List[str]:
+    """
+    Envia ao broker os próximos jobs do tier, na ordem justa do agendador.
+    Os que não chegam ao broker liberam o slot e voltam à frente da fila do
+    usuário, exceto os de `claim` (do chamador), devolvidos para rodar no processo.
+    """
+    unsent, requeue = [], []
+    for job_id, user_id in await fair_scheduler.next_batch(tier):
+        try:
+            process_job_task.apply_async(args=[job_id, tier], queue=SchedulerConfig.queue(tier))
+        except Exception as e:
+            logger.warning(f"[celery] Broker indisponível para o job {job_id}: {e}")
+            await fair_scheduler.release(tier, job_id)
+            if job_id in claim:
+                unsent.append(job_id)
+            else:
+                requeue.append((job_id, user_id))
+    if requeue:
+        # Jobs de outras requisições (já aceitas) esperam o broker voltar na fila justa
+        await fair_scheduler.requeue(tier, requeue)
+    return unsent
+
+async def schedule_job(job_id: str, user_id: str, tier: str) -> List[str]:
+    """Enfileira o job na sub-fila do usuário e despacha o tier; devolve `[job_id]` se ele deve rodar no processo."""
+    if await fair_scheduler.submit(job_id, user_id, tier):
+        return await dispatch_fair_queue(tier, claim={job_id})
+    # Sem Redis não há fila justa: direto para a fila do tier
+    try:
+        process_job_task.apply_async(args=[job_id], queue=SchedulerConfig.queue(tier))
+        return []
+    except Exception as e:
+        logger.warning(f"[celery] Broker indisponível para o job {job_id}: {e}")
+        return [job_id]
+
+async def schedule_batch(job_ids: List[str], user_id: str, tier: str, batch_id: str) -> List[str]:
+    """Como `schedule_job` para um lote inteiro: um round trip no Redis (ou um group no broker)."""
+    if await fair_scheduler.submit_many(job_ids, user_id, tier):
+        return await dispatch_fair_queue(tier, claim=set(job_ids))
+    try:
+        # Sem fila justa: um único group, identificado pelo batch_id
+        group(process_job_task.s(job_id) for job_id in job_ids).apply_async(
+            queue=SchedulerConfig.queue(tier), task_id=batch_id
+        )
+        return []
+    except Exception as e:
+        logger.warning(f"[celery] Broker indisponível para o lote {batch_id}: {e}")
+        return list(job_ids)
+
+async def _finish_slot(tier: str, job_id: str):
+    await fair_scheduler.release(tier, job_id)
+    await dispatch_fair_queue(tier)
+
 @celery_app.task(bind=True)
-def process_job_task(self, job_id: str):
+def process_job_task(self, job_id: str, tier: Optional[str] = None):
     logger.info(f"[celery] Iniciando job {job_id}")
     orchestrator = AdOrchestrator()
     try:
-        # Usamos asyncio.run que é mais limpo para scripts/tasks
-        asyncio.run(orchestrator.process_job(job_id=job_id))
-        
-        logger.info(f"[celery] Job concluído {job_id}")
-        return {"job_id": job_id, "status": "done"}
+        # A espera pelo vídeo não ocupa este worker: vai para a fila de I/O
+        status = worker_loop.run(orchestrator.process_job(
+            job_id=job_id, defer_render=True, final_attempt=self.request.retries >= JOB_MAX_RETRIES
+        ), db=True)
     except Exception as e:
         logger.error(f"[celery] Erro no job {job_id}: {e}")
-        raise
\ No newline at end of file
+        if tier:
+            worker_loop.run(_finish_slot(tier, job_id))
+        raise
+
+    # "queued": falhou, mas não na última tentativa (uma falha vinda do D-ID é final)
+    if status == "queued" and self.request.retries < JOB_MAX_RETRIES:
+        # O slot do agendador continua reservado até a última tentativa
+        logger.info(f"[celery] Job {job_id} falhou; nova tentativa em {JOB_RETRY_DELAY}s")
+        raise self.retry(countdown=JOB_RETRY_DELAY, max_retries=JOB_MAX_RETRIES)
+    if status == "rendering" and not DIDConfig.webhooks_enabled():
+        await_render_task.apply_async(args=[job_id], countdown=DIDConfig.POLL_INTERVAL)
+    if tier:
+        worker_loop.run(_finish_slot(tier, job_id))
+    logger.info(f"[celery] Job {job_id} finalizado: {status}")
+    return {"job_id": job_id, "status": status}
+
+# Consultas por job: o bastante para cobrir `RENDER_TIMEOUT` (com folga)
+RENDER_POLL_LIMIT = DIDConfig.RENDER_TIMEOUT // max(1, DIDConfig.POLL_INTERVAL) + 2
+
+@celery_app.task(bind=True, ignore_result=True, max_retries=RENDER_POLL_LIMIT)
+def await_render_task(self, job_id: str):
+    """Consulta o D-ID uma vez e se reagenda até o vídeo ficar pronto (sem webhook)."""
+    try:
+        status = worker_loop.run(AdOrchestrator().poll_render(job_id), db=True)
+    except Exception as e:
+        logger.warning(f"[celery] Falha ao consultar renderização do job {job_id}: {e}")
+        status = "rendering"
+    if status == "rendering":
+        if self.request.retries >= RENDER_POLL_LIMIT:
+            # poll_render falha o job no prazo; se nem isso foi possível, o sweeper assume
+            logger.error(f"[celery] Job {job_id} sem resposta após {RENDER_POLL_LIMIT} consultas; deixando para o sweeper")
+            return
+        raise self.retry(countdown=DIDConfig.POLL_INTERVAL)
+    logger.info(f"[celery] Renderização do job {job_id}: {status}")
+
+@celery_app.task(ignore_result=True)
+def dispatch_fair_queues_task():
+    for tier in SchedulerConfig.TIERS:
+        worker_loop.run(dispatch_fair_queue(tier))
+
+@celery_app.task(ignore_result=True)
+def sweep_orphan_followers_task():
+    async def sweep():
+        stats = await AdOrchestrator().sweep_orphan_followers()
+        for job in stats["requeued"]:
+            await schedule_job(job["job_id"], job["user_id"], job["priority"])
+        return {**stats, "requeued": len(stats["requeued"])}
+
+    stats = worker_loop.run(sweep(), db=True)
+    logger.info(f"[celery] Sweeper de seguidores órfãos: {stats}")
+    return stats
+
+@celery_app.task(ignore_result=True)
+def refresh_hot_products_task():
+    stats = worker_loop.run(price_refresher.run_once())
+    logger.info(f"[celery] Refresh de preços: {stats}")
+    return stats
+
+@celery_app.task(ignore_result=True)
+def sweep_pending_renders_task():
+    stats = worker_loop.run(AdOrchestrator().sweep_pending_renders(), db=True)
+    logger.info(f"[celery] Sweeper de renderizações: {stats}")
+    return stats
@@ -0,0 +1,122 @@
+"""
+Event loop persistente por processo worker do Celery.
+
+Redis, Mongo (Motor) e os pools HTTP ficam presos ao loop em que foram
+criados. Em vez de um `asyncio.run` por task (loop novo, conexões novas),
+cada processo worker mantém um loop numa thread dedicada, conecta os recursos
+uma vez e as tasks submetem suas corrotinas a ele.
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+from app.core.cache import cache
+from app.core.http import http_clients
+from app.db.db import db_wrapper
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WorkerLoop:
+    """Loop asyncio de longa duração com os recursos compartilhados já conectados."""
+
+    # Tempo para tasks de background (refresh SWR, tracking) terminarem no shutdown
+    DRAIN_TIMEOUT = 5.0
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._db_ready = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self):
+        """Sobe o loop e conecta Redis, HTTP e Mongo (idempotente)."""
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name="worker-loop", daemon=True)
+            self._thread.start()
+            ready.wait()
+            # Só fica visível para as tasks depois que os recursos estão conectados
+            asyncio.run_coroutine_threadsafe(self._open(), loop).result()
+            self._loop = loop
+        logger.info("✓ Event loop do worker pronto")
+
+    async def _open(self):
+        await cache.connect()
+        await http_clients.start()
+        await self._connect_db()
+
+    async def _connect_db(self):
+        # Uma falha aqui não derruba o processo: a próxima task tenta de novo
+        try:
+            await db_wrapper.connect()
+            self._db_ready = True
+        except Exception as e:
+            logger.warning(f"Falha ao conectar o MongoDB no worker (nova tentativa na próxima task): {e}")
+            self._db_ready = False
+
+    async def _close(self):
+        current = asyncio.current_task()
+        # O listener de invalidação do L1 nunca termina; o disconnect do cache o encerra
+        pending = [t for t in asyncio.all_tasks() if t is not current and t is not cache._listener]
+        if pending:
+            _, still_running = await asyncio.wait(pending, timeout=self.DRAIN_TIMEOUT)
+            for task in still_running:
+                task.cancel()
+            await asyncio.gather(*still_running, return_exceptions=True)
+        if self._db_ready:
+            await db_wrapper.close()
+            self._db_ready = False
+        await http_clients.close()
+        await cache.disconnect()
+
+    def _submit(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        assert self._loop is not None
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def run(self, coro: Coroutine[Any, Any, T], db: bool = False) -> T:
+        """Executa `coro` no loop do worker e bloqueia até o resultado."""
+        if self._loop is None:
+            self.start()
+        if db and not self._db_ready:
+            self._submit(self._connect_db())
+        return self._submit(coro)
+
+    def stop(self):
+        """Drena tasks pendentes, fecha as conexões e encerra o loop (idempotente)."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None:
+                return
+            try:
+                if loop.is_running():
+                    self._submit(self._close(), timeout=self.DRAIN_TIMEOUT + 30)
+            except Exception as e:
+                logger.warning(f"Erro ao encerrar recursos do worker: {e}")
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                if thread:
+                    thread.join(timeout=10)
+                loop.close()
+                self._loop, self._thread = None, None
+        logger.info("Event loop do worker encerrado.")
+
+
+# Singleton global (um por processo)
+worker_loop = WorkerLoop()
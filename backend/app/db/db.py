@@ -2,9 +2,28 @@ import os
 import logging
 from typing import Optional, Any
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 logger = logging.getLogger(__name__)
 
+# Índices da coleção `jobs`, criados no startup (create_indexes é idempotente)
+JOB_INDEXES = [
+    # Listagem por usuário com paginação keyset em (created_at, _id)
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_created"),
+    IndexModel(
+        [("user_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="user_status_created",
+    ),
+    # Sweeper do D-ID (status "rendering" há mais de N segundos) e contagens por status
+    IndexModel([("status", ASCENDING), ("render_submitted_at", ASCENDING)], name="status_render"),
+    # Deduplicação e seguidores de um job idêntico
+    IndexModel([("fingerprint", ASCENDING), ("status", ASCENDING)], name="fingerprint_status", sparse=True),
+    IndexModel([("attached_to", ASCENDING)], name="attached_to", sparse=True),
+    # Progresso de lotes e recuperação do executor local
+    IndexModel([("batch_id", ASCENDING), ("status", ASCENDING)], name="batch_status", sparse=True),
+    IndexModel([("runner_seen_at", ASCENDING)], name="runner_seen", sparse=True),
+]
+
 class Database:
     def __init__(self):
         # Usamos Any para evitar o erro "Variável não permitida na expressão de tipo"
@@ -32,6 +51,11 @@ class Database:
             logger.error(f"❌ Erro ao conectar no MongoDB: {e}")
             raise e
 
+    async def ensure_indexes(self):
+        """Cria os índices que faltarem (não recria os existentes)."""
+        names = await self.database["jobs"].create_indexes(JOB_INDEXES)
+        logger.info(f"✓ Índices de jobs garantidos: {', '.join(names)}")
+
     async def close(self):
         """Fecha a conexão."""
         if self.client is not None:
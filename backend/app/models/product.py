@@ -79,7 +79,7 @@ class Product(BaseModel):
     
     @property
     def cache_key(self) -> str:
-        return f"product:{self.metadata.marketplace}:{self.metadata.marketplace_id}"
+        return f"product:{self.metadata.marketplace.value}:{self.metadata.marketplace_id}"
 
 class ProductCreateRequest(BaseModel):
     url: str
@@ -96,7 +96,14 @@ class ProductResponse(BaseModel):
     source_url: str
     seller_name: Optional[str]
 
+class BulkProductError(BaseModel):
+    index: int
+    url: str
+    error: str
+
 class BulkProductResponse(BaseModel):
     total: int
     products: List[ProductResponse]
-    cache_hit: bool = False
\ No newline at end of file
+    cache_hit: bool = False
+    cache_hits: int = 0
+    errors: List[BulkProductError] = Field(default_factory=list)
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Deduplicação de jobs por conteúdo.
+Jobs com o mesmo produto canônico, estilo e entradas do roteiro produzem o
+mesmo anúncio: um artefato já pronto é reaproveitado (sem scrape, LLM ou
+D-ID) e um job idêntico em andamento recebe os seguidores que chegarem.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app.core.cache import cache, CacheKey
+
+logger = logging.getLogger(__name__)
+
+
+class DedupeConfig:
+    """Configuração da deduplicação de jobs."""
+    ENABLED = os.getenv("JOB_DEDUPE_ENABLED", "true").lower() in ("1", "true", "yes")
+    # Por quanto tempo um anúncio pronto é reaproveitado
+    ARTIFACT_TTL = int(os.getenv("JOB_DEDUPE_ARTIFACT_TTL", str(7 * 86400)))
+    # Teto de duração de um job em andamento (libera a chave se o worker morrer)
+    INFLIGHT_TTL = int(os.getenv("JOB_DEDUPE_INFLIGHT_TTL", "3600"))
+    # Seguidores sem novidade há mais que isso são conferidos pelo sweeper
+    SWEEP_INTERVAL = float(os.getenv("JOB_DEDUPE_SWEEP_INTERVAL", "300"))
+    SWEEP_AFTER = int(os.getenv("JOB_DEDUPE_SWEEP_AFTER", "300"))
+    # Custo estimado de um job (LLM + renderização) para a métrica de economia
+    JOB_COST_USD = float(os.getenv("JOB_DEDUPE_COST_USD", "0.12"))
+
+
+# Registra (ou renova) o dono ou devolve o job que já está produzindo o artefato
+_CLAIM_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner and owner ~= ARGV[1] then return owner end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return ARGV[1]
+"""
+
+# Publica o artefato e libera a chave de "em andamento" (só se ainda for do job)
+_RECORD_SCRIPT = """
+redis.call('HSET', KEYS[1], 'job_id', ARGV[1], 'result_url', ARGV[2], 'script', ARGV[3], 'created_at', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+if redis.call('GET', KEYS[2]) == ARGV[1] then redis.call('DEL', KEYS[2]) end
+return 1
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+
+class JobDeduplicator:
+    @staticmethod
+    def fingerprint(product_key: str, youtube_video_id: Optional[str], style: str, model: str) -> str:
+        """
+        Endereço do conteúdo do anúncio. `product_key` já carrega a versão do
+        namespace do produto, então invalidar o cache do marketplace também
+        invalida os artefatos derivados.
+        """
+        payload = json.dumps([product_key, youtube_video_id, style, model])
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    async def lookup(self, fingerprint: str) -> Optional[Dict[str, str]]:
+        artifact = await cache.hgetall(CacheKey.artifact(fingerprint))
+        return artifact if artifact.get("result_url") else None
+
+    async def claim(self, fingerprint: str, job_id: str) -> str:
+        """Retorna o job dono do fingerprint (o próprio `job_id` se ninguém o produzia ou se já era dele)."""
+        owner = await cache.eval(
+            _CLAIM_SCRIPT, [CacheKey.job_inflight(fingerprint)], [job_id, DedupeConfig.INFLIGHT_TTL]
+        )
+        return owner or job_id
+
+    async def record(self, fingerprint: str, job_id: str, result_url: str, script: str):
+        await cache.eval(
+            _RECORD_SCRIPT,
+            [CacheKey.artifact(fingerprint), CacheKey.job_inflight(fingerprint)],
+            [job_id, result_url, script or "", f"{time.time():.0f}", DedupeConfig.ARTIFACT_TTL],
+        )
+
+    async def release(self, fingerprint: str, job_id: str):
+        await cache.eval(_RELEASE_SCRIPT, [CacheKey.job_inflight(fingerprint)], [job_id])
+
+    async def record_hit(self, kind: str, count: int = 1):
+        """`kind`: "artifact" (reaproveitou um pronto) ou "inflight" (anexou a um em andamento)."""
+        await cache.hincrby(CacheKey.dedupe_stats(), kind, count)
+        await cache.hincrby(CacheKey.dedupe_stats(), "saved_micro_usd", round(DedupeConfig.JOB_COST_USD * 1e6) * count)
+
+    async def stats(self) -> Dict[str, Any]:
+        raw = await cache.hgetall(CacheKey.dedupe_stats())
+        return {
+            "artifact_hits": int(raw.get("artifact", 0)),
+            "inflight_hits": int(raw.get("inflight", 0)),
+            "saved_usd": round(int(raw.get("saved_micro_usd", 0)) / 1e6, 2),
+        }
+
+
+# Singleton global
+job_dedupe = JobDeduplicator()
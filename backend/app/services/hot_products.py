@@ -0,0 +1,130 @@
+"""
+Rastreamento de produtos "quentes" no Redis.
+Cada acesso incrementa a popularidade da chave; o refresher usa esses dados
+para re-scrapear os produtos mais acessados pouco antes de expirarem.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Set
+
+from app.core.cache import cache, CacheKey, CacheConfig
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshConfig:
+    """Configuração do refresh incremental de preços."""
+    INTERVAL = float(os.getenv("REFRESH_INTERVAL", "60"))
+    # Re-scrape quando faltar menos que isso para expirar
+    REFRESH_AHEAD = int(os.getenv("REFRESH_AHEAD", "900"))
+    MAX_CANDIDATES = int(os.getenv("REFRESH_MAX_CANDIDATES", "200"))
+    MAX_PER_RUN = int(os.getenv("REFRESH_MAX_PER_RUN", "50"))
+    CONCURRENCY = int(os.getenv("REFRESH_CONCURRENCY", "4"))
+    # Scrapes de refresh por marketplace por minuto (compartilhado entre workers)
+    BUDGET_PER_MINUTE = int(os.getenv("REFRESH_BUDGET_PER_MINUTE", "30"))
+    # Fator aplicado à popularidade a cada rodada (esquece produtos que esfriaram)
+    DECAY = float(os.getenv("REFRESH_DECAY", "0.9"))
+    MIN_SCORE = 0.5
+    META_TTL = CacheConfig.PRODUCT_TTL * 4
+
+
+_TRACK_SCRIPT = """
+redis.call('ZINCRBY', KEYS[1], 1, ARGV[1])
+redis.call('HSET', KEYS[2], 'url', ARGV[2], 'marketplace', ARGV[3])
+redis.call('HINCRBY', KEYS[2], 'accesses', 1)
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return 1
+"""
+
+# Top N chaves com score, TTL restante e metadados, em um único round trip
+_CANDIDATES_SCRIPT = """
+local top = redis.call('ZREVRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1, 'WITHSCORES')
+local out = {}
+for i = 1, #top, 2 do
+    local key = top[i]
+    local meta = redis.call('HMGET', ARGV[2] .. key, 'url', 'marketplace', 'refreshes', 'changes')
+    table.insert(out, {key, top[i + 1], redis.call('TTL', key), meta[1] or '', meta[2] or '', meta[3] or '0', meta[4] or '0'})
+end
+return out
+"""
+
+_DECAY_SCRIPT = """
+redis.call('ZUNIONSTORE', KEYS[1], 1, KEYS[1], 'WEIGHTS', ARGV[1])
+return redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[2])
+"""
+
+_BUDGET_SCRIPT = """
+local used = redis.call('INCR', KEYS[1])
+if used == 1 then redis.call('EXPIRE', KEYS[1], 60) end
+if used > tonumber(ARGV[1]) then return 0 end
+return 1
+"""
+
+_RECORD_REFRESH_SCRIPT = """
+redis.call('HINCRBY', KEYS[1], 'refreshes', 1)
+if ARGV[1] == '1' then redis.call('HINCRBY', KEYS[1], 'changes', 1) end
+return 1
+"""
+
+
+class HotProductTracker:
+    """Contabiliza acessos e seleciona candidatos a refresh."""
+
+    def __init__(self):
+        # Referências fortes para as tasks de tracking em andamento
+        self._pending: Set[asyncio.Task] = set()
+
+    async def _track(self, cache_key: str, url: str, marketplace: str):
+        await cache.eval(
+            _TRACK_SCRIPT,
+            [CacheKey.hot_products(), CacheKey.refresh_meta(cache_key)],
+            [cache_key, url, marketplace, RefreshConfig.META_TTL],
+        )
+
+    def record_access(self, cache_key: str, url: str, marketplace: str):
+        """Registra um acesso sem adicionar latência ao caminho da requisição."""
+        if not cache.is_connected:
+            return
+        task = asyncio.get_running_loop().create_task(self._track(cache_key, url, marketplace))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def candidates(self) -> List[Dict[str, Any]]:
+        rows = await cache.eval(
+            _CANDIDATES_SCRIPT,
+            [CacheKey.hot_products()],
+            [RefreshConfig.MAX_CANDIDATES, CacheKey.refresh_meta("")],
+        ) or []
+        result = []
+        for key, score, ttl, url, marketplace, refreshes, changes in rows:
+            refreshes, changes = int(refreshes), int(changes)
+            result.append({
+                "key": key,
+                "score": float(score),
+                "ttl": int(ttl),
+                "url": url,
+                "marketplace": marketplace,
+                # Sem histórico, assume taxa de mudança neutra
+                "change_rate": changes / refreshes if refreshes else 0.5,
+            })
+        return result
+
+    async def decay(self) -> int:
+        removed = await cache.eval(
+            _DECAY_SCRIPT, [CacheKey.hot_products()], [RefreshConfig.DECAY, RefreshConfig.MIN_SCORE]
+        )
+        return int(removed or 0)
+
+    async def take_budget(self, marketplace: str) -> bool:
+        allowed = await cache.eval(
+            _BUDGET_SCRIPT, [CacheKey.refresh_budget(marketplace)], [RefreshConfig.BUDGET_PER_MINUTE]
+        )
+        return bool(allowed)
+
+    async def record_refresh(self, cache_key: str, changed: bool):
+        await cache.eval(_RECORD_REFRESH_SCRIPT, [CacheKey.refresh_meta(cache_key)], ["1" if changed else "0"])
+
+
+# Singleton global
+hot_products = HotProductTracker()
@@ -0,0 +1,91 @@
+"""
+Progresso de jobs em tempo real.
+O orquestrador publica cada transição (status, estágio, % concluído) no Redis:
+o último estado fica no hash `job_status:{id}` e a mudança sai no canal
+`job_events:{id}`. O GET do job lê só o hash; o stream SSE assina o canal.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.core.cache import cache, CacheKey, CacheConfig
+
+logger = logging.getLogger(__name__)
+
+
+class JobEvents:
+    # Status em que o job não muda mais (o stream encerra)
+    TERMINAL = ("completed", "failed")
+
+    async def publish(
+        self,
+        job_id: str,
+        status: Optional[str] = None,
+        stage: Optional[str] = None,
+        progress: Optional[int] = None,
+        **extra: Any,
+    ) -> None:
+        """Registra e publica uma atualização; campos None não são alterados."""
+        fields = {"status": status, "stage": stage, "progress": progress, **extra}
+        fields = {k: str(v) for k, v in fields.items() if v is not None}
+        fields["updated_at"] = f"{time.time():.3f}"
+        await cache.publish_hash(
+            CacheKey.job_status(job_id), fields, CacheKey.job_events(job_id), CacheConfig.JOB_STATUS_TTL
+        )
+
+    async def publish_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Uma atualização por job (job_id -> campos) em um único round trip."""
+        now = f"{time.time():.3f}"
+        batch = []
+        for job_id, fields in updates.items():
+            fields = {k: str(v) for k, v in fields.items() if v is not None}
+            fields["updated_at"] = now
+            batch.append((CacheKey.job_status(job_id), fields, CacheKey.job_events(job_id)))
+        await cache.publish_hashes(batch, CacheConfig.JOB_STATUS_TTL)
+
+    async def get(self, job_id: str) -> Dict[str, str]:
+        return await cache.hgetall(CacheKey.job_status(job_id))
+
+    async def stream(self, job_id: str, heartbeat: float = 15.0) -> AsyncIterator[Optional[Dict[str, str]]]:
+        """
+        Estado atual do job e, depois, cada atualização (estado completo).
+        Produz `None` a cada `heartbeat` segundos sem novidades e encerra
+        quando o job chega a um status final ou não tem estado (desconhecido
+        ou expirado).
+        """
+        pubsub = cache.pubsub()
+        if pubsub is None:
+            state = await self.get(job_id)
+            if state:
+                yield state
+            return
+
+        try:
+            # Assina antes de ler o snapshot para não perder transições no meio
+            await pubsub.subscribe(CacheKey.job_events(job_id))
+            state = await self.get(job_id)
+            if not state:
+                return
+            yield state
+            while state.get("status") not in self.TERMINAL:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+                if message is None:
+                    yield None
+                    continue
+                try:
+                    state = {**state, **json.loads(message["data"])}
+                except (TypeError, ValueError):
+                    continue
+                yield state
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Stream do job {job_id} interrompido: {e}")
+        finally:
+            await pubsub.aclose()
+
+
+# Singleton global
+job_events = JobEvents()
@@ -0,0 +1,235 @@
+"""
+Executor de jobs dentro do processo da API, usado quando o Celery está fora.
+
+Concorrência limitada, fila limitada (cheia = 429 com Retry-After) e drenagem
+no shutdown. Cada job aceito é marcado no Mongo com o id deste processo, que
+renova um heartbeat enquanto vive; jobs cujo heartbeat parou (shutdown, crash,
+pod recriado com outro hostname) são re-enfileirados por qualquer réplica.
+"""
+import asyncio
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from app.db.db import db_wrapper
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorConfig:
+    """Configuração do executor local de jobs."""
+    CONCURRENCY = int(os.getenv("JOB_EXECUTOR_CONCURRENCY", "4"))
+    QUEUE_SIZE = int(os.getenv("JOB_EXECUTOR_QUEUE", "50"))
+    # Tempo de shutdown para terminar o que está em andamento (o resto é recuperado)
+    DRAIN_TIMEOUT = float(os.getenv("JOB_EXECUTOR_DRAIN_TIMEOUT", "25"))
+    # Heartbeat dos jobs deste processo e idade a partir da qual são dados como abandonados
+    HEARTBEAT_INTERVAL = float(os.getenv("JOB_EXECUTOR_HEARTBEAT", "15"))
+    STALE_AFTER = int(os.getenv("JOB_EXECUTOR_STALE_AFTER", "60"))
+    # Único por processo: hostnames se repetem entre réplicas e mudam a cada restart
+    RUNNER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class ExecutorFull(Exception):
+    """Sem capacidade para aceitar o job agora."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Executor local cheio; tente novamente em {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobExecutor:
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._accepting = False
+        self._running = 0
+        # Duração média de um job (EMA), para estimar o Retry-After
+        self._avg_duration = 60.0
+        self._orchestrator: Any = None
+        self._stats: Counter = Counter()
+
+    @property
+    def orchestrator(self) -> Any:
+        # Criado sob demanda: o cliente do LLM exige a chave só quando há job local
+        if self._orchestrator is None:
+            from app.services.orchestrator import AdOrchestrator
+            self._orchestrator = AdOrchestrator()
+        return self._orchestrator
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=ExecutorConfig.QUEUE_SIZE)
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._worker()) for _ in range(ExecutorConfig.CONCURRENCY)]
+        self._heartbeat = loop.create_task(self._beat())
+        self._accepting = True
+        logger.info(
+            f"✓ Executor local de jobs pronto (concorrência={ExecutorConfig.CONCURRENCY}, fila={ExecutorConfig.QUEUE_SIZE})"
+        )
+
+    def retry_after(self) -> int:
+        """Segundos até haver espaço, estimados pelo backlog e pela duração média dos jobs."""
+        queued = self._queue.qsize() if self._queue else 0
+        return max(1, math.ceil(self._avg_duration * (queued + 1) / ExecutorConfig.CONCURRENCY))
+
+    def has_capacity(self) -> bool:
+        """Há espaço na fila local (cheia só com o Celery fora e jobs acumulados)."""
+        return self._accepting and self._queue is not None and not self._queue.full()
+
+    async def submit(self, job_id: str):
+        """Aceita o job ou levanta `ExecutorFull`."""
+        if not self.has_capacity():
+            self._stats["rejected"] += 1
+            raise ExecutorFull(self.retry_after())
+        self._queue.put_nowait(job_id)
+        self._stats["accepted"] += 1
+        await db_wrapper.database["jobs"].update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {"runner": ExecutorConfig.RUNNER_ID, "runner_seen_at": datetime.utcnow()}}
+        )
+
+    async def run_locally(self, job_ids: List[str]) -> List[str]:
+        """
+        Executa aqui os jobs que não chegaram ao broker. Os que não couberem
+        são descartados (o cliente recebe 429 e reenvia) e devolvidos.
+        """
+        rejected = []
+        for job_id in job_ids:
+            try:
+                await self.submit(job_id)
+            except ExecutorFull:
+                rejected.append(job_id)
+        for job_id in rejected:
+            await self.orchestrator.discard_job(job_id)
+        return rejected
+
+    async def _worker(self):
+        assert self._queue is not None
+        while True:
+            job_id = await self._queue.get()
+            self._running += 1
+            start = time.monotonic()
+            try:
+                status = await self.orchestrator.process_job(job_id=job_id)
+                self._stats[status or "missing"] += 1
+                # Terminou aqui (ou foi delegado ao D-ID): não há mais o que recuperar
+                await db_wrapper.database["jobs"].update_one(
+                    {"_id": ObjectId(job_id), "runner": ExecutorConfig.RUNNER_ID},
+                    {"$unset": {"runner": "", "runner_seen_at": ""}},
+                )
+            except Exception as e:
+                logger.error(f"Executor local: erro no job {job_id}: {e}")
+                self._stats["errors"] += 1
+            finally:
+                self._running -= 1
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * (time.monotonic() - start)
+                self._queue.task_done()
+
+    async def _beat(self):
+        """Renova o heartbeat dos jobs deste processo e recupera os abandonados por outros."""
+        while True:
+            await asyncio.sleep(ExecutorConfig.HEARTBEAT_INTERVAL)
+            try:
+                await db_wrapper.database["jobs"].update_many(
+                    {"runner": ExecutorConfig.RUNNER_ID, "status": {"$in": ["queued", "processing"]}},
+                    {"$set": {"runner_seen_at": datetime.utcnow()}},
+                )
+                await self.recover()
+            except Exception as e:
+                logger.warning(f"Executor local: falha no heartbeat/recuperação: {e}")
+
+    async def shutdown(self):
+        """Para de aceitar, espera a fila esvaziar (até `DRAIN_TIMEOUT`) e encerra os workers."""
+        self._accepting = False
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), ExecutorConfig.DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            pending = self._queue.qsize() + self._running
+            logger.warning(f"Executor local: {pending} job(s) ficam para a recuperação por outra réplica ou restart")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def recover(self) -> int:
+        """
+        Re-enfileira (Celery primeiro) jobs locais cujo processo parou de dar
+        heartbeat. Cada job é tomado com um update condicional, então duas
+        réplicas não recuperam o mesmo. Um job já aceito nunca é descartado:
+        sem espaço na fila local, a tomada é desfeita (o job continua abandonado
+        e volta a ser tentado no próximo heartbeat, aqui ou em outra réplica).
+        """
+        from app.core.tasks import schedule_job
+
+        jobs = db_wrapper.database["jobs"]
+        cutoff = datetime.utcnow() - timedelta(seconds=ExecutorConfig.STALE_AFTER)
+        cursor = jobs.find(
+            {
+                "runner": {"$exists": True, "$ne": ExecutorConfig.RUNNER_ID},
+                "runner_seen_at": {"$lt": cutoff},
+                "status": {"$in": ["queued", "processing"]},
+            },
+            {"runner": 1, "runner_seen_at": 1},
+        ).limit(200)
+        recovered = 0
+        async for stale in cursor:
+            job = await jobs.find_one_and_update(
+                {"_id": stale["_id"], "runner": stale["runner"], "runner_seen_at": {"$lt": cutoff}},
+                {"$set": {"runner": ExecutorConfig.RUNNER_ID, "runner_seen_at": datetime.utcnow()}},
+                projection={"user_id": 1, "priority": 1},
+            )
+            if not job:
+                continue
+            job_id = str(job["_id"])
+            unsent = await schedule_job(job_id, job.get("user_id", ""), job.get("priority") or "default")
+            if job_id not in unsent:
+                await jobs.update_one(
+                    {"_id": job["_id"]},
+                    {"$unset": {"runner": "", "runner_seen_at": ""}, "$set": {"updated_at": datetime.utcnow()}}
+                )
+            else:
+                try:
+                    await self.submit(job_id)
+                except ExecutorFull:
+                    # Devolve a tomada como estava: continua elegível para a próxima recuperação
+                    await jobs.update_one(
+                        {"_id": job["_id"], "runner": ExecutorConfig.RUNNER_ID},
+                        {"$set": {"runner": stale["runner"], "runner_seen_at": stale["runner_seen_at"]}}
+                    )
+                    logger.warning("Executor local cheio; recuperação retomada no próximo heartbeat")
+                    break
+            recovered += 1
+        if recovered:
+            logger.info(f"♻️ Executor local: {recovered} job(s) recuperado(s)")
+        self._stats["recovered"] += recovered
+        return recovered
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "accepting": self._accepting,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": self._running,
+            "concurrency": ExecutorConfig.CONCURRENCY,
+            "queue_size": ExecutorConfig.QUEUE_SIZE,
+            "avg_duration_seconds": round(self._avg_duration, 1),
+            **self._stats,
+        }
+
+
+# Singleton global
+job_executor = JobExecutor()
@@ -0,0 +1,127 @@
+"""
+Cache de respostas do LLM.
+
+A chave combina modelo, temperatura e o hash do texto do prompt enviado ao
+LLM: só o que muda o prompt muda a chave (preço ou descrição, que o prompt
+não usa, não separam respostas idênticas). Cada chave
+guarda até `VARIANTS` respostas: enquanto a lista não enche, cada pedido gera
+uma variante nova; depois elas são servidas em rodízio, mantendo a
+diversidade criativa sem pagar uma chamada por job.
+"""
+import hashlib
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from app.core.cache import cache, CacheKey, CacheConfig
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCacheConfig:
+    """Configuração do cache de respostas do LLM."""
+    ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    TTL = CacheConfig.SCRIPT_TTL
+    # Respostas distintas guardadas por chave (1 = sempre a mesma)
+    VARIANTS = max(1, int(os.getenv("LLM_CACHE_VARIANTS", "1")))
+
+
+class LLMCompletion(BaseModel):
+    content: str
+    total_tokens: int = 0
+    latency_ms: int = 0
+
+
+# Próxima variante em rodízio; nil enquanto a lista não tem ARGV[1] variantes
+_PICK_SCRIPT = """
+local n = redis.call('LLEN', KEYS[1])
+if n == 0 or n < tonumber(ARGV[1]) then return false end
+local i = redis.call('INCR', KEYS[2])
+local ttl = redis.call('TTL', KEYS[1])
+if ttl > 0 then redis.call('EXPIRE', KEYS[2], ttl) end
+return redis.call('LINDEX', KEYS[1], (i - 1) % n)
+"""
+
+# Acrescenta a variante se ainda houver espaço; o TTL conta da última variante gerada
+_STORE_SCRIPT = """
+if redis.call('LLEN', KEYS[1]) < tonumber(ARGV[2]) then redis.call('RPUSH', KEYS[1], ARGV[1]) end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+_COUNT_SCRIPT = """
+for i = 1, #ARGV, 2 do redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1]) end
+return 1
+"""
+
+
+class LLMCache:
+    @staticmethod
+    def key(model: str, temperature: float, prompt: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        return CacheKey.llm_response(model, temperature, prompt_hash)
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """Próxima variante em cache; None se a chave ainda não tem todas as variantes."""
+        if not LLMCacheConfig.ENABLED:
+            return None
+        cached = await cache.eval(_PICK_SCRIPT, [key, CacheKey.llm_rotation(key)], [LLMCacheConfig.VARIANTS])
+        if not cached:
+            return None
+        try:
+            hit = LLMCompletion.model_validate_json(cached)
+        except ValueError:
+            logger.warning(f"Variante inválida no cache do LLM ({key}); gerando de novo")
+            return None
+        await self._count(hits=1, saved_tokens=hit.total_tokens, saved_ms=hit.latency_ms)
+        return hit.content
+
+    async def store(self, key: str, completion: LLMCompletion):
+        """Registra a resposta gerada (miss) e a guarda como variante se houver espaço."""
+        if not LLMCacheConfig.ENABLED:
+            return
+        await self._count(misses=1, tokens=completion.total_tokens, latency_ms=completion.latency_ms)
+        if completion.content:
+            await cache.eval(
+                _STORE_SCRIPT, [key], [completion.model_dump_json(), LLMCacheConfig.VARIANTS, LLMCacheConfig.TTL]
+            )
+
+    async def complete(
+        self,
+        model: str,
+        temperature: float,
+        prompt: str,
+        generate: Callable[[], Awaitable[LLMCompletion]],
+    ) -> str:
+        """Uma variante em cache para o prompt ou, se faltarem variantes, uma resposta nova de `generate`."""
+        key = self.key(model, temperature, prompt)
+        cached = await self.lookup(key)
+        if cached:
+            return cached
+        completion = await generate()
+        await self.store(key, completion)
+        return completion.content
+
+    async def _count(self, **fields: int):
+        await cache.eval(_COUNT_SCRIPT, [CacheKey.llm_stats()], [x for item in fields.items() for x in item])
+
+    async def stats(self) -> Dict[str, Any]:
+        raw = {k: int(v) for k, v in (await cache.hgetall(CacheKey.llm_stats())).items()}
+        hits, misses = raw.get("hits", 0), raw.get("misses", 0)
+        return {
+            "enabled": LLMCacheConfig.ENABLED,
+            "variants": LLMCacheConfig.VARIANTS,
+            "ttl": LLMCacheConfig.TTL,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "saved_tokens": raw.get("saved_tokens", 0),
+            "saved_latency_seconds": round(raw.get("saved_ms", 0) / 1000, 1),
+            "avg_miss_latency_ms": round(raw.get("latency_ms", 0) / misses) if misses else 0,
+        }
+
+
+# Singleton global
+llm_cache = LLMCache()
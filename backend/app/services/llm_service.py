@@ -1,17 +1,79 @@
 from groq import AsyncGroq
 import os
+import time
+from typing import AsyncIterator
+
+from app.services.llm_cache import llm_cache, LLMCompletion
 
 class LLMService:
     def __init__(self):
+        # GROQ_BASE_URL (lido pelo cliente) aponta para outro endpoint, ex: benchmarks/groq_stub.py
         self.client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
         self.model = "llama-3.3-70b-versatile"
+        self.temperature = 0.7
+
+    @staticmethod
+    def ad_prompt(product_data: dict, style: str) -> str:
+        # Espaços colapsados: o mesmo produto raspado com outra formatação gera o mesmo prompt (e chave de cache)
+        name = " ".join(product_data["name"].split())
+        prompt = f"Crie um roteiro de anúncio {style} para o produto: {name}"
+        highlights = [" ".join(h.split()) for h in product_data.get("highlights") or []]
+        if highlights:
+            # Pontos positivos citados em reviews do YouTube
+            prompt += f"\nDestaque: {', '.join(highlights)}"
+        return prompt
 
     async def generate_ad_script(self, product_data: dict, style: str):
-        prompt = f"Crie um roteiro de anúncio {style} para o produto: {product_data['name']}"
-        
+        # Cache por modelo + temperatura + texto do prompt (com variantes em rodízio)
+        prompt = self.ad_prompt(product_data, style)
+        return await llm_cache.complete(self.model, self.temperature, prompt, lambda: self._complete(prompt))
+
+    async def stream_ad_script(self, product_data: dict, style: str) -> AsyncIterator[str]:
+        """
+        Roteiro em pedaços, conforme o LLM gera os tokens. Um roteiro em cache
+        sai inteiro de uma vez; um stream completo vira variante do cache
+        (interrompido no meio, não é guardado).
+        """
+        prompt = self.ad_prompt(product_data, style)
+        key = llm_cache.key(self.model, self.temperature, prompt)
+        cached = await llm_cache.lookup(key)
+        if cached:
+            yield cached
+            return
+
+        start = time.monotonic()
+        parts = []
+        total_tokens = 0
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+            stream=True,
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+            # O Groq informa o uso de tokens no último pedaço
+            usage = chunk.usage or (chunk.x_groq.usage if chunk.x_groq else None)
+            if usage:
+                total_tokens = usage.total_tokens
+        await llm_cache.store(key, LLMCompletion(
+            content="".join(parts),
+            total_tokens=total_tokens,
+            latency_ms=round((time.monotonic() - start) * 1000),
+        ))
+
+    async def _complete(self, prompt: str) -> LLMCompletion:
+        start = time.monotonic()
         completion = await self.client.chat.completions.create(
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
+            temperature=self.temperature
+        )
+        return LLMCompletion(
+            content=completion.choices[0].message.content or "",
+            total_tokens=completion.usage.total_tokens if completion.usage else 0,
+            latency_ms=round((time.monotonic() - start) * 1000),
         )
-        return completion.choices[0].message.content
\ No newline at end of file
@@ -1,20 +1,43 @@
 import logging
 import asyncio
-from datetime import datetime
-from typing import Optional, Any, cast
+import base64
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Any, Dict, List, Tuple, cast
 from bson import ObjectId
 
 from app.db.db import db_wrapper
 from app.services.llm_service import LLMService
-from app.services.video_did import DIDService
-from app.services.scrapers.base import ScraperRegistry
+from app.services.video_did import DIDService, DIDConfig
+from app.services.product_service import ProductScraperService
+from app.services.youtube_analyzer import YouTubeAnalyzer
+from app.services.pipeline import Stage, StageError, StageGraph
+from app.services.job_events import job_events
+from app.services.dedupe import job_dedupe, DedupeConfig
+from app.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
 class AdOrchestrator:
+    # Campos da análise do YouTube guardados no job (sem a transcrição)
+    YOUTUBE_INSIGHTS = {
+        "video_id", "overall_sentiment", "sentiment_score", "positive_aspects",
+        "negative_aspects", "brands_mentioned", "products_mentioned",
+    }
+
+    # Campos devolvidos na listagem (sem roteiro, estágios ou análises)
+    JOB_SUMMARY_FIELDS = {
+        "status": 1, "product_url": 1, "youtube_url": 1, "style": 1, "priority": 1,
+        "result_url": 1, "error": 1, "batch_id": 1, "created_at": 1, "updated_at": 1,
+    }
+
+    # Intervalo mínimo entre publicações do roteiro parcial durante o stream do LLM
+    SCRIPT_PREVIEW_INTERVAL = 0.25
+
     def __init__(self):
         self.llm = LLMService()
         self.did_service = DIDService()
+        self.youtube = YouTubeAnalyzer()
 
     @property
     def db(self) -> Any:
@@ -22,66 +45,721 @@ class AdOrchestrator:
             raise RuntimeError("Conexão com MongoDB não estabelecida.")
         return db_wrapper.database
 
-    async def enqueue_job(self, product_url: str, user_id: str, style: str, youtube_url: Optional[str] = None) -> str:
-        job_data = {
+    async def enqueue_job(
+        self, product_url: str, user_id: str, style: str, youtube_url: Optional[str] = None, priority: str = "default"
+    ) -> Dict[str, Any]:
+        """
+        Cria o job. Um anúncio idêntico já pronto é reaproveitado (status
+        "completed") e um idêntico em andamento recebe este job como seguidor
+        ("attached"); só jobs "queued" precisam ser despachados.
+        """
+        job_id = ObjectId()
+        job_data: Dict[str, Any] = {
+            "_id": job_id,
             "user_id": user_id,
             "product_url": product_url,
             "youtube_url": youtube_url,
             "style": style,
+            "priority": priority,
             "status": "queued",
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
-        result = await self.db["jobs"].insert_one(job_data)
-        return str(result.inserted_id)
+        fingerprint = await self._fingerprint(product_url, youtube_url, style)
+        if fingerprint:
+            job_data["fingerprint"] = fingerprint
+            job_data.update(await self._find_duplicate(fingerprint, str(job_id)))
+        await self.db["jobs"].insert_one(job_data)
+
+        if job_data["status"] == "attached":
+            # O dono pode ter terminado entre o claim e o insert (e não nos viu)
+            current = await self._find_duplicate(fingerprint, str(job_id))
+            if current.get("attached_to") != job_data["attached_to"]:
+                current = current or {"status": "queued"}
+                update: Dict[str, Any] = {"$set": {**current, "updated_at": datetime.utcnow()}}
+                if "attached_to" not in current:
+                    update["$unset"] = {"attached_to": ""}
+                    job_data.pop("attached_to")
+                await self.db["jobs"].update_one({"_id": job_id, "status": "attached"}, update)
+                job_data.update(current)
+
+        job_id_str = str(job_id)
+        status = job_data["status"]
+        if status == "completed":
+            await job_dedupe.record_hit("artifact")
+            await job_events.publish(job_id_str, status="completed", progress=100, result_url=job_data["result_url"])
+        elif status == "attached":
+            await job_dedupe.record_hit("inflight")
+            await job_events.publish(job_id_str, status="attached", progress=0, attached_to=job_data["attached_to"])
+        else:
+            await job_events.publish(job_id_str, status="queued", progress=0)
+        return {"job_id": job_id_str, "status": status}
 
-    async def process_job(self, job_id: str):
+    async def _fingerprint(self, product_url: str, youtube_url: Optional[str], style: str) -> Optional[str]:
+        if not DedupeConfig.ENABLED or not cache.is_connected:
+            return None
         try:
-            job = await self.db["jobs"].find_one({"_id": ObjectId(job_id)})
-            if not job: return
+            _, _, product_key = await ProductScraperService.resolve(product_url)
+        except Exception:
+            # URL não suportada: o estágio de produto reporta o erro
+            return None
+        return self._content_fingerprint(product_key, youtube_url, style)
 
-            await self.db["jobs"].update_one({"_id": ObjectId(job_id)}, {"$set": {"status": "processing"}})
+    def _content_fingerprint(self, product_key: str, youtube_url: Optional[str], style: str) -> str:
+        video_id = self.youtube._extract_video_id(youtube_url) if youtube_url else None
+        return job_dedupe.fingerprint(product_key, video_id, style, self.llm.model)
 
-            # 1. Scraping
-            scraper = ScraperRegistry.get_scraper_for_url(job["product_url"])
-            if not scraper:
-                raise Exception(f"URL não suportada: {job['product_url']}")
-            
-            product = await scraper.scrape_with_retry(job["product_url"])
+    async def enqueue_batch(self, items: List[Dict[str, Any]], user_id: str, priority: str = "low") -> Dict[str, Any]:
+        """
+        Cria um lote de jobs: valida e canonicaliza as URLs em paralelo, deduplica
+        (dentro do lote e contra artefatos prontos ou em andamento) e grava tudo
+        com um único `insert_many`. URLs inválidas voltam em `errors`, sem job.
+        """
+        batch_id = str(ObjectId())
+        sem = asyncio.Semaphore(ProductScraperService.BATCH_CONCURRENCY)
+
+        async def canonicalize(url: str):
+            async with sem:
+                _, canonical_url, product_key = await ProductScraperService.resolve(url)
+                return canonical_url, product_key
+
+        resolved = await asyncio.gather(*(canonicalize(i["product_url"]) for i in items), return_exceptions=True)
+        dedupe = DedupeConfig.ENABLED and cache.is_connected
+        now = datetime.utcnow()
+        docs: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        firsts: Dict[str, Dict[str, Any]] = {}
+        for index, (item, result) in enumerate(zip(items, resolved)):
+            if isinstance(result, BaseException):
+                errors.append({"index": index, "product_url": item["product_url"], "error": str(result)})
+                continue
+            canonical_url, product_key = result
+            doc: Dict[str, Any] = {
+                "_id": ObjectId(),
+                "batch_id": batch_id,
+                "batch_index": index,
+                "user_id": user_id,
+                "product_url": item["product_url"],
+                "canonical_url": canonical_url,
+                "youtube_url": item.get("youtube_url"),
+                "style": item["style"],
+                "priority": priority,
+                "status": "queued",
+                "created_at": now,
+                "updated_at": now,
+            }
+            if dedupe:
+                doc["fingerprint"] = self._content_fingerprint(product_key, item.get("youtube_url"), item["style"])
+                firsts.setdefault(doc["fingerprint"], doc)
+            docs.append(doc)
 
-            # 2. LLM Script
-            context = {
-                "name": product.name,
-                "price": f"{product.price.currency} {product.price.amount}",
-                "description": product.description
+        # Uma consulta por conteúdo distinto; os repetidos do lote seguem o primeiro
+        found = await asyncio.gather(*(self._find_duplicate(fp, str(doc["_id"])) for fp, doc in firsts.items()))
+        for doc, fields in zip(firsts.values(), found):
+            doc.update(fields)
+        for doc in docs:
+            self._follow_first(doc, firsts.get(doc.get("fingerprint"), doc))
+
+        if docs:
+            await self.db["jobs"].insert_many(docs, ordered=False)
+            await self._recheck_batch_owners(batch_id, docs, firsts)
+
+        hits = {"artifact": 0, "inflight": 0}
+        for doc in docs:
+            if doc["status"] == "completed":
+                hits["artifact"] += 1
+            elif doc["status"] == "attached":
+                hits["inflight"] += 1
+        for kind, count in hits.items():
+            if count:
+                await job_dedupe.record_hit(kind, count)
+        await job_events.publish_many({
+            str(doc["_id"]): {
+                "status": doc["status"],
+                "progress": 100 if doc["status"] == "completed" else 0,
+                "result_url": doc.get("result_url"),
+                "attached_to": doc.get("attached_to"),
+                "batch_id": batch_id,
             }
-            raw_script = await self.llm.generate_ad_script(context, job["style"])
+            for doc in docs
+        })
+        return {
+            "batch_id": batch_id,
+            "jobs": [
+                {"index": doc["batch_index"], "job_id": str(doc["_id"]), "status": doc["status"]} for doc in docs
+            ],
+            "errors": errors,
+        }
+
+    @staticmethod
+    def _follow_first(doc: Dict[str, Any], first: Dict[str, Any]):
+        """Copia para um repetido do lote o desfecho da deduplicação do primeiro."""
+        if first is doc:
+            return
+        doc.pop("attached_to", None)
+        if first["status"] == "completed":
+            doc.update({k: first.get(k) for k in ("status", "result_url", "script", "deduplicated_from")})
+        else:
+            doc.update(status="attached", attached_to=first.get("attached_to") or str(first["_id"]))
+
+    async def _recheck_batch_owners(self, batch_id: str, docs: List[Dict[str, Any]], firsts: Dict[str, Dict[str, Any]]):
+        """
+        Como no `enqueue_job`: um dono externo pode ter terminado entre o claim
+        e o insert. Refaz a consulta para esses conteúdos e corrige o lote.
+        """
+        attached = {fp: doc for fp, doc in firsts.items() if doc["status"] == "attached"}
+        if not attached:
+            return
+        found = await asyncio.gather(*(self._find_duplicate(fp, str(doc["_id"])) for fp, doc in attached.items()))
+        for (fp, first), current in zip(attached.items(), found):
+            if current.get("attached_to") == first["attached_to"]:
+                continue
+            first.pop("attached_to")
+            first.update(current or {"status": "queued"})
+            group = [doc for doc in docs if doc.get("fingerprint") == fp]
+            for doc in group:
+                self._follow_first(doc, first)
+            for status in {doc["status"] for doc in group}:
+                sample = next(doc for doc in group if doc["status"] == status)
+                fields = {k: sample[k] for k in ("status", "result_url", "script", "deduplicated_from", "attached_to") if k in sample}
+                update: Dict[str, Any] = {"$set": {**fields, "updated_at": datetime.utcnow()}}
+                if "attached_to" not in sample:
+                    update["$unset"] = {"attached_to": ""}
+                await self.db["jobs"].update_many(
+                    {"_id": {"$in": [doc["_id"] for doc in group if doc["status"] == status]}}, update
+                )
+
+    async def batch_status(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Progresso do lote com uma única agregação (contagem por status)."""
+        counts: Dict[str, int] = {}
+        async for row in self.db["jobs"].aggregate([
+            {"$match": {"batch_id": batch_id}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ]):
+            counts[row["_id"]] = row["count"]
+        total = sum(counts.values())
+        if not total:
+            return None
+        finished = counts.get("completed", 0) + counts.get("failed", 0)
+        return {
+            "batch_id": batch_id,
+            "total": total,
+            "counts": counts,
+            "progress": round(100 * finished / total),
+            "done": finished == total,
+        }
+
+    @staticmethod
+    def encode_cursor(created_at: datetime, job_id: ObjectId) -> str:
+        raw = f"{created_at.isoformat()}|{job_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+        """Levanta ValueError para cursores inválidos."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            created_at, job_id = raw.split("|")
+            return datetime.fromisoformat(created_at), ObjectId(job_id)
+        except Exception as e:
+            raise ValueError("Cursor inválido") from e
+
+    async def list_jobs(
+        self, user_id: str, statuses: Optional[List[str]] = None, limit: int = 20, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Jobs do usuário, mais recentes primeiro, com paginação keyset em
+        (created_at, _id): cada página é uma busca no índice a partir do
+        último item da anterior, sem skip, então o custo não cresce com a coleção.
+        """
+        query: Dict[str, Any] = {"user_id": user_id}
+        if statuses:
+            query["status"] = {"$in": statuses}
+        if cursor:
+            created_at, last_id = self.decode_cursor(cursor)
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": last_id}},
+            ]
+
+        docs = await self.db["jobs"].find(query, self.JOB_SUMMARY_FIELDS).sort(
+            [("created_at", -1), ("_id", -1)]
+        ).limit(limit + 1).to_list(length=limit + 1)
+        page = docs[:limit]
+        next_cursor = self.encode_cursor(page[-1]["created_at"], page[-1]["_id"]) if len(docs) > limit else None
+        return {
+            "jobs": [{"job_id": str(doc.pop("_id")), **doc} for doc in page],
+            "next_cursor": next_cursor,
+        }
+
+    async def _find_duplicate(self, fingerprint: str, job_id: str) -> Dict[str, Any]:
+        """Campos do job se ele for duplicado (artefato pronto ou job em andamento); vazio se não."""
+        artifact = await job_dedupe.lookup(fingerprint)
+        if artifact:
+            return {
+                "status": "completed",
+                "result_url": artifact["result_url"],
+                "script": artifact.get("script"),
+                "deduplicated_from": artifact.get("job_id"),
+            }
+        owner = await job_dedupe.claim(fingerprint, job_id)
+        if owner != job_id:
+            return {"status": "attached", "attached_to": owner}
+        return {}
+
+    async def _share_result(
+        self,
+        job_id: str,
+        fingerprint: Optional[str],
+        result_url: Optional[str] = None,
+        script: Optional[str] = None,
+        error: Optional[str] = None,
+    ):
+        """Indexa o artefato (ou libera o fingerprint) e conclui os jobs anexados a este."""
+        if not fingerprint:
+            return
+        if result_url:
+            await job_dedupe.record(fingerprint, job_id, result_url, script or "")
+            update = {"status": "completed", "result_url": result_url, "script": script, "deduplicated_from": job_id}
+        else:
+            await job_dedupe.release(fingerprint, job_id)
+            update = {"status": "failed", "error": f"Job idêntico {job_id} falhou: {error}"}
+
+        followers = [
+            doc["_id"] async for doc in self.db["jobs"].find({"attached_to": job_id, "status": "attached"}, {"_id": 1})
+        ]
+        if not followers:
+            return
+        await self.db["jobs"].update_many(
+            {"_id": {"$in": followers}, "status": "attached"},
+            {"$set": {**update, "updated_at": datetime.utcnow()}}
+        )
+        for follower in followers:
+            if result_url:
+                await job_events.publish(str(follower), status="completed", progress=100, result_url=result_url)
+            else:
+                await job_events.publish(str(follower), status="failed", error=update["error"])
+        logger.info(f"Job {job_id}: resultado compartilhado com {len(followers)} job(s) idêntico(s)")
+
+    @staticmethod
+    def script_context(product: Dict[str, Any], insights: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Entradas do prompt do roteiro (também a chave do cache do LLM)."""
+        insights = insights or {}
+        return {
+            "name": product["name"],
+            "price": f"{product['price']['currency']} {product['price']['amount']}",
+            "description": product.get("description"),
+            "highlights": insights.get("positive_aspects", [])[:3],
+        }
+
+    async def preview_context(self, product_url: str, youtube_url: Optional[str] = None) -> Dict[str, Any]:
+        """Entradas do roteiro para uma prévia sem job (produto e análise vêm dos caches)."""
+        product = await ProductScraperService.scrape_product(product_url)
+        insights = None
+        if youtube_url:
+            try:
+                analysis = await self.youtube.analyze(youtube_url)
+                insights = analysis.model_dump(mode="json", include=self.YOUTUBE_INSIGHTS)
+            except Exception as e:
+                logger.warning(f"Análise do YouTube falhou na prévia do roteiro: {e}")
+        return self.script_context(product.model_dump(mode="json", exclude={"raw_data"}), insights)
+
+    def build_pipeline(self, job: Dict[str, Any], defer_render: bool = False) -> StageGraph:
+        """
+        Grafo do job: produto e análise do YouTube em paralelo; o roteiro sai
+        assim que os dois terminam; o vídeo depende do produto e do roteiro.
+        Com `defer_render` (ou webhooks do D-ID), o estágio de vídeo só submete
+        a renderização e quem espera é o webhook ou a fila de I/O.
+        """
+        job_id = job["_id"]
+
+        async def scrape_product(_: Dict[str, Any]) -> Dict[str, Any]:
+            # Cache + coalescência pela chave canônica do produto
+            product = await ProductScraperService.scrape_product(job["product_url"])
+            await self.db["jobs"].update_one(
+                {"_id": job_id},
+                {"$set": {"product_key": product.cache_key, "canonical_url": product.metadata.source_url}}
+            )
+            return product.model_dump(mode="json", exclude={"raw_data"})
+
+        async def analyze_youtube(_: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            if not job.get("youtube_url"):
+                return None
+            try:
+                analysis = await self.youtube.analyze(job["youtube_url"])
+            except Exception as e:
+                # Enriquecimento opcional: o roteiro sai mesmo sem os insights
+                logger.warning(f"Análise do YouTube falhou no job {job_id}: {e}")
+                return None
+            # A transcrição fica só no cache da análise, não no documento do job
+            return analysis.model_dump(mode="json", include=self.YOUTUBE_INSIGHTS)
+
+        async def generate_script(inputs: Dict[str, Any]) -> str:
+            context = self.script_context(inputs["product"], inputs["youtube"])
+            # Stream do LLM: quem acompanha o job vê o roteiro parcial (`script_preview`)
+            parts: List[str] = []
+            published = time.monotonic()
+            async for token in self.llm.stream_ad_script(context, job["style"]):
+                parts.append(token)
+                if time.monotonic() - published >= self.SCRIPT_PREVIEW_INTERVAL:
+                    await job_events.publish(str(job_id), script_preview="".join(parts))
+                    published = time.monotonic()
+            raw_script = "".join(parts)
             
             # SOLUÇÃO PYLANCE: Garantir que script não seja None antes de enviar ao D-ID
             if not raw_script:
                 raise Exception("O LLM falhou em gerar o roteiro.")
-            
-            script = str(raw_script) # Garantindo que é string
+            return str(raw_script) # Garantindo que é string
 
-            # 3. Vídeo
+        async def render_video(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            product, script = inputs["product"], inputs["script"]
             avatar_url = "https://cdn.pixabay.com/photo/2016/08/08/09/17/avatar-1577909_1280.png"
-            if product.images and len(product.images) > 0:
-                avatar_url = product.images[0].url
+            if product.get("images"):
+                avatar_url = product["images"][0]["url"]
+
+            if DIDConfig.webhooks_enabled() or defer_render:
+                # O worker fica livre durante a renderização
+                webhook_url = DIDService.webhook_url(str(job_id)) if DIDConfig.webhooks_enabled() else None
+                talk = await self.did_service.create_talk(avatar_url, script, webhook_url=webhook_url)
+                if not talk.get("id"):
+                    raise Exception("ID do D-ID ausente.")
+                return {"talk_id": talk["id"], "result_url": None}
 
             talk = await self.did_service.create_talk(avatar_url, script)
             video_url = await self._wait_for_video(talk.get("id"))
+            return {"talk_id": talk.get("id"), "result_url": video_url}
+
+        return StageGraph([
+            Stage("product", scrape_product),
+            Stage("youtube", analyze_youtube),
+            Stage("script", generate_script, deps=("product", "youtube")),
+            Stage("video", render_video, deps=("product", "script")),
+        ])
+
+    async def process_job(self, job_id: str, defer_render: bool = False, final_attempt: bool = True) -> Optional[str]:
+        """
+        Executa (ou retoma) o job. Estágios concluídos em execuções anteriores
+        ficam checkpointados em `stages.<nome>` e não são refeitos.
+        Com `final_attempt=False` (haverá nova tentativa), uma falha devolve o
+        job a "queued" e mantém o fingerprint reservado e os seguidores anexados.
+        Retorna o status final do job ("rendering" se a espera pelo vídeo foi
+        delegada; o status gravado se o webhook do D-ID chegou antes).
+        """
+        fingerprint = None
+        try:
+            job = await self.db["jobs"].find_one({"_id": ObjectId(job_id)})
+            if not job: return None
+            # Seguidores de um job idêntico são concluídos por ele
+            if job.get("status") in ("completed", "rendering", "attached"):
+                return job["status"]
+            fingerprint = job.get("fingerprint")
+            if fingerprint and job.get("attempts"):
+                # Nova tentativa: renova a reserva do conteúdo (ou passa a seguir quem a tomou)
+                owner = await job_dedupe.claim(fingerprint, job_id)
+                if owner != job_id:
+                    return await self._hand_off(job_id, owner)
+
+            # Um vídeo submetido sem resultado não conta como concluído: gera outro talk
+            completed = {
+                name: info.get("output")
+                for name, info in (job.get("stages") or {}).items()
+                if info.get("status") == "completed"
+                and not (name == "video" and not (info.get("output") or {}).get("result_url"))
+            }
+            if completed:
+                logger.info(f"Retomando job {job_id}; estágios já concluídos: {sorted(completed)}")
+
+            await self.db["jobs"].update_one(
+                {"_id": ObjectId(job_id)},
+                {"$set": {"status": "processing", "updated_at": datetime.utcnow()}, "$inc": {"attempts": 1}}
+            )
+
+            pipeline = self.build_pipeline(job, defer_render=defer_render)
+            done = set(completed)
+
+            def progress() -> int:
+                return round(100 * len(done) / len(pipeline.stages))
+
+            await job_events.publish(job_id, status="processing", progress=progress(), error="")
+
+            async def on_start(stage: str):
+                await job_events.publish(job_id, stage=stage)
+
+            async def checkpoint(stage: str, info: Dict[str, Any]):
+                # Só enquanto o job processa: um webhook do D-ID que chega antes do
+                # checkpoint do vídeo já concluiu o job e o seu resultado não é sobrescrito
+                saved = await self.db["jobs"].update_one(
+                    {"_id": ObjectId(job_id), "status": "processing"},
+                    {"$set": {f"stages.{stage}": info, "updated_at": datetime.utcnow()}}
+                )
+                if not saved.matched_count:
+                    return
+                if info["status"] == "completed":
+                    done.add(stage)
+                await job_events.publish(job_id, stage=stage, stage_status=info["status"], progress=progress())
+
+            outputs = await pipeline.run(completed=completed, checkpoint=checkpoint, on_start=on_start)
+
+            video = outputs["video"]
+            if not video.get("result_url"):
+                # Renderização assíncrona: o webhook (ou o sweeper) conclui o job.
+                # O filtro por status evita sobrescrever um webhook que chegou antes.
+                submitted = await self.db["jobs"].update_one(
+                    {"_id": ObjectId(job_id), "status": "processing"},
+                    {"$set": {
+                        "status": "rendering",
+                        "talk_id": video["talk_id"],
+                        "render_submitted_at": datetime.utcnow(),
+                        "updated_at": datetime.utcnow(),
+                    }}
+                )
+                if not submitted.matched_count:
+                    current = await self.db["jobs"].find_one({"_id": ObjectId(job_id)}, {"status": 1})
+                    return current["status"] if current else None
+                # O vídeo foi submetido, mas só conta como concluído quando o D-ID responde
+                done.discard("video")
+                await job_events.publish(job_id, status="rendering", stage="video", progress=progress())
+                logger.info(f"Job {job_id} aguardando o D-ID (talk {video['talk_id']})")
+                return "rendering"
 
             await self.db["jobs"].update_one(
                 {"_id": ObjectId(job_id)}, 
-                {"$set": {"status": "completed", "result_url": video_url, "updated_at": datetime.utcnow()}}
+                {"$set": {
+                    "status": "completed",
+                    "result_url": video["result_url"],
+                    "updated_at": datetime.utcnow(),
+                }}
+            )
+            # O roteiro parcial (script_preview) sai do estado junto com a conclusão
+            await job_events.publish(
+                job_id, status="completed", progress=100, result_url=video["result_url"], script_preview=""
             )
+            await self._share_result(job_id, fingerprint, result_url=video["result_url"], script=outputs["script"])
+            return "completed"
 
         except Exception as e:
             logger.error(f"Erro no Job {job_id}: {str(e)}")
+            failed_stage = e.stage if isinstance(e, StageError) else None
+            # Com nova tentativa agendada o job volta a "queued": não é um status final
+            status = "failed" if final_attempt else "queued"
             await self.db["jobs"].update_one(
                 {"_id": ObjectId(job_id)}, 
-                {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()}}
+                {"$set": {"status": status, "error": str(e), "failed_stage": failed_stage, "updated_at": datetime.utcnow()}}
             )
+            await job_events.publish(job_id, status=status, stage=failed_stage, error=str(e), script_preview="")
+            if final_attempt:
+                await self._share_result(job_id, fingerprint, error=str(e))
+            return status
+
+    async def _hand_off(self, job_id: str, owner: str) -> str:
+        """Anexa o job (e os seus seguidores) a `owner`, que já produz o mesmo conteúdo."""
+        await self.db["jobs"].update_many(
+            {"$or": [{"_id": ObjectId(job_id)}, {"attached_to": job_id, "status": "attached"}]},
+            {"$set": {"status": "attached", "attached_to": owner, "updated_at": datetime.utcnow()}}
+        )
+        await job_events.publish(job_id, status="attached", attached_to=owner)
+        logger.info(f"Job {job_id}: conteúdo já em produção pelo job {owner}; passa a segui-lo")
+        return "attached"
+
+    async def discard_job(self, job_id: str):
+        """
+        Remove um job recusado antes de rodar (sem capacidade para executá-lo):
+        o cliente recebe 429 e reenvia, então não fica um job falho para trás.
+        Seguidores que ele tenha ganhado são reatribuídos pelo sweeper de órfãos.
+        """
+        job = await self.db["jobs"].find_one_and_delete(
+            {"_id": ObjectId(job_id), "status": "queued"}, projection={"fingerprint": 1}
+        )
+        if job and job.get("fingerprint"):
+            await job_dedupe.release(job["fingerprint"], job_id)
+
+    async def complete_render(self, job_id: str, talk: Dict[str, Any]) -> str:
+        """
+        Aplica o resultado de um talk do D-ID ao job (webhook ou sweeper).
+        Idempotente: só altera jobs ainda em `processing`/`rendering` cujo talk
+        confere com o recebido. Retorna o novo status ou "ignored".
+        """
+        status = talk.get("status")
+        if status not in DIDService.TERMINAL_STATUSES:
+            return "ignored"
+
+        talk_id = talk.get("id")
+        pending = {
+            "_id": ObjectId(job_id),
+            "status": {"$in": ["processing", "rendering"]},
+            # O webhook pode chegar antes do checkpoint do estágio de vídeo
+            "$or": [{"stages.video.output.talk_id": talk_id}, {"stages.video": {"$exists": False}}],
+        }
+        now = datetime.utcnow()
+        if status == "done":
+            update = {
+                "status": "completed",
+                "result_url": talk.get("result_url"),
+                "stages.video.output": {"talk_id": talk_id, "result_url": talk.get("result_url")},
+                "stages.video.status": "completed",
+                "updated_at": now,
+            }
+        else:
+            error = talk.get("error")
+            if isinstance(error, dict):
+                error = error.get("description") or error.get("kind")
+            # Falha final: não há nova tentativa automática. O estágio fica falho para
+            # que um reprocessamento refaça só o vídeo (produto e roteiro seguem checkpointados)
+            update = {
+                "status": "failed",
+                "error": f"Erro no processamento do vídeo: {error or status}",
+                "failed_stage": "video",
+                "stages.video.status": "failed",
+                "updated_at": now,
+            }
+
+        # Devolve o documento anterior: fingerprint e roteiro para a deduplicação
+        job = await self.db["jobs"].find_one_and_update(
+            pending, {"$set": update}, projection={"fingerprint": 1, "stages.script.output": 1}
+        )
+        if not job:
+            return "ignored"
+        fingerprint = job.get("fingerprint")
+        if status == "done":
+            await job_events.publish(
+                job_id, status="completed", progress=100, result_url=talk.get("result_url"), script_preview=""
+            )
+            script = ((job.get("stages") or {}).get("script") or {}).get("output")
+            await self._share_result(job_id, fingerprint, result_url=talk.get("result_url"), script=script)
+        else:
+            await job_events.publish(job_id, status="failed", stage="video", error=update["error"], script_preview="")
+            await self._share_result(job_id, fingerprint, error=update["error"])
+        logger.info(f"Job {job_id} finalizado pelo D-ID: {update['status']}")
+        return update["status"]
+
+    async def poll_render(self, job_id: str) -> str:
+        """Uma consulta ao D-ID para um job em `rendering`; retorna o status do job após ela."""
+        job = await self.db["jobs"].find_one(
+            {"_id": ObjectId(job_id)}, {"status": 1, "talk_id": 1, "render_submitted_at": 1}
+        )
+        if not job or job.get("status") != "rendering":
+            return job.get("status", "ignored") if job else "ignored"
+
+        # O prazo vale antes da consulta: um D-ID que só devolve erro não segura o job
+        if job["render_submitted_at"] < datetime.utcnow() - timedelta(seconds=DIDConfig.RENDER_TIMEOUT):
+            return await self.complete_render(job_id, {"id": job["talk_id"], "status": "error", "error": "Timeout"})
+        try:
+            talk = await self.did_service.get_talk(job["talk_id"])
+        except Exception as e:
+            logger.warning(f"Falha ao consultar o talk do job {job_id}: {e}")
+            return "rendering"
+        status = await self.complete_render(job_id, {"id": job["talk_id"], **talk})
+        return "rendering" if status == "ignored" else status
+
+    async def sweep_orphan_followers(self) -> Dict[str, Any]:
+        """
+        Seguidores cujo dono nunca vai concluí-los: dono inexistente (insert
+        falhou depois do claim), falho, anexado a outro job ou parado há mais
+        de `INFLIGHT_TTL` (worker morreu). Dono concluído compartilha o
+        resultado; nos demais casos o seguidor mais antigo vira o novo dono
+        (volta a "queued") e os outros passam a segui-lo. Retorna os jobs a
+        despachar em `requeued`.
+        """
+        now = datetime.utcnow()
+        followers: Dict[str, List[Dict[str, Any]]] = {}
+        async for doc in self.db["jobs"].find(
+            {"status": "attached", "updated_at": {"$lt": now - timedelta(seconds=DedupeConfig.SWEEP_AFTER)}},
+            {"attached_to": 1, "fingerprint": 1, "user_id": 1, "priority": 1, "created_at": 1},
+        ).limit(500):
+            followers.setdefault(doc.get("attached_to") or "", []).append(doc)
+        owner_ids = [ObjectId(owner) for owner in followers if ObjectId.is_valid(owner)]
+        owners = {
+            str(doc["_id"]): doc async for doc in self.db["jobs"].find(
+                {"_id": {"$in": owner_ids}},
+                {"status": 1, "attached_to": 1, "result_url": 1, "script": 1, "stages.script.output": 1, "updated_at": 1},
+            )
+        }
+
+        stats: Dict[str, Any] = {"checked": sum(len(group) for group in followers.values()), "completed": 0, "requeued": []}
+        stale = now - timedelta(seconds=DedupeConfig.INFLIGHT_TTL)
+        for owner_id, group in followers.items():
+            owner = owners.get(owner_id)
+            status = owner.get("status") if owner else None
+            if status == "completed" and owner.get("result_url"):
+                script = ((owner.get("stages") or {}).get("script") or {}).get("output") or owner.get("script")
+                await self._share_result(owner_id, group[0].get("fingerprint"), result_url=owner["result_url"], script=script)
+                stats["completed"] += len(group)
+            elif status == "attached" and owner.get("attached_to"):
+                # O dono passou a seguir outro job: os seguidores vão junto
+                await self.db["jobs"].update_many(
+                    {"_id": {"$in": [doc["_id"] for doc in group]}, "status": "attached"},
+                    {"$set": {"attached_to": owner["attached_to"], "updated_at": now}}
+                )
+            elif status in (None, "failed", "attached") or owner["updated_at"] < stale:
+                stats["requeued"].append(await self._promote_follower(owner_id, group))
+        stats["requeued"] = [job for job in stats["requeued"] if job]
+        return stats
+
+    async def _promote_follower(self, owner_id: str, group: List[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        """O seguidor mais antigo assume o conteúdo; os demais o seguem. Retorna o job a despachar."""
+        group = sorted(group, key=lambda doc: doc["created_at"])
+        heir, fingerprint = group[0], group[0].get("fingerprint")
+        heir_id = str(heir["_id"])
+        if fingerprint:
+            # Libera a reserva do dono antigo (se ainda for dele) antes de tomá-la
+            await job_dedupe.release(fingerprint, owner_id)
+            owner = await job_dedupe.claim(fingerprint, heir_id)
+            if owner != heir_id:
+                await self.db["jobs"].update_many(
+                    {"_id": {"$in": [doc["_id"] for doc in group]}, "status": "attached"},
+                    {"$set": {"attached_to": owner, "updated_at": datetime.utcnow()}}
+                )
+                return None
+        promoted = await self.db["jobs"].update_one(
+            {"_id": heir["_id"], "status": "attached", "attached_to": owner_id},
+            {"$set": {"status": "queued", "updated_at": datetime.utcnow()}, "$unset": {"attached_to": ""}}
+        )
+        if not promoted.modified_count:
+            return None
+        if len(group) > 1:
+            await self.db["jobs"].update_many(
+                {"_id": {"$in": [doc["_id"] for doc in group[1:]]}, "status": "attached"},
+                {"$set": {"attached_to": heir_id, "updated_at": datetime.utcnow()}}
+            )
+        await job_events.publish(heir_id, status="queued", progress=0, attached_to="")
+        logger.info(f"Job {heir_id} assume o conteúdo do job {owner_id} ({len(group) - 1} seguidor(es))")
+        return {"job_id": heir_id, "user_id": heir.get("user_id", ""), "priority": heir.get("priority") or "default"}
+
+    async def sweep_pending_renders(self) -> Dict[str, int]:
+        """
+        Rede de segurança para webhooks perdidos: consulta uma vez cada job em
+        `rendering` há mais de `SWEEP_AFTER` segundos e falha os que passaram
+        de `RENDER_TIMEOUT`.
+        """
+        now = datetime.utcnow()
+        cursor = self.db["jobs"].find(
+            {"status": "rendering", "render_submitted_at": {"$lt": now - timedelta(seconds=DIDConfig.SWEEP_AFTER)}},
+            {"talk_id": 1, "render_submitted_at": 1},
+        ).limit(200)
+        stats = {"checked": 0, "completed": 0, "failed": 0, "timed_out": 0}
+        sem = asyncio.Semaphore(4)
+
+        async def sweep(job: Dict[str, Any]):
+            async with sem:
+                job_id = str(job["_id"])
+                try:
+                    talk = await self.did_service.get_talk(job["talk_id"])
+                except Exception as e:
+                    logger.warning(f"Sweeper: falha ao consultar o talk do job {job_id}: {e}")
+                    talk = {}
+                stats["checked"] += 1
+                status = await self.complete_render(job_id, {"id": job["talk_id"], **talk})
+                if status in ("completed", "failed"):
+                    stats[status] += 1
+                elif job["render_submitted_at"] < now - timedelta(seconds=DIDConfig.RENDER_TIMEOUT):
+                    timed_out = await self.complete_render(
+                        job_id, {"id": job["talk_id"], "status": "error", "error": "Timeout"}
+                    )
+                    if timed_out == "failed":
+                        stats["timed_out"] += 1
+
+        await asyncio.gather(*[sweep(job) async for job in cursor])
+        return stats
 
     async def _wait_for_video(self, talk_id: Optional[str]) -> str:
         if not talk_id: raise Exception("ID do D-ID ausente.")
@@ -0,0 +1,126 @@
+"""
+Execução de pipelines como grafo de estágios (DAG).
+Cada estágio roda assim que suas dependências terminam; estágios independentes
+rodam em paralelo. Resultados já checkpointados não são recalculados.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+CheckpointFn = Callable[[str, Dict[str, Any]], Awaitable[None]]
+StartFn = Callable[[str], Awaitable[None]]
+
+
+class StageError(Exception):
+    """Falha de um estágio (a causa original fica em `__cause__`)."""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"Estágio '{stage}' falhou: {message}")
+        self.stage = stage
+
+
+class StageSkipped(Exception):
+    """Estágio não executado porque uma dependência falhou."""
+
+
+class Stage:
+    def __init__(self, name: str, fn: StageFn, deps: Iterable[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+class StageGraph:
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            unknown = [d for d in stage.deps if d not in self.stages]
+            if unknown:
+                raise ValueError(f"Estágio '{stage.name}' depende de estágios inexistentes: {unknown}")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Ciclo no grafo de estágios envolvendo '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    async def run(
+        self,
+        completed: Optional[Dict[str, Any]] = None,
+        checkpoint: Optional[CheckpointFn] = None,
+        on_start: Optional[StartFn] = None,
+    ) -> Dict[str, Any]:
+        """
+        Executa o grafo. `completed` traz as saídas de estágios já concluídos
+        (retomada); `on_start(stage)` é chamado quando um estágio começa e
+        `checkpoint(stage, info)` ao fim de cada estágio, com status, saída e
+        tempos. Levanta `StageError` do primeiro estágio que falhar, depois
+        que os estágios independentes em andamento terminarem.
+        """
+        outputs: Dict[str, Any] = dict(completed or {})
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage) -> Any:
+            for dep in stage.deps:
+                try:
+                    await tasks[dep]
+                except Exception:
+                    raise StageSkipped(dep)
+            if stage.name in outputs:
+                return outputs[stage.name]
+
+            inputs = {dep: outputs[dep] for dep in stage.deps}
+            if on_start:
+                await on_start(stage.name)
+            started_at = datetime.utcnow()
+            start = time.perf_counter()
+            try:
+                result = await stage.fn(inputs)
+            except Exception as e:
+                info = {
+                    "status": "failed",
+                    "error": str(e),
+                    "started_at": started_at,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                }
+                if checkpoint:
+                    await checkpoint(stage.name, info)
+                raise
+            outputs[stage.name] = result
+            info = {
+                "status": "completed",
+                "output": result,
+                "started_at": started_at,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            }
+            logger.info(f"Estágio '{stage.name}' concluído em {info['duration_ms']}ms")
+            if checkpoint:
+                await checkpoint(stage.name, info)
+            return result
+
+        loop = asyncio.get_running_loop()
+        for stage in self.stages.values():
+            tasks[stage.name] = loop.create_task(run_stage(stage))
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        for name, result in zip(tasks, results):
+            if isinstance(result, Exception) and not isinstance(result, StageSkipped):
+                raise StageError(name, str(result)) from result
+        return outputs
@@ -0,0 +1,71 @@
+"""
+Refresh incremental de preços.
+Re-scrapeia em background os produtos mais acessados pouco antes de expirarem,
+para que o usuário quase nunca pague a latência de um scrape frio.
+"""
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Dict
+
+from app.core.cache import cache
+from app.services.hot_products import hot_products, RefreshConfig
+from app.services.product_service import ProductScraperService
+from app.services.scrapers.errors import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class PriceRefresher:
+    """Uma rodada de refresh: seleciona candidatos, respeita o orçamento e re-scrapeia."""
+
+    @staticmethod
+    def is_due(candidate: Dict[str, Any]) -> bool:
+        # -2: já expirou (re-aquece); -1: sem TTL (nunca expira, ignora)
+        ttl = candidate["ttl"]
+        return bool(candidate["url"]) and (ttl == -2 or 0 <= ttl <= RefreshConfig.REFRESH_AHEAD)
+
+    @staticmethod
+    def priority(candidate: Dict[str, Any]) -> float:
+        # Produtos populares cujo preço muda com frequência vêm primeiro
+        return candidate["score"] * (0.5 + candidate["change_rate"])
+
+    async def run_once(self) -> Dict[str, int]:
+        if not cache.is_connected:
+            logger.warning("Refresh de preços ignorado: Redis indisponível")
+            return {}
+
+        await hot_products.decay()
+        candidates = [c for c in await hot_products.candidates() if self.is_due(c)]
+        candidates.sort(key=self.priority, reverse=True)
+        candidates = candidates[:RefreshConfig.MAX_PER_RUN]
+
+        stats: Counter = Counter(candidates=len(candidates))
+        sem = asyncio.Semaphore(RefreshConfig.CONCURRENCY)
+
+        async def refresh(candidate: Dict[str, Any]):
+            async with sem:
+                if not await hot_products.take_budget(candidate["marketplace"]):
+                    stats["over_budget"] += 1
+                    return
+                try:
+                    changed = await ProductScraperService.refresh_product(candidate["url"])
+                except CircuitOpenError:
+                    stats["circuit_open"] += 1
+                    return
+                except Exception as e:
+                    logger.warning(f"Refresh falhou para {candidate['url']}: {e}")
+                    stats["failed"] += 1
+                    return
+                await hot_products.record_refresh(candidate["key"], changed)
+                stats["refreshed"] += 1
+                if changed:
+                    stats["changed"] += 1
+
+        await asyncio.gather(*(refresh(c) for c in candidates))
+        logger.info(f"♻️ Refresh de preços: {dict(stats)}")
+        return dict(stats)
+
+
+# Singleton global
+price_refresher = PriceRefresher()
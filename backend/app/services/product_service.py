@@ -1,43 +1,170 @@
 from __future__ import annotations
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Dict, Tuple
 import logging
 import asyncio
+import os
 
-from app.models.product import Product, ProductResponse, Marketplace
-from app.core.cache import cache, CacheConfig
-from app.services.scrapers.base import ScraperRegistry, ScraperError
+from app.models.product import Product, ProductResponse, Marketplace, BulkProductResponse, BulkProductError
+from app.core.cache import cache, cached, CacheConfig, CacheKey
+from app.core.singleflight import SingleFlight, RedisSingleFlight
+from app.services.scrapers.base import ScraperRegistry, ScraperError, BaseScraper
+from app.services.scrapers.errors import ErrorKind, classify_error
+from app.services.hot_products import hot_products
 
 logger = logging.getLogger(__name__)
 
+# Coalescência de scrapes concorrentes da mesma chave de cache
+scrape_flight = SingleFlight("product_scrape")
+distributed_scrape_flight = RedisSingleFlight("product_scrape")
+
 class ProductScraperService:
+    # Coalescência entre processos via lock no Redis (réplicas da API + workers)
+    DISTRIBUTED_SINGLEFLIGHT = os.getenv("SINGLEFLIGHT_DISTRIBUTED", "false").lower() == "true"
+
+    # Limites do scrape em lote (global e por marketplace)
+    BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "500"))
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "20"))
+    BATCH_PER_MARKETPLACE = int(os.getenv("BATCH_PER_MARKETPLACE", "5"))
+
     @staticmethod
-    async def scrape_product(url: str, bypass_cache: bool = False) -> Product:
+    async def resolve(url: str) -> Tuple[BaseScraper, str, str]:
+        """
+        Resolve scraper, URL canônica e chave de cache (com o ID real do marketplace),
+        para que variações de tracking, host mobile e links curtos compartilhem o cache.
+        """
         scraper = ScraperRegistry.get_scraper_for_url(url)
         if not scraper:
             # Acessando o dicionário interno para listar o que temos
             available = ", ".join([str(m.value) for m in ScraperRegistry._instances.keys()])
             raise ScraperError(f"URL não suportada. Marketplaces: {available}")
-        
-        product_id = scraper.extract_product_id(url)
-        cache_key = f"product:{scraper.marketplace.value}:{product_id}"
-        
-        if not bypass_cache:
-            try:
-                cached = await cache.get(cache_key, Product)
-                if cached:
-                    return cached
-            except Exception as e:
-                logger.warning(f"Erro ao ler cache: {e}")
-        
+
+        canonical_url = await scraper.resolve_url(url)
+        product_id = scraper.extract_product_id(canonical_url)
+        marketplace = scraper.marketplace.value
+        version = await cache.namespace_version(CacheKey.product_namespace(marketplace))
+        return scraper, canonical_url, CacheKey.product(marketplace, product_id, version)
+
+    @staticmethod
+    async def scrape_product(url: str, bypass_cache: bool = False) -> Product:
+        scraper, url, cache_key = await ProductScraperService.resolve(url)
+        hot_products.record_access(cache_key, url, scraper.marketplace.value)
+        return await ProductScraperService._scrape(scraper, url, cache_key, bypass_cache=bypass_cache)
+
+    @staticmethod
+    @cached(
+        key=lambda scraper, url, cache_key, bypass_cache=False: cache_key,
+        model=Product,
+        ttl=CacheConfig.PRODUCT_TTL,
+        soft_ttl=CacheConfig.PRODUCT_SOFT_TTL,
+        bypass="bypass_cache",
+        # Página inexistente/inválida não é re-scrapeada a cada requisição
+        negative_ttl=CacheConfig.NEGATIVE_TTL,
+        negative_if=lambda e: classify_error(e) == ErrorKind.PERMANENT,
+        flight=scrape_flight,
+        distributed=distributed_scrape_flight if DISTRIBUTED_SINGLEFLIGHT else None,
+        name="product_scrape",
+    )
+    async def _scrape(scraper: BaseScraper, url: str, cache_key: str, bypass_cache: bool = False) -> Product:
         product = await scraper.scrape_with_retry(url)
-        
-        try:
-            await cache.set(cache_key, product, ttl=CacheConfig.PRODUCT_TTL)
-        except Exception as e:
-            logger.warning(f"Erro ao salvar cache: {e}")
-            
+        product.metadata.scrape_hash = ProductScraperService.fingerprint(product)
         return product
 
+    @staticmethod
+    async def scrape_batch(urls: List[str], bypass_cache: bool = False) -> BulkProductResponse:
+        """
+        Scrape em lote: um MGET para todas as chaves, scrape concorrente apenas
+        dos misses (limitado globalmente e por marketplace) e um único pipeline
+        para gravar os resultados. Erros são reportados por item.
+        """
+        cls = ProductScraperService
+        errors: List[BulkProductError] = []
+        # cache_key -> (scraper, url); URLs repetidas compartilham o mesmo scrape
+        targets: Dict[str, tuple[BaseScraper, str]] = {}
+        item_keys: List[Optional[str]] = []
+
+        resolved = await asyncio.gather(
+            *(cls.resolve(url) for url in urls), return_exceptions=True
+        )
+        for index, (url, target) in enumerate(zip(urls, resolved)):
+            if isinstance(target, BaseException):
+                errors.append(BulkProductError(index=index, url=url, error=str(target)))
+                item_keys.append(None)
+                continue
+            scraper, canonical_url, key = target
+            if key not in targets:
+                targets[key] = (scraper, canonical_url)
+                hot_products.record_access(key, canonical_url, scraper.marketplace.value)
+            item_keys.append(key)
+
+        keys = list(targets.keys())
+        found: Dict[str, Product] = {}
+        if not bypass_cache and keys:
+            cached = await cache.mget(keys, Product)
+            found = {k: p for k, p in zip(keys, cached) if p is not None}
+        cache_hits = len(found)
+
+        global_limit = asyncio.Semaphore(cls.BATCH_CONCURRENCY)
+        marketplace_limits: Dict[Marketplace, asyncio.Semaphore] = {}
+        failures: Dict[str, str] = {}
+
+        async def _scrape(key: str, scraper: BaseScraper, url: str):
+            limit = marketplace_limits.setdefault(
+                scraper.marketplace, asyncio.Semaphore(cls.BATCH_PER_MARKETPLACE)
+            )
+            async with limit, global_limit:
+                try:
+                    found[key] = await scrape_flight.do(key, lambda: scraper.scrape_with_retry(url))
+                except Exception as e:
+                    logger.warning(f"Erro no scrape em lote de {url}: {e}")
+                    failures[key] = str(e)
+
+        misses = [(k, *targets[k]) for k in keys if k not in found]
+        await asyncio.gather(*(_scrape(k, s, u) for k, s, u in misses))
+
+        fresh = {k: found[k] for k, _, _ in misses if k in found}
+        for product in fresh.values():
+            product.metadata.scrape_hash = cls.fingerprint(product)
+        if fresh:
+            await cache.set_many(fresh, ttl=CacheConfig.PRODUCT_TTL, soft_ttl=CacheConfig.PRODUCT_SOFT_TTL)
+
+        products: List[ProductResponse] = []
+        for index, (url, key) in enumerate(zip(urls, item_keys)):
+            if key is None:
+                continue
+            if key in found:
+                products.append(cls.to_response(found[key]))
+            else:
+                errors.append(BulkProductError(index=index, url=url, error=failures.get(key, "Falha no scrape")))
+        errors.sort(key=lambda e: e.index)
+
+        return BulkProductResponse(
+            total=len(urls),
+            products=products,
+            cache_hit=bool(keys) and not misses,
+            cache_hits=cache_hits,
+            errors=errors,
+        )
+
+    @staticmethod
+    async def refresh_product(url: str) -> bool:
+        """
+        Re-scrapeia um produto em cache (usado pelo refresher em background).
+        Retorna True se o conteúdo mudou em relação à versão em cache.
+        """
+        # Chave resolvida de novo: o namespace pode ter sido invalidado desde o acesso
+        scraper, url, cache_key = await ProductScraperService.resolve(url)
+        previous = await cache.get(cache_key, Product)
+        product = await scrape_flight.do(cache_key, lambda: scraper.scrape_with_retry(url))
+        product.metadata.scrape_hash = ProductScraperService.fingerprint(product)
+        await cache.set(cache_key, product, ttl=CacheConfig.PRODUCT_TTL, soft_ttl=CacheConfig.PRODUCT_SOFT_TTL)
+        return previous is None or previous.metadata.scrape_hash != product.metadata.scrape_hash
+
+    @staticmethod
+    def fingerprint(product: Product) -> str:
+        """Hash do conteúdo que importa para o anúncio (nome, preço, estoque, imagens)."""
+        content = product.model_dump_json(include={"name", "price", "stock", "is_available", "images"})
+        return product.metadata.compute_hash(content)
+
     @staticmethod
     def to_response(product: Product) -> ProductResponse:
         """Converte com segurança garantindo tipos primitivos para o Pydantic"""
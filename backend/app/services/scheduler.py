@@ -0,0 +1,197 @@
+"""
+Agendamento justo de jobs entre usuários.
+
+Os jobs não vão direto para o broker: cada usuário tem uma sub-fila no Redis
+por tier de prioridade e um despachante faz deficit round-robin entre os
+usuários ativos, mantendo no Celery só o que os workers do tier conseguem
+consumir. Um cliente que submete 500 jobs não atrasa os demais: a cada rodada
+cada usuário despacha no máximo o seu quantum.
+
+As chaves de um tier usam a hash tag `{tier}` e caem no mesmo slot, então
+os scripts de um tier funcionam em Redis Cluster.
+"""
+import logging
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+from app.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerConfig:
+    """Configuração das filas de jobs."""
+    TIERS = ("high", "default", "low")
+    # Jobs do tier no broker ou executando ao mesmo tempo (~ concorrência dos workers do tier)
+    CAPACITY = {
+        "high": int(os.getenv("SCHED_CAPACITY_HIGH", "16")),
+        "default": int(os.getenv("SCHED_CAPACITY_DEFAULT", "8")),
+        "low": int(os.getenv("SCHED_CAPACITY_LOW", "4")),
+    }
+    # Jobs despachados por usuário a cada rodada (peso padrão)
+    QUANTUM = float(os.getenv("SCHED_QUANTUM", "1"))
+    # Slot de um job cujo worker morreu é liberado depois disso
+    RUNNING_TIMEOUT = int(os.getenv("SCHED_RUNNING_TIMEOUT", "1800"))
+    # Rodada periódica do despachante (rede de segurança; o fim de cada job também despacha)
+    PUMP_INTERVAL = float(os.getenv("SCHED_PUMP_INTERVAL", "10"))
+    # Fila das esperas longas (polling do D-ID, sweeper), separada do trabalho curto
+    IO_QUEUE = "jobs.io"
+
+    @staticmethod
+    def queue(tier: str) -> str:
+        return f"jobs.{tier}"
+
+
+# ARGV[1] = usuário; ARGV[2..n] = jobs ("job_id|enfileirado_em")
+_SUBMIT_SCRIPT = """
+local before = redis.call('LLEN', KEYS[1])
+redis.call('RPUSH', KEYS[1], unpack(ARGV, 2))
+if before == 0 then redis.call('RPUSH', KEYS[2], ARGV[1]) end
+redis.call('INCRBY', KEYS[3], #ARGV - 1)
+return 1
+"""
+
+# Deficit round-robin: cada usuário ativo ganha seu quantum (peso) por rodada
+# e despacha um job por unidade de crédito, até acabarem os slots do tier.
+_DISPATCH_SCRIPT = """
+local prefix, now = ARGV[1], tonumber(ARGV[2])
+local active, running, stats = prefix .. 'active', prefix .. 'running', prefix .. 'stats'
+local deficits, weights = prefix .. 'deficit', prefix .. 'weights'
+redis.call('ZREMRANGEBYSCORE', running, '-inf', now - tonumber(ARGV[4]))
+local slots = tonumber(ARGV[3]) - redis.call('ZCARD', running)
+local out, idle = {}, 0
+while slots > 0 and idle < redis.call('LLEN', active) do
+    local user = redis.call('LPOP', active)
+    local queue = prefix .. 'user:' .. user
+    local deficit = tonumber(redis.call('HGET', deficits, user) or '0')
+        + tonumber(redis.call('HGET', weights, user) or ARGV[5])
+    local sent = 0
+    while deficit >= 1 and slots > 0 do
+        local item = redis.call('LPOP', queue)
+        if not item then break end
+        local sep = string.find(item, '|', 1, true)
+        local waited = now - tonumber(string.sub(item, sep + 1))
+        local job_id = string.sub(item, 1, sep - 1)
+        redis.call('ZADD', running, now, job_id)
+        redis.call('HINCRBY', stats, 'dispatched', 1)
+        redis.call('HINCRBYFLOAT', stats, 'wait_seconds_total', waited)
+        if waited > tonumber(redis.call('HGET', stats, 'wait_seconds_max') or '0') then
+            redis.call('HSET', stats, 'wait_seconds_max', waited)
+        end
+        table.insert(out, job_id .. '|' .. user)
+        deficit, slots, sent = deficit - 1, slots - 1, sent + 1
+    end
+    if redis.call('LLEN', queue) == 0 then
+        redis.call('HDEL', deficits, user)
+    else
+        redis.call('HSET', deficits, user, deficit)
+        redis.call('RPUSH', active, user)
+    end
+    if sent == 0 then idle = idle + 1 else idle = 0 end
+end
+if #out > 0 then redis.call('DECRBY', prefix .. 'depth', #out) end
+return out
+"""
+
+# Devolve jobs à frente da sub-fila do usuário (não chegaram ao broker); ARGV[1] = usuário
+_REQUEUE_SCRIPT = """
+local before = redis.call('LLEN', KEYS[1])
+for i = #ARGV, 2, -1 do redis.call('LPUSH', KEYS[1], ARGV[i]) end
+if before == 0 then redis.call('RPUSH', KEYS[2], ARGV[1]) end
+redis.call('INCRBY', KEYS[3], #ARGV - 1)
+return 1
+"""
+
+_STATS_SCRIPT = """
+local prefix = ARGV[1]
+return {
+    redis.call('GET', prefix .. 'depth') or '0',
+    redis.call('ZCARD', prefix .. 'running'),
+    redis.call('LLEN', prefix .. 'active'),
+    redis.call('HGET', prefix .. 'stats', 'dispatched') or '0',
+    redis.call('HGET', prefix .. 'stats', 'wait_seconds_total') or '0',
+    redis.call('HGET', prefix .. 'stats', 'wait_seconds_max') or '0',
+}
+"""
+
+
+class FairScheduler:
+    @staticmethod
+    def _prefix(tier: str) -> str:
+        return f"fairq:{{{tier}}}:"
+
+    async def submit(self, job_id: str, user_id: str, tier: str) -> bool:
+        """Coloca o job na sub-fila do usuário. False sem Redis (o chamador despacha direto)."""
+        return await self.submit_many([job_id], user_id, tier)
+
+    async def submit_many(self, job_ids: List[str], user_id: str, tier: str) -> bool:
+        """Vários jobs do mesmo usuário, em ordem, em um único round trip."""
+        if not cache.is_connected or not job_ids:
+            return False
+        prefix = self._prefix(tier)
+        now = f"{time.time():.3f}"
+        result = await cache.eval(
+            _SUBMIT_SCRIPT,
+            [f"{prefix}user:{user_id}", f"{prefix}active", f"{prefix}depth"],
+            [user_id, *(f"{job_id}|{now}" for job_id in job_ids)],
+        )
+        return bool(result)
+
+    async def next_batch(self, tier: str) -> List[Tuple[str, str]]:
+        """Reserva slots do tier e devolve os próximos (job_id, usuário), em ordem justa entre usuários."""
+        prefix = self._prefix(tier)
+        items = await cache.eval(
+            _DISPATCH_SCRIPT,
+            [f"{prefix}active", f"{prefix}running"],
+            [prefix, time.time(), SchedulerConfig.CAPACITY[tier],
+             SchedulerConfig.RUNNING_TIMEOUT, SchedulerConfig.QUANTUM],
+        )
+        return [tuple(item.split("|", 1)) for item in items or []]  # type: ignore[misc]
+
+    async def requeue(self, tier: str, jobs: List[Tuple[str, str]]):
+        """Devolve (job_id, usuário) à frente das sub-filas, na ordem (ex: broker fora do ar)."""
+        prefix = self._prefix(tier)
+        now = f"{time.time():.3f}"
+        by_user: Dict[str, List[str]] = {}
+        for job_id, user_id in jobs:
+            by_user.setdefault(user_id, []).append(f"{job_id}|{now}")
+        for user_id, items in by_user.items():
+            await cache.eval(
+                _REQUEUE_SCRIPT, [f"{prefix}user:{user_id}", f"{prefix}active", f"{prefix}depth"], [user_id, *items]
+            )
+
+    async def release(self, tier: str, job_id: str):
+        """Libera o slot do job (terminou, falhou de vez ou não chegou ao broker)."""
+        await cache.eval("return redis.call('ZREM', KEYS[1], ARGV[1])", [f"{self._prefix(tier)}running"], [job_id])
+
+    async def set_weight(self, tier: str, user_id: str, weight: float):
+        """Peso do usuário no tier (jobs por rodada); 1 é o padrão."""
+        await cache.eval(
+            "return redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])", [f"{self._prefix(tier)}weights"], [user_id, weight]
+        )
+
+    async def stats(self) -> Dict[str, Any]:
+        result = {}
+        for tier in SchedulerConfig.TIERS:
+            prefix = self._prefix(tier)
+            row = await cache.eval(_STATS_SCRIPT, [f"{prefix}depth"], [prefix])
+            if not row:
+                continue
+            depth, running, users, dispatched, wait_total, wait_max = row
+            dispatched = int(dispatched)
+            result[tier] = {
+                "queue": SchedulerConfig.queue(tier),
+                "depth": int(depth),
+                "running": int(running),
+                "capacity": SchedulerConfig.CAPACITY[tier],
+                "active_users": int(users),
+                "dispatched": dispatched,
+                "avg_wait_seconds": round(float(wait_total) / dispatched, 2) if dispatched else 0.0,
+                "max_wait_seconds": round(float(wait_max), 2),
+            }
+        return result
+
+
+# Singleton global
+fair_scheduler = FairScheduler()
@@ -1,7 +1,9 @@
 # backend/app/services/scrapers/__init__.py
 
 from .base import BaseScraper, ScraperRegistry, ScraperError
+from .errors import CircuitOpenError
+from .resilience import circuit_breakers
 from .generic_scraper import GenericEcomScraper # Certifique-se que o arquivo existe!
 
 # Exporta explicitamente para o orchestrator encontrar
-__all__ = ['BaseScraper', 'ScraperRegistry', 'ScraperError', 'GenericEcomScraper']
\ No newline at end of file
+__all__ = ['BaseScraper', 'ScraperRegistry', 'ScraperError', 'CircuitOpenError', 'circuit_breakers', 'GenericEcomScraper']
\ No newline at end of file
@@ -1,34 +1,47 @@
-import httpx
-from bs4 import BeautifulSoup
+import re
 from .base import BaseScraper, ScraperError, ScraperRegistry
+from .urls import strip_tracking_params, hostname
 from app.models.product import Product, ProductPrice, ProductImage, ProductMetadata, Marketplace
 
 @ScraperRegistry.register(Marketplace.ALIEXPRESS)
 class AliExpressScraper(BaseScraper):
     marketplace = Marketplace.ALIEXPRESS
+    domains = ("aliexpress.com", "aliexpress.us", "aliexpress.ru")
+    short_link_hosts = ("a.aliexpress.com", "s.click.aliexpress.com")
+    # /item/<id>.html  ou  ?productId=<id>
+    _id_patterns = (re.compile(r"/item/(\d+)\.html"), re.compile(r"[?&]productId=(\d+)"))
     
-    def validate_url(self, url: str) -> bool:
-        return "aliexpress" in url.lower()
+    def _match_id(self, url: str):
+        for pattern in self._id_patterns:
+            match = pattern.search(url)
+            if match:
+                return match.group(1)
+        return None
+
+    def extract_product_id(self, url: str) -> str:
+        return self._match_id(url) or super().extract_product_id(url)
+
+    def canonicalize_url(self, url: str) -> str:
+        item_id = self._match_id(url)
+        if not item_id:
+            return strip_tracking_params(url)
+        host = hostname(url)
+        if host.startswith("m."):
+            host = "www." + host[2:]
+        return f"https://{host}/item/{item_id}.html"
     
     async def scrape(self, url: str) -> Product:
-        async with httpx.AsyncClient(timeout=self.request_timeout, headers=self.common_headers, follow_redirects=True) as client:
-            r = await client.get(url)
-            r.raise_for_status()
-            
-        soup = BeautifulSoup(r.text, "html.parser")
+        page = await self.fetch_page(url)
         
         # Extração Meta com cast para String para satisfazer o Pylance
-        title_tag = soup.select_one("meta[property='og:title']")
-        name = str(title_tag.get("content", "Produto AliExpress")) if title_tag else "Produto AliExpress"
+        name = str(page.get("og:title", "Produto AliExpress"))
         
-        price_tag = soup.select_one("meta[property='product:price:amount']")
         try:
-            price_val = float(str(price_tag.get("content", "0"))) if price_tag else 0.0
+            price_val = float(str(page.get("product:price:amount", "0")))
         except (ValueError, TypeError):
             price_val = 0.0
 
-        image_tag = soup.select_one("meta[property='og:image']")
-        img_url = str(image_tag.get("content", "")) if image_tag else ""
+        img_url = str(page.get("og:image", ""))
         images = [ProductImage(url=img_url, is_primary=True, position=0)] if img_url else []
 
         return Product(
@@ -1,18 +1,30 @@
 import logging
 import hashlib
+import importlib
+import pkgutil
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Type, List, Any
+from typing import Optional, Dict, Type, List, Any, Tuple
+from app.core.http import http_clients
 from app.models.product import Product, Marketplace
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from .head_extractor import PageMetadata, extract_from_stream
+from .urls import strip_tracking_params, hostname
+from .errors import ScraperError, CircuitOpenError
+from .resilience import RetryPolicy, circuit_breakers
+from tenacity import retry, stop_after_attempt, retry_if_exception
 
 logger = logging.getLogger(__name__)
 
-class ScraperError(Exception): pass
-
 class BaseScraper(ABC):
     marketplace: Marketplace = Marketplace.GENERIC
     request_timeout: int = 30
     max_retries: int = 3
+    retry_policy: RetryPolicy = RetryPolicy()
+    # Campos que, se ausentes no <head>, forçam o parse completo da página
+    required_fields: Tuple[str, ...] = ("og:title", "product:price:amount")
+    # Domínios atendidos (inclui subdomínios: "shein.com" cobre "br.shein.com")
+    domains: Tuple[str, ...] = ()
+    # Hosts de links curtos que redirecionam para a página do produto
+    short_link_hosts: Tuple[str, ...] = ()
     
     common_headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
@@ -23,45 +35,131 @@ class BaseScraper(ABC):
     @abstractmethod
     async def scrape(self, url: str) -> Product: pass
     
-    @abstractmethod
-    def validate_url(self, url: str) -> bool: pass
+    def validate_url(self, url: str) -> bool:
+        host = hostname(url)
+        return any(host == d or host.endswith("." + d) for d in self.domains + self.short_link_hosts)
+
+    async def fetch_page(self, url: str, headers: Optional[Dict[str, str]] = None) -> PageMetadata:
+        """
+        Lê a página em streaming só até </head> e extrai meta tags e JSON-LD.
+        Faz fallback para o parse completo quando `required_fields` faltam.
+        """
+        client = http_clients.get("scrapers")
+        async with client.stream(
+            "GET",
+            url,
+            headers=self.common_headers if headers is None else headers,
+            timeout=self.request_timeout,
+            follow_redirects=True,
+        ) as response:
+            response.raise_for_status()
+            return await extract_from_stream(
+                response.aiter_bytes(),
+                encoding=response.charset_encoding,
+                required=self.required_fields,
+            )
+
+    def canonicalize_url(self, url: str) -> str:
+        """URL canônica do produto (padrão: sem parâmetros de rastreamento)."""
+        return strip_tracking_params(url)
 
     def extract_product_id(self, url: str) -> str:
-        return hashlib.md5(url.encode()).hexdigest()[:12]
+        """ID estável do produto. Scrapers de marketplace sobrescrevem com o ID real."""
+        return hashlib.md5(strip_tracking_params(url).encode()).hexdigest()[:12]
+
+    def is_short_link(self, url: str) -> bool:
+        return hostname(url) in self.short_link_hosts
+
+    async def resolve_url(self, url: str) -> str:
+        """Segue redirects de links curtos e devolve a URL canônica."""
+        if self.is_short_link(url):
+            client = http_clients.get("scrapers")
+            try:
+                response = await client.head(
+                    url, headers=self.common_headers, timeout=self.request_timeout, follow_redirects=True
+                )
+                url = str(response.url)
+            except Exception as e:
+                logger.warning(f"Falha ao resolver link curto {url}: {e}")
+        return self.canonicalize_url(url)
     
     async def scrape_with_retry(self, url: str) -> Product:
+        """
+        Scrape com retry classificado (rede/throttling/permanente) e circuit
+        breaker por host: com o host instável, falha rápido em vez de esperar.
+        """
+        host = hostname(url)
+        policy = self.retry_policy
+
         @retry(
             stop=stop_after_attempt(self.max_retries),
-            wait=wait_exponential(multiplier=1, min=2, max=10),
-            retry=retry_if_exception_type((ScraperError, Exception)),
+            wait=policy.wait,
+            retry=retry_if_exception(policy.should_retry),
             reraise=True
         )
         async def _execute():
-            return await self.scrape(url)
+            state = await circuit_breakers.before_call(host)
+            try:
+                product = await self.scrape(url)
+            except Exception as e:
+                await circuit_breakers.record_failure(host, e)
+                raise
+            await circuit_breakers.record_success(host, state)
+            return product
         return await _execute()
 
 class ScraperRegistry:
+    """
+    Roteamento URL -> scraper por índice de hostname.
+    Cada scraper declara `domains`; o lookup testa o host e seus sufixos
+    (ex: "br.shein.com" -> "shein.com") em um dicionário, com o scraper
+    genérico como fallback explícito.
+    """
     _instances: Dict[Marketplace, BaseScraper] = {}
+    _host_index: Dict[str, Marketplace] = {}
+    _bootstrapped: bool = False
+    fallback_marketplace: Marketplace = Marketplace.CUSTOM
     
     @classmethod
     def register(cls, marketplace: Marketplace):
         def wrapper(scraper_cls: Type[BaseScraper]):
-            cls._instances[marketplace] = scraper_cls()
+            scraper = scraper_cls()
+            for domain in scraper.domains + scraper.short_link_hosts:
+                domain = domain.lower()
+                owner = cls._host_index.get(domain)
+                if owner is not None and owner != marketplace:
+                    raise ValueError(f"Domínio {domain} já registrado para {owner.value}")
+                cls._host_index[domain] = marketplace
+            cls._instances[marketplace] = scraper
             return scraper_cls
         return wrapper
     
     @classmethod
     def get_scraper_for_url(cls, url: str) -> Optional[BaseScraper]:
-        if not cls._instances: cls._bootstrap()
-        for scraper in cls._instances.values():
-            if scraper.validate_url(url): return scraper
-        return cls._instances.get(Marketplace.CUSTOM)
+        if not cls._bootstrapped: cls._bootstrap()
+        host = hostname(url)
+        while host:
+            marketplace = cls._host_index.get(host)
+            if marketplace is not None:
+                return cls._instances[marketplace]
+            _, _, host = host.partition(".")
+        return cls._instances.get(cls.fallback_marketplace)
 
     @classmethod
     def _bootstrap(cls):
-        try:
-            # Importa os módulos para disparar o decorator @register
-            from app.services.scrapers import shopee, aliexpress, shein, generic_scraper
-            logger.info("✓ Scrapers carregados com sucesso.")
-        except ImportError as e:
-            logger.error(f"Erro no bootstrap: {e}")
\ No newline at end of file
+        # Importa todos os módulos do pacote para disparar o decorator @register;
+        # novos scrapers entram só por existirem em app/services/scrapers/
+        cls._bootstrapped = True
+        package = importlib.import_module(__package__ or "app.services.scrapers")
+        for module in pkgutil.iter_modules(package.__path__):
+            try:
+                importlib.import_module(f"{package.__name__}.{module.name}")
+            except ImportError as e:
+                logger.error(f"Erro no bootstrap do scraper {module.name}: {e}")
+        logger.info(f"✓ Scrapers carregados: {', '.join(m.value for m in cls._instances)}")
+
+    @classmethod
+    def bootstrap(cls):
+        """Carrega os scrapers e monta o índice de hosts (chamado no startup)."""
+        if not cls._bootstrapped:
+            cls._bootstrap()
@@ -0,0 +1,79 @@
+"""
+Erros dos scrapers e classificação para a política de retry.
+"""
+import email.utils
+import json
+import time
+from enum import Enum
+from typing import Optional
+
+import httpx
+from pydantic import ValidationError
+
+
+class ScraperError(Exception): pass
+
+
+class CircuitOpenError(ScraperError):
+    """Host marcado como indisponível pelo circuit breaker (falha rápida)."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit breaker aberto para {host}; nova tentativa em {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class ErrorKind(str, Enum):
+    TRANSIENT = "transient"    # rede/timeout/5xx: vale repetir com backoff
+    THROTTLED = "throttled"    # 429/403: respeitar Retry-After
+    PERMANENT = "permanent"    # 4xx/parse/validação: repetir não adianta
+    CIRCUIT_OPEN = "circuit_open"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After em segundos (aceita número ou data HTTP)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+def classify_error(exc: BaseException) -> ErrorKind:
+    """Classifica a exceção (seguindo `__cause__` de erros embrulhados)."""
+    seen = set()
+    current: Optional[BaseException] = exc
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if isinstance(current, CircuitOpenError):
+            return ErrorKind.CIRCUIT_OPEN
+        if isinstance(current, httpx.HTTPStatusError):
+            status = current.response.status_code
+            if status in (403, 429):
+                return ErrorKind.THROTTLED
+            if status == 408 or status >= 500:
+                return ErrorKind.TRANSIENT
+            return ErrorKind.PERMANENT
+        if isinstance(current, (httpx.TimeoutException, httpx.TransportError, ConnectionError, TimeoutError)):
+            return ErrorKind.TRANSIENT
+        if isinstance(current, (ValidationError, ValueError, KeyError, TypeError, json.JSONDecodeError)):
+            return ErrorKind.PERMANENT
+        current = current.__cause__
+    # ScraperError sem causa de rede = falha de extração
+    if isinstance(exc, ScraperError):
+        return ErrorKind.PERMANENT
+    return ErrorKind.TRANSIENT
+
+
+def retry_after_of(exc: BaseException) -> Optional[float]:
+    current: Optional[BaseException] = exc
+    while current is not None:
+        if isinstance(current, httpx.HTTPStatusError):
+            return parse_retry_after(current.response.headers.get("Retry-After"))
+        current = current.__cause__
+    return None
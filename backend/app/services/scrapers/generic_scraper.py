@@ -1,6 +1,3 @@
-import httpx
-from bs4 import BeautifulSoup
-from typing import Any, Optional
 from .base import BaseScraper, ScraperError, ScraperRegistry # <--- IMPORTANTE
 from app.models.product import Product, Marketplace, ProductPrice, ProductMetadata, ProductImage
 
@@ -13,21 +10,11 @@ class GenericEcomScraper(BaseScraper):
 
     async def scrape(self, url: str) -> Product:
         try:
-            async with httpx.AsyncClient(timeout=self.request_timeout) as client:
-                response = await client.get(url, follow_redirects=True)
-                response.raise_for_status()
-                
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # Usamos find().get() que é suportado pela interface do BS4
-            # mas acessamos de forma que o Pylance não tente validar o __getitem__
-            def get_meta(prop: str) -> Optional[str]:
-                tag: Any = soup.find("meta", property=prop)
-                return tag.get("content") if tag else None
+            page = await self.fetch_page(url, headers={})
 
-            name = get_meta("og:title") or "Produto Sem Nome"
-            raw_price = get_meta("product:price:amount")
-            image_url = get_meta("og:image")
+            name = page.get("og:title") or "Produto Sem Nome"
+            raw_price = page.get("product:price:amount")
+            image_url = page.get("og:image")
 
             price_val = float(raw_price) if raw_price else 0.01
 
@@ -47,4 +34,4 @@ class GenericEcomScraper(BaseScraper):
                 is_available=True
             )
         except Exception as e:
-            raise ScraperError(f"Falha ao extrair dados de {url}: {str(e)}")
\ No newline at end of file
+            raise ScraperError(f"Falha ao extrair dados de {url}: {str(e)}") from e
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""
+Extrator incremental de metadados do <head>.
+Lê meta tags (OpenGraph/product:*) e blocos JSON-LD conforme a resposta chega
+e para de ler a rede assim que encontra </head> (ou atinge o limite de bytes).
+"""
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from bs4 import BeautifulSoup
+from lxml import etree
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+JSON_LD = "application/ld+json"
+HEAD_MAX_BYTES = int(os.getenv("SCRAPER_HEAD_MAX_BYTES", str(256 * 1024)))
+FULL_MAX_BYTES = int(os.getenv("SCRAPER_FULL_MAX_BYTES", str(5 * 1024 * 1024)))
+FEED_SLICE = 4096
+
+
+class PageMetadata(BaseModel):
+    """Metadados extraídos de uma página de produto."""
+    title: Optional[str] = None
+    meta: Dict[str, str] = Field(default_factory=dict)
+    json_ld: List[Any] = Field(default_factory=list)
+    bytes_read: int = 0
+    head_complete: bool = False
+    full_parse: bool = False
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self.meta.get(name, default)
+
+    def has(self, field: str) -> bool:
+        if field == JSON_LD:
+            return bool(self.json_ld)
+        return bool(self.meta.get(field))
+
+    def missing(self, required: Iterable[str]) -> List[str]:
+        return [f for f in required if not self.has(f)]
+
+    def first_json_ld(self) -> Dict[str, Any]:
+        """Primeiro objeto JSON-LD (desembrulha listas, como os scrapers faziam)."""
+        if not self.json_ld:
+            return {}
+        data = self.json_ld[0]
+        if isinstance(data, list):
+            data = data[0] if data else {}
+        return data if isinstance(data, dict) else {}
+
+
+def _parse_json_ld(text: Optional[str]) -> Optional[Any]:
+    if not text or not text.strip():
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+class HeadExtractor:
+    """
+    Parser incremental baseado no `HTMLPullParser` do lxml.
+    `feed()` retorna True quando não é mais necessário ler a página.
+    """
+
+    def __init__(self, encoding: Optional[str] = None, max_bytes: int = HEAD_MAX_BYTES):
+        self._parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding or "utf-8")
+        self.max_bytes = max_bytes
+        self.result = PageMetadata()
+        self.done = False
+
+    def _consume_events(self):
+        for event, el in self._parser.read_events():
+            tag = el.tag if isinstance(el.tag, str) else ""
+            if event == "start":
+                if tag == "body":
+                    self.done = True
+            elif tag == "meta":
+                key = el.get("property") or el.get("name") or el.get("itemprop")
+                content = el.get("content")
+                if key and content is not None:
+                    self.result.meta.setdefault(key, content)
+            elif tag == "script":
+                if (el.get("type") or "").strip().lower() == JSON_LD:
+                    data = _parse_json_ld(el.text)
+                    if data is not None:
+                        self.result.json_ld.append(data)
+            elif tag == "title":
+                if self.result.title is None and el.text:
+                    self.result.title = el.text.strip()
+            elif tag == "head":
+                self.result.head_complete = True
+                self.done = True
+            if self.done:
+                break
+
+    def feed(self, chunk: bytes) -> bool:
+        # Alimenta em fatias para não parsear o <body> inteiro de um chunk grande
+        for start in range(0, len(chunk), FEED_SLICE):
+            if self.done:
+                break
+            piece = chunk[start:start + FEED_SLICE]
+            self.result.bytes_read += len(piece)
+            self._parser.feed(piece)
+            self._consume_events()
+            if self.result.bytes_read >= self.max_bytes:
+                self.done = True
+        return self.done
+
+    def close(self) -> PageMetadata:
+        if not self.done:
+            try:
+                self._parser.close()
+            except etree.LxmlError:
+                pass
+            self._consume_events()
+        return self.result
+
+
+def extract_full(html: str, bytes_read: int = 0) -> PageMetadata:
+    """Fallback: parse completo do documento (meta tags e JSON-LD em qualquer lugar)."""
+    soup = BeautifulSoup(html, "html.parser")
+    result = PageMetadata(bytes_read=bytes_read, head_complete=True, full_parse=True)
+    if soup.title and soup.title.string:
+        result.title = soup.title.string.strip()
+    for tag in soup.find_all("meta"):
+        key = tag.get("property") or tag.get("name") or tag.get("itemprop")
+        content = tag.get("content")
+        if key and content is not None:
+            result.meta.setdefault(str(key), str(content))
+    for script in soup.find_all("script", type=JSON_LD):
+        data = _parse_json_ld(script.get_text())
+        if data is not None:
+            result.json_ld.append(data)
+    return result
+
+
+async def extract_from_stream(
+    chunks: AsyncIterator[bytes],
+    encoding: Optional[str] = None,
+    required: Iterable[str] = (),
+    head_max_bytes: int = HEAD_MAX_BYTES,
+    full_max_bytes: int = FULL_MAX_BYTES,
+) -> PageMetadata:
+    """
+    Consome `chunks` só até o fim do <head>. Se algum campo de `required`
+    faltar, continua lendo o mesmo stream (até `full_max_bytes`) e faz o parse completo.
+    """
+    extractor = HeadExtractor(encoding=encoding, max_bytes=head_max_bytes)
+    buffer: List[bytes] = []
+    async for chunk in chunks:
+        buffer.append(chunk)
+        if extractor.feed(chunk):
+            break
+    result = extractor.close()
+
+    missing = result.missing(required)
+    if not missing:
+        return result
+
+    logger.debug(f"Campos ausentes no <head> ({missing}); fazendo parse completo")
+    total = result.bytes_read
+    async for chunk in chunks:
+        buffer.append(chunk)
+        total += len(chunk)
+        if total >= full_max_bytes:
+            break
+    html = b"".join(buffer).decode(encoding or "utf-8", errors="replace")
+    return extract_full(html, bytes_read=total)
@@ -0,0 +1,184 @@
+"""
+Resiliência dos scrapers: política de retry por tipo de erro e circuit breaker
+por host compartilhado via Redis (com fallback em memória).
+"""
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict
+
+from tenacity import RetryCallState, wait_random_exponential
+
+from app.core.cache import cache, CacheKey
+from .errors import CircuitOpenError, ErrorKind, classify_error, retry_after_of
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """
+    Decide se/quanto esperar antes de repetir um scrape:
+    - TRANSIENT: backoff exponencial com jitter
+    - THROTTLED: respeita Retry-After (desiste se for maior que `max_retry_after`)
+    - PERMANENT / CIRCUIT_OPEN: não repete
+    """
+
+    def __init__(self, base_delay: float = 0.5, max_delay: float = 10.0, max_retry_after: float = 15.0):
+        self.max_retry_after = max_retry_after
+        self._backoff = wait_random_exponential(multiplier=base_delay, max=max_delay)
+
+    def should_retry(self, exc: BaseException) -> bool:
+        kind = classify_error(exc)
+        if kind == ErrorKind.TRANSIENT:
+            return True
+        if kind == ErrorKind.THROTTLED:
+            retry_after = retry_after_of(exc)
+            return retry_after is None or retry_after <= self.max_retry_after
+        return False
+
+    def wait(self, retry_state: RetryCallState) -> float:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        if exc is not None and classify_error(exc) == ErrorKind.THROTTLED:
+            retry_after = retry_after_of(exc)
+            if retry_after is not None:
+                return retry_after
+        return self._backoff(retry_state)
+
+
+class BreakerConfig:
+    """Configuração do circuit breaker por host."""
+    FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "60"))
+    PROBE_TIMEOUT = float(os.getenv("CIRCUIT_PROBE_TIMEOUT", "30"))
+    STATE_TTL = 24 * 3600
+
+
+# Incrementa falhas e abre o circuito ao atingir o limite (ou se o probe falhou)
+_RECORD_FAILURE_SCRIPT = """
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state == 'half_open' or (state == 'closed' and failures >= tonumber(ARGV[1])) then
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', ARGV[2])
+    redis.call('HINCRBY', KEYS[1], 'trips', 1)
+    state = 'open'
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('SADD', KEYS[2], ARGV[4])
+return state
+"""
+
+_SET_STATE_SCRIPT = """
+redis.call('HSET', KEYS[1], 'state', ARGV[1])
+if ARGV[1] == 'closed' then
+    redis.call('HSET', KEYS[1], 'failures', 0)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return ARGV[1]
+"""
+
+
+def _closed_state() -> Dict[str, Any]:
+    return {"state": "closed", "failures": 0, "trips": 0, "opened_at": 0.0}
+
+
+class CircuitBreakerRegistry:
+    """
+    Estados: closed -> (N falhas transitórias/throttling) -> open -> (RESET_TIMEOUT)
+    -> half_open (um único probe por vez no cluster) -> closed | open.
+    Erros permanentes (404, parse) não contam: são da página, não do host.
+    """
+
+    def __init__(self):
+        self._local: Dict[str, Dict[str, Any]] = {}
+        self._local_probes: Dict[str, float] = {}
+
+    async def _load(self, host: str) -> Dict[str, Any]:
+        if not cache.is_connected:
+            return self._local.setdefault(host, _closed_state())
+        raw = await cache.hgetall(CacheKey.circuit(host))
+        state = _closed_state()
+        state.update({
+            "state": raw.get("state", "closed"),
+            "failures": int(raw.get("failures", 0)),
+            "trips": int(raw.get("trips", 0)),
+            "opened_at": float(raw.get("opened_at", 0)),
+        })
+        return state
+
+    async def _set_state(self, host: str, value: str):
+        if not cache.is_connected:
+            local = self._local.setdefault(host, _closed_state())
+            local["state"] = value
+            if value == "closed":
+                local["failures"] = 0
+            return
+        await cache.eval(_SET_STATE_SCRIPT, [CacheKey.circuit(host)], [value, BreakerConfig.STATE_TTL])
+
+    async def _acquire_probe(self, host: str) -> bool:
+        if not cache.is_connected:
+            now = time.monotonic()
+            if self._local_probes.get(host, 0) > now:
+                return False
+            self._local_probes[host] = now + BreakerConfig.PROBE_TIMEOUT
+            return True
+        return await cache.acquire_lock(
+            CacheKey.lock(CacheKey.circuit(host)), uuid.uuid4().hex, int(BreakerConfig.PROBE_TIMEOUT * 1000)
+        )
+
+    async def before_call(self, host: str) -> Dict[str, Any]:
+        """Libera a chamada ou levanta `CircuitOpenError`. Retorna o estado lido."""
+        state = await self._load(host)
+        if state["state"] == "closed":
+            return state
+
+        elapsed = time.time() - state["opened_at"]
+        if state["state"] == "open" and elapsed < BreakerConfig.RESET_TIMEOUT:
+            raise CircuitOpenError(host, BreakerConfig.RESET_TIMEOUT - elapsed)
+
+        # Janela de half-open: apenas um probe por vez testa o host
+        if await self._acquire_probe(host):
+            logger.info(f"Circuit breaker {host}: half-open, enviando probe")
+            await self._set_state(host, "half_open")
+            state["state"] = "half_open"
+            return state
+        raise CircuitOpenError(host, BreakerConfig.PROBE_TIMEOUT)
+
+    async def record_success(self, host: str, state: Dict[str, Any]):
+        if state["state"] != "closed" or state["failures"]:
+            if state["state"] != "closed":
+                logger.info(f"Circuit breaker {host}: fechado após probe bem-sucedido")
+            await self._set_state(host, "closed")
+            self._local_probes.pop(host, None)
+
+    async def record_failure(self, host: str, exc: BaseException):
+        if classify_error(exc) not in (ErrorKind.TRANSIENT, ErrorKind.THROTTLED):
+            return
+        now = time.time()
+        if cache.is_connected:
+            new_state = await cache.eval(
+                _RECORD_FAILURE_SCRIPT,
+                [CacheKey.circuit(host), CacheKey.circuit_hosts()],
+                [BreakerConfig.FAILURE_THRESHOLD, now, BreakerConfig.STATE_TTL, host],
+            )
+        else:
+            local = self._local.setdefault(host, _closed_state())
+            local["failures"] += 1
+            if local["state"] == "half_open" or (
+                local["state"] == "closed" and local["failures"] >= BreakerConfig.FAILURE_THRESHOLD
+            ):
+                local.update(state="open", opened_at=now, trips=local["trips"] + 1)
+            new_state = local["state"]
+        if new_state == "open":
+            logger.warning(f"Circuit breaker {host}: aberto ({exc})")
+
+    async def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Estado e número de disparos (trips) por host, para monitoramento."""
+        if not cache.is_connected:
+            return {host: dict(state) for host, state in self._local.items()}
+        hosts = sorted(await cache.smembers(CacheKey.circuit_hosts()))
+        return {host: await self._load(host) for host in hosts}
+
+
+# Singleton global
+circuit_breakers = CircuitBreakerRegistry()
@@ -1,33 +1,27 @@
-import httpx
-import json
-from bs4 import BeautifulSoup
+import re
 from .base import BaseScraper, ScraperError, ScraperRegistry
+from .head_extractor import JSON_LD
 from app.models.product import Product, ProductPrice, ProductMetadata, Marketplace, ProductImage
 
 @ScraperRegistry.register(Marketplace.SHEIN)
 class SheinScraper(BaseScraper):
     marketplace = Marketplace.SHEIN
+    required_fields = (JSON_LD,)
+    domains = ("shein.com", "shein.com.br")
+    short_link_hosts = ("shein.top", "onelink.shein.com")
+    # Nome-do-produto-p-<id>.html  (ou -p-<id>-cat-<cat>.html)  ou  ?goods_id=<id>
+    _id_patterns = (re.compile(r"-p-(\d+)(?:-cat-\d+)?\.html"), re.compile(r"[?&]goods_id=(\d+)"))
     
-    def validate_url(self, url: str) -> bool:
-        return "shein.com" in url.lower()
+    def extract_product_id(self, url: str) -> str:
+        for pattern in self._id_patterns:
+            match = pattern.search(url)
+            if match:
+                return match.group(1)
+        return super().extract_product_id(url)
 
     async def scrape(self, url: str) -> Product:
-        async with httpx.AsyncClient(timeout=self.request_timeout, headers=self.common_headers, follow_redirects=True) as client:
-            r = await client.get(url)
-            r.raise_for_status()
-        
-        soup = BeautifulSoup(r.text, "html.parser")
-        ld_json = soup.find("script", type="application/ld+json")
-        
-        data = {}
-        # Correção Pylance: Acessando o conteúdo de texto de forma segura
-        json_text = ld_json.get_text() if ld_json else None
-        
-        if json_text:
-            try:
-                js_data = json.loads(json_text)
-                data = js_data[0] if isinstance(js_data, list) else js_data
-            except: pass
+        page = await self.fetch_page(url)
+        data = page.first_json_ld()
 
         price_val = 0.0
         if isinstance(data.get("offers"), dict):
@@ -1,42 +1,67 @@
-import httpx
-from bs4 import BeautifulSoup
+import re
 from .base import BaseScraper, ScraperError, ScraperRegistry
+from .urls import strip_tracking_params, hostname
 from app.models.product import Product, ProductPrice, ProductMetadata, Marketplace, ProductImage
 
 @ScraperRegistry.register(Marketplace.SHOPEE)
 class ShopeeScraper(BaseScraper):
     marketplace = Marketplace.SHOPEE
+    domains = (
+        "shopee.com.br", "shopee.com", "shopee.com.mx", "shopee.com.co", "shopee.cl",
+        "shopee.com.my", "shopee.co.id", "shopee.co.th", "shopee.vn", "shopee.ph",
+        "shopee.sg", "shopee.tw",
+    )
+    short_link_hosts = ("s.shopee.com.br", "shope.ee", "shp.ee")
+    # O preço pode vir da meta tag ou do JSON-LD, ambos no <head>
+    required_fields = ("og:title",)
+    # Nome-do-produto-i.<shop>.<item>  ou  /product/<shop>/<item>
+    _id_patterns = (re.compile(r"-i\.(\d+)\.(\d+)"), re.compile(r"/product/(\d+)/(\d+)"))
     
-    def validate_url(self, url: str) -> bool:
-        return "shopee.com" in url.lower()
+    def _match_ids(self, url: str):
+        for pattern in self._id_patterns:
+            match = pattern.search(url)
+            if match:
+                return match.groups()
+        return None
+
+    def extract_product_id(self, url: str) -> str:
+        ids = self._match_ids(url)
+        return f"{ids[0]}.{ids[1]}" if ids else super().extract_product_id(url)
+
+    def canonicalize_url(self, url: str) -> str:
+        ids = self._match_ids(url)
+        if not ids:
+            return strip_tracking_params(url)
+        host = hostname(url).removeprefix("www.").removeprefix("m.")
+        return f"https://{host}/product/{ids[0]}/{ids[1]}"
 
     async def scrape(self, url: str) -> Product:
-        async with httpx.AsyncClient(timeout=self.request_timeout, headers=self.common_headers, follow_redirects=True) as client:
-            try:
-                r = await client.get(url)
-                r.raise_for_status()
-            except Exception as e:
-                raise ScraperError(f"Shopee Block: {e}")
-        
-        soup = BeautifulSoup(r.text, "html.parser")
+        try:
+            page = await self.fetch_page(url)
+        except Exception as e:
+            raise ScraperError(f"Shopee Block: {e}") from e
         
-        title_tag = soup.select_one("meta[property='og:title']")
-        name = str(title_tag.get("content", "Produto Shopee")) if title_tag else "Produto Shopee"
+        # Meta tags OpenGraph primeiro; JSON-LD (schema.org/Product) como complemento
+        ld = page.first_json_ld()
+        offers = ld.get("offers") if isinstance(ld.get("offers"), dict) else {}
+        name = str(page.get("og:title") or ld.get("name") or "Produto Shopee")
         
-        price_tag = soup.select_one("meta[property='product:price:amount']")
         try:
-            price_val = float(str(price_tag.get("content", "0"))) if price_tag else 0.0
+            price_val = float(str(page.get("product:price:amount") or offers.get("price") or "0"))
         except:
             price_val = 0.0
         
-        img_tag = soup.select_one("meta[property='og:image']")
-        img_url = str(img_tag.get("content", "")) if img_tag else ""
-        images = [ProductImage(url=img_url, is_primary=True, position=0)] if img_url else []
+        ld_images = ld.get("image") or []
+        if isinstance(ld_images, str):
+            ld_images = [ld_images]
+        img_urls = [u for u in [page.get("og:image")] + list(ld_images) if u]
+        img_urls = list(dict.fromkeys(str(u) for u in img_urls))
+        images = [ProductImage(url=u, is_primary=(i == 0), position=i) for i, u in enumerate(img_urls)]
 
         return Product(
             name=name,
-            description="",
-            price=ProductPrice(amount=price_val, currency="BRL"),
+            description=str(ld.get("description") or ""),
+            price=ProductPrice(amount=price_val, currency=str(offers.get("priceCurrency") or "BRL")),
             images=images,
             rating=0.0,         # Campo obrigatório
             review_count=0,     # Campo obrigatório
@@ -0,0 +1,42 @@
+"""
+Normalização de URLs de produto.
+Remove parâmetros de rastreamento para que a mesma página gere a mesma chave de cache.
+"""
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Parâmetros que não alteram o conteúdo da página
+TRACKING_PARAMS = {
+    "sp_atk", "xptdk", "spm", "scm", "pvid", "algo_pvid", "algo_exp_id", "btsid",
+    "ws_ab_test", "gatewayadapt", "aff_fcid", "aff_fsk", "aff_platform", "aff_trace_key",
+    "terminal_id", "afsmartredirect", "src_identifier", "src_module", "share_id",
+    "gclid", "gbraid", "wbraid", "fbclid", "msclkid", "ttclid", "yclid", "igshid",
+    "uls_trackid", "smtt", "publish_id", "d_id", "_branch_match_id",
+}
+TRACKING_PREFIXES = ("utm_", "aff_", "spm_", "mkt_", "_ga", "sp_")
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def strip_tracking_params(url: str) -> str:
+    """
+    Normaliza a URL: esquema/host em minúsculas, sem fragmento, sem parâmetros
+    de rastreamento e com a query restante ordenada.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme == "https" and parts.port == 443) and not (scheme == "http" and parts.port == 80):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(k)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def hostname(url: str) -> str:
+    return (urlsplit(url.strip()).hostname or "").lower()
@@ -1,24 +1,62 @@
-import httpx
 import os
+import hmac
+import hashlib
 import logging
 from typing import Any, Dict, Optional
+from app.core.http import http_clients
 
 logger = logging.getLogger(__name__)
 
+class DIDConfig:
+    """Configuração da integração com o D-ID."""
+    API_URL = os.getenv("DID_API_URL", "https://api.d-id.com")
+    # URL pública deste backend; com ela (e o segredo) o D-ID avisa por webhook
+    # quando o vídeo fica pronto. Sem ela, o orquestrador volta ao polling.
+    WEBHOOK_BASE_URL = os.getenv("DID_WEBHOOK_BASE_URL", "").rstrip("/")
+    WEBHOOK_SECRET = os.getenv("DID_WEBHOOK_SECRET", "")
+    # Intervalo entre consultas quando não há webhook (task na fila de I/O)
+    POLL_INTERVAL = int(os.getenv("DID_POLL_INTERVAL", "5"))
+    # Rede de segurança para webhooks perdidos
+    SWEEP_INTERVAL = float(os.getenv("DID_SWEEP_INTERVAL", "300"))
+    SWEEP_AFTER = int(os.getenv("DID_SWEEP_AFTER", "180"))
+    RENDER_TIMEOUT = int(os.getenv("DID_RENDER_TIMEOUT", "1800"))
+
+    @classmethod
+    def webhooks_enabled(cls) -> bool:
+        return bool(cls.WEBHOOK_BASE_URL and cls.WEBHOOK_SECRET)
+
 class DIDService:
+    # Status finais de um talk no D-ID
+    TERMINAL_STATUSES = ("done", "error", "rejected")
+
     def __init__(self):
         # D-ID requer a chave em formato Basic Auth. 
         # Geralmente é 'api_key:secret' ou apenas a chave codificada.
         self.api_key = os.getenv("DID_API_KEY", "")
-        self.url = "https://api.d-id.com/talks"
+        self.url = f"{DIDConfig.API_URL}/talks"
         self.headers = {
             "Authorization": f"Basic {self.api_key}",
             "Content-Type": "application/json",
             "accept": "application/json"
         }
 
-    async def create_talk(self, image_url: str, text: str) -> Dict[str, Any]:
-        """Solicita a criação de um vídeo de avatar falando."""
+    @staticmethod
+    def webhook_token(job_id: str) -> str:
+        """Token do callback de um job (HMAC do job_id; o D-ID não assina os webhooks)."""
+        return hmac.new(DIDConfig.WEBHOOK_SECRET.encode(), job_id.encode(), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def webhook_url(job_id: str) -> str:
+        return f"{DIDConfig.WEBHOOK_BASE_URL}/api/v2/webhooks/did/{job_id}?token={DIDService.webhook_token(job_id)}"
+
+    @staticmethod
+    def verify_webhook(job_id: str, token: str) -> bool:
+        if not DIDConfig.WEBHOOK_SECRET or not token:
+            return False
+        return hmac.compare_digest(DIDService.webhook_token(job_id), token)
+
+    async def create_talk(self, image_url: str, text: str, webhook_url: Optional[str] = None) -> Dict[str, Any]:
+        """Solicita a criação de um vídeo de avatar falando (opcionalmente com callback)."""
         if not self.api_key:
             raise ValueError("DID_API_KEY não configurada nas variáveis de ambiente.")
 
@@ -33,20 +71,23 @@ class DIDService:
             "config": {"fluent": "false", "pad_audio": "0.0"},
             "source_url": image_url
         }
+        if webhook_url:
+            payload["webhook"] = webhook_url
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(self.url, json=payload, headers=self.headers)
-            response.raise_for_status()
-            data = cast(Dict[str, Any], response.json())
-            logger.info(f"D-ID Talk criado com sucesso: {data.get('id')}")
-            return data
+        client = http_clients.get("did")
+        response = await client.post(self.url, json=payload, headers=self.headers, timeout=30.0)
+        response.raise_for_status()
+        data = cast(Dict[str, Any], response.json())
+        logger.info(f"D-ID Talk criado com sucesso: {data.get('id')}")
+        return data
 
     async def get_talk(self, talk_id: str) -> Dict[str, Any]:
         """Consulta o status e o resultado de um vídeo (Polling)."""
         url = f"{self.url}/{talk_id}"
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, headers=self.headers)
-            response.raise_for_status()
-            return cast(Dict[str, Any], response.json())
+        # Reaproveita a mesma conexão keep-alive durante todo o polling
+        client = http_clients.get("did")
+        response = await client.get(url, headers=self.headers, timeout=10.0)
+        response.raise_for_status()
+        return cast(Dict[str, Any], response.json())
 
 from typing import cast # Import necessário para o Pylance
\ No newline at end of file
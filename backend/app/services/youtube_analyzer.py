@@ -12,10 +12,14 @@ from app.models.youtube import (
     YouTubeAnalysis, Entity, TopicSegment, SentimentType,
     YouTubeAnalysisHistory, AnalysisResponse
 )
-from app.core.cache import cache
+from app.core.cache import cached, CacheConfig, CacheKey
 
 logger = logging.getLogger(__name__)
 
+def _analysis_key(video_id: Optional[str]) -> Optional[str]:
+    # URL inválida: sem chave, a chamada segue direto e levanta o erro
+    return CacheKey.yt_analysis(video_id) if video_id else None
+
 class YouTubeAnalyzer:
     def _extract_video_id(self, url: str) -> Optional[str]:
         """Extrai o ID do vídeo de várias formas de URL do YouTube"""
@@ -23,10 +27,18 @@ class YouTubeAnalyzer:
         match = re.search(pattern, url)
         return match.group(1) if match else None
 
+    @cached(
+        key=lambda self, url, force_reanalysis=False: _analysis_key(self._extract_video_id(url)),
+        model=YouTubeAnalysis,
+        ttl=CacheConfig.ANALYSIS_TTL,
+        soft_ttl=CacheConfig.ANALYSIS_SOFT_TTL,
+        bypass="force_reanalysis",
+        name="youtube_analysis",
+    )
     async def analyze(self, url: str, force_reanalysis: bool = False) -> YouTubeAnalysis:
         """
-        Analisa o vídeo. 
-        Note: Adicionei force_reanalysis aqui para bater com o que o Front pode enviar futuramente.
+        Analisa o vídeo (com cache por video_id; `force_reanalysis` ignora o cache).
+        Análises stale continuam sendo servidas enquanto uma nova roda em background.
         """
         start_time = time.time()
         video_id = self._extract_video_id(url)
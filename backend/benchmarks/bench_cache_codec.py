@@ -0,0 +1,164 @@
+"""
+Benchmark dos codecs do cache (app/core/cache.py).
+
+Compara o formato antigo (`model.json()` / `parse_raw`) com os codecs do
+envelope versionado (msgpack e JSON, com e sem zlib) em payloads realistas:
+produtos extraídos dos fixtures gravados (com `raw_data` do JSON-LD) e
+análises de YouTube com transcrição de ~10 minutos de fala.
+
+Reporta bytes por entrada, tempo de encode/decode e, com `--redis`, a memória
+ocupada no Redis (`MEMORY USAGE`) por entrada.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_cache_codec [--iterations 2000] [--redis redis://localhost:6379/15]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+import httpx
+from redis.asyncio import from_url
+
+from app.core import cache as cache_module
+from app.core.http import http_clients
+from app.models.product import Product
+from app.models.youtube import Entity, SentimentType, TopicSegment, YouTubeAnalysis
+from app.services.scrapers.base import ScraperRegistry
+from benchmarks.bench_scrapers import FIXTURES, PAGES
+
+WORDS = (
+    "produto qualidade entrega preço vale pena comprei chegou rápido tecido bonito "
+    "tamanho certo recomendo loja frete grátis cupom desconto bateria câmera tela "
+    "som potente acabamento caixa original garantia defeito troca devolução muito "
+    "bom ótimo ruim mais menos então gente hoje vídeo link descrição canal inscreva"
+).split()
+
+
+async def sample_products() -> List[Product]:
+    """Roda os scrapers sobre os fixtures (sem rede) e anexa o JSON-LD como `raw_data`."""
+    ScraperRegistry.bootstrap()
+    products = []
+    for marketplace, (fixture, path) in PAGES.items():
+        html = (FIXTURES / fixture).read_bytes()
+        transport = httpx.MockTransport(
+            lambda request, html=html: httpx.Response(200, content=html, headers={"Content-Type": "text/html"})
+        )
+        http_clients.get = lambda name="default", transport=transport: httpx.AsyncClient(transport=transport)
+        scraper = ScraperRegistry._instances[marketplace]
+        host = next(iter(scraper.domains), "loja.example.com")
+        url = f"https://{host}{path}"
+        page = await scraper.fetch_page(url)
+        product = await scraper.scrape(url)
+        product.raw_data = {"meta": page.meta, "json_ld": page.json_ld}
+        products.append(product)
+    return products
+
+
+def sample_analysis(seed: int = 7) -> YouTubeAnalysis:
+    rng = random.Random(seed)
+    transcript = " ".join(rng.choice(WORDS) for _ in range(1500))
+    return YouTubeAnalysis(
+        video_id="dQw4w9WgXcQ",
+        video_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        video_title="Review completo: vale a pena?",
+        channel_name="Canal de Reviews",
+        overall_sentiment=SentimentType.POSITIVE,
+        sentiment_score=0.62,
+        confidence=0.87,
+        entities=[Entity(text=w, entity_type="PRODUCT", confidence=0.8) for w in WORDS[:12]],
+        brands_mentioned=["Xiaomi", "Samsung", "Apple"],
+        products_mentioned=["Redmi Note 13", "Galaxy A55"],
+        topics=[
+            TopicSegment(topic=w, sentiment=SentimentType.NEUTRAL, timestamps=[i * 30, i * 30 + 12], confidence=0.7)
+            for i, w in enumerate(WORDS[:10])
+        ],
+        transcript=transcript,
+        positive_aspects=["bateria", "tela"],
+        negative_aspects=["câmera noturna"],
+        recommendations=["Destacar a bateria no anúncio"],
+    )
+
+
+def timed(fn: Callable[[], Any], iterations: int) -> float:
+    """Mediana de 5 rodadas, em microssegundos por chamada."""
+    rounds = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        rounds.append((time.perf_counter() - start) / iterations * 1e6)
+    return round(statistics.median(rounds), 2)
+
+
+def formats(compress_min: int) -> Dict[str, Dict[str, Callable]]:
+    def envelope(codec: str, threshold: int):
+        def encode(value):
+            cache_module.CacheConfig.COMPRESS_MIN_BYTES = threshold
+            return cache_module.encode_value(value, codec=codec)
+        return {"encode": encode, "decode": cache_module.decode_value}
+
+    never = 1 << 62
+    return {
+        "legacy_json": {"encode": lambda v: v.json().encode(), "decode": lambda d, m: m.parse_raw(d)},
+        "json": envelope("json", never),
+        "json_zlib": envelope("json", compress_min),
+        "msgpack": envelope("msgpack", never),
+        "msgpack_zlib": envelope("msgpack", compress_min),
+    }
+
+
+async def redis_memory(url: str, payloads: Dict[str, bytes]) -> Dict[str, int]:
+    client = await from_url(url, decode_responses=False)
+    try:
+        result = {}
+        for name, data in payloads.items():
+            key = f"bench:codec:{name}"
+            await client.set(key, data)
+            result[name] = await client.memory_usage(key)
+            await client.delete(key)
+        return result
+    finally:
+        await client.close()
+
+
+async def main(args) -> Dict[str, Any]:
+    samples: Dict[str, Any] = {f"product_{p.metadata.marketplace.value}": p for p in await sample_products()}
+    samples["youtube_analysis"] = sample_analysis()
+
+    original_threshold = cache_module.CacheConfig.COMPRESS_MIN_BYTES
+    report: Dict[str, Any] = {"iterations": args.iterations, "compress_min_bytes": args.compress_min, "payloads": {}}
+    try:
+        for name, value in samples.items():
+            model = type(value)
+            rows = {}
+            encoded_by_format = {}
+            for fmt, fns in formats(args.compress_min).items():
+                data = fns["encode"](value)
+                decoded = fns["decode"](data, model)
+                assert decoded == value, f"{fmt} não preserva {name}"
+                encoded_by_format[fmt] = data
+                rows[fmt] = {
+                    "bytes": len(data),
+                    "encode_us": timed(lambda: fns["encode"](value), args.iterations),
+                    "decode_us": timed(lambda: fns["decode"](data, model), args.iterations),
+                }
+            if args.redis:
+                for fmt, used in (await redis_memory(args.redis, encoded_by_format)).items():
+                    rows[fmt]["redis_memory_bytes"] = used
+            report["payloads"][name] = rows
+    finally:
+        cache_module.CacheConfig.COMPRESS_MIN_BYTES = original_threshold
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--compress-min", type=int, default=cache_module.CacheConfig.COMPRESS_MIN_BYTES)
+    parser.add_argument("--redis", help="URL de um Redis descartável para medir MEMORY USAGE")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args)), indent=2))
@@ -0,0 +1,103 @@
+"""
+Benchmark: parse completo com BeautifulSoup vs. extrator incremental do <head>.
+
+Mede tempo de parse, bytes consumidos e pico de RSS (cada caso roda em um
+subprocesso para que o ru_maxrss de um não contamine o outro).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_html_extract --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import pathlib
+import resource
+import subprocess
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from app.services.scrapers.head_extractor import extract_from_stream
+
+FIXTURE = pathlib.Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "shopee_sample.html"
+CHUNK_SIZE = 16 * 1024
+PAGES = {"fixture": 0, "synthetic_1mb": 1024 * 1024, "synthetic_3mb": 3 * 1024 * 1024}
+
+
+def build_page(size: int) -> bytes:
+    html = FIXTURE.read_bytes()
+    if not size:
+        return html
+    # Corpo típico de marketplace: muitos blocos de markup e scripts inline
+    block = (
+        b'<div class="item"><a href="/p/123"><img src="https://cdn.example.com/i.jpg" alt="x"/>'
+        b'<span class="price">R$ 49,90</span></a><script>window.__x={"a":[1,2,3]}</script></div>\n'
+    )
+    body = block * (size // len(block))
+    return html.replace(b"<body>", b"<body>" + body)
+
+
+def legacy_parse(page: bytes) -> dict:
+    soup = BeautifulSoup(page.decode("utf-8"), "html.parser")
+    out = {}
+    for prop in ("og:title", "og:image", "product:price:amount"):
+        tag = soup.select_one(f"meta[property='{prop}']")
+        out[prop] = tag.get("content") if tag else None
+    ld = soup.find("script", type="application/ld+json")
+    out["ld"] = json.loads(ld.get_text()) if ld else None
+    return out
+
+
+async def _chunks(page: bytes):
+    for i in range(0, len(page), CHUNK_SIZE):
+        yield page[i:i + CHUNK_SIZE]
+
+
+def head_parse(page: bytes) -> dict:
+    result = asyncio.run(extract_from_stream(_chunks(page), required=("og:title",)))
+    return {"bytes_read": result.bytes_read, "full_parse": result.full_parse}
+
+
+def worker(mode: str, page_name: str, repeat: int) -> dict:
+    page = build_page(PAGES[page_name])
+    fn = legacy_parse if mode == "legacy" else head_parse
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn(page)
+    elapsed = (time.perf_counter() - start) / repeat
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mode": mode,
+        "page": page_name,
+        "page_bytes": len(page),
+        "parse_ms": round(elapsed * 1000, 3),
+        "peak_rss_delta_kb": peak_rss - base_rss,
+        "bytes_read": out.get("bytes_read", len(page)),
+    }
+
+
+def main(repeat: int):
+    results = []
+    for page_name in PAGES:
+        for mode in ("legacy", "head"):
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_html_extract",
+                 "--worker", mode, "--page", page_name, "--repeat", str(repeat)],
+                capture_output=True, text=True, check=True,
+            )
+            results.append(json.loads(proc.stdout))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--worker", choices=["legacy", "head"])
+    parser.add_argument("--page", choices=list(PAGES))
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.page, args.repeat)))
+    else:
+        main(args.repeat)
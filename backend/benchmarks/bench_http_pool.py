@@ -0,0 +1,72 @@
+"""
+Benchmark: cliente httpx novo por requisição vs. pool compartilhado (`http_clients`).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_http_pool --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.core.http import http_clients
+from benchmarks.stub_server import StubServer
+
+PAGE = b"<html><head><meta property='og:title' content='Produto'></head><body></body></html>"
+
+
+async def _per_request_client(url: str):
+    # Comportamento antigo: um AsyncClient (e uma conexão TCP) por chamada
+    async with httpx.AsyncClient(timeout=30) as client:
+        r = await client.get(url)
+        r.raise_for_status()
+
+
+async def _shared_client(url: str):
+    r = await http_clients.get("scrapers").get(url)
+    r.raise_for_status()
+
+
+async def _run(fn, url: str, total: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            await fn(url)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(total: int, concurrency: int):
+    with StubServer({"/product": (200, "text/html", PAGE)}) as srv:
+        url = srv.url("/product")
+
+        before_conns = srv.connections
+        before = await _run(_per_request_client, url, total, concurrency)
+        before_conns = srv.connections - before_conns
+
+        await http_clients.start()
+        after_conns = srv.connections
+        after = await _run(_shared_client, url, total, concurrency)
+        after_conns = srv.connections - after_conns
+        await http_clients.close()
+
+    print(json.dumps({
+        "requests": total,
+        "concurrency": concurrency,
+        "before": {"rps": round(before, 1), "tcp_connections": before_conns},
+        "after": {"rps": round(after, 1), "tcp_connections": after_conns},
+        "speedup": round(after / before, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,62 @@
+"""
+Tempo até o primeiro token do roteiro: completion inteira (`generate_ad_script`)
+contra o stream (`stream_ad_script`), ambos contra o Groq local
+(benchmarks/groq_stub.py) e com o cache do LLM desligado.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_llm_stream [--token-ms 30] [--iterations 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List
+
+from app.services.llm_cache import LLMCacheConfig
+from benchmarks.groq_stub import FakeGroq
+
+PRODUCT = {"name": "Fone Bluetooth", "price": "BRL 199.9", "highlights": ["bateria", "som"]}
+
+
+async def run(iterations: int) -> Dict[str, Any]:
+    from app.services.llm_service import LLMService
+
+    llm = LLMService()
+    blocking: List[float] = []
+    first_token: List[float] = []
+    streamed: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await llm.generate_ad_script(PRODUCT, "fomo")
+        blocking.append((time.perf_counter() - start) * 1000)
+
+        start, first = time.perf_counter(), None
+        async for _ in llm.stream_ad_script(PRODUCT, "fomo"):
+            if first is None:
+                first = (time.perf_counter() - start) * 1000
+        first_token.append(first or 0.0)
+        streamed.append((time.perf_counter() - start) * 1000)
+    await llm.client.close()
+    return {
+        "full_completion_first_text_ms": round(statistics.median(blocking), 1),
+        "stream_first_token_ms": round(statistics.median(first_token), 1),
+        "stream_total_ms": round(statistics.median(streamed), 1),
+    }
+
+
+def main(args) -> Dict[str, Any]:
+    LLMCacheConfig.ENABLED = False
+    with FakeGroq(token_interval=args.token_ms / 1000) as groq:
+        os.environ["GROQ_BASE_URL"] = groq.url()
+        os.environ.setdefault("GROQ_API_KEY", "bench")
+        report = asyncio.run(run(args.iterations))
+    return {"tokens": len(groq.tokens), "token_ms": args.token_ms, **report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--token-ms", type=float, default=30)
+    parser.add_argument("--iterations", type=int, default=5)
+    print(json.dumps(main(parser.parse_args()), indent=2))
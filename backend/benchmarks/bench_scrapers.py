@@ -0,0 +1,237 @@
+"""
+Benchmark offline da camada de scraping.
+
+Serve páginas gravadas (tests/fixtures/*_sample.html) por um servidor HTTP
+local com latência e tamanho configuráveis e executa cada scraper registrado
+de ponta a ponta (fetch -> extração -> validação do `Product`).
+
+Reporta, por scraper e nível de concorrência: latência p50/p99, throughput,
+tempo de CPU em parsing vs. validação do `Product` e pico de memória.
+A saída é JSON; com `--baseline` compara com um resultado anterior e sai
+com código 1 se algum p50/p99/throughput regredir além de `--max-regression`.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_scrapers --requests 200 --concurrency 1 8 32 \\
+        --latency-ms 20 --page-kb 512 --output bench_scrapers.json
+    python -m benchmarks.bench_scrapers --baseline bench_scrapers.json
+"""
+import argparse
+import asyncio
+import json
+import pathlib
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from app.core.http import http_clients
+from app.models.product import Marketplace, Product
+from app.services.scrapers import head_extractor
+from app.services.scrapers.base import ScraperRegistry
+from benchmarks.stub_server import StubServer
+
+FIXTURES = pathlib.Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+# Marketplace -> (fixture, caminho no servidor local)
+PAGES = {
+    Marketplace.SHOPEE: ("shopee_sample.html", "/Sample-Shopee-Product-i.123.456"),
+    Marketplace.ALIEXPRESS: ("aliexpress_sample.html", "/item/1005001234567890.html"),
+    Marketplace.SHEIN: ("shein_sample.html", "/Vestido-Midi-Floral-p-12345678.html"),
+    Marketplace.CUSTOM: ("generic_sample.html", "/produto/cafeteira"),
+}
+
+PADDING_BLOCK = (
+    b'<div class="rec"><a href="/p/1"><img src="https://cdn.example.com/i.jpg"/>'
+    b'<span>R$ 49,90</span></a><script>window.__s={"a":[1,2,3]}</script></div>\n'
+)
+
+
+def build_page(fixture: str, page_kb: int) -> bytes:
+    html = (FIXTURES / fixture).read_bytes()
+    missing = page_kb * 1024 - len(html)
+    if missing <= 0:
+        return html
+    return html.replace(b"</body>", PADDING_BLOCK * (missing // len(PADDING_BLOCK)) + b"</body>")
+
+
+class CpuProfile:
+    """Acumula tempo de CPU (da thread do event loop) em parsing e em validação."""
+
+    def __init__(self):
+        self.parse = 0.0
+        self.validate = 0.0
+
+    def _timed(self, fn, attr: str):
+        def wrapper(*args, **kwargs):
+            start = time.thread_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                setattr(self, attr, getattr(self, attr) + time.thread_time() - start)
+        return wrapper
+
+    def install(self):
+        self._originals = (
+            head_extractor.HeadExtractor.feed,
+            head_extractor.HeadExtractor.close,
+            head_extractor.extract_full,
+            Product.__init__,
+        )
+        feed, close, full, init = self._originals
+        head_extractor.HeadExtractor.feed = self._timed(feed, "parse")
+        head_extractor.HeadExtractor.close = self._timed(close, "parse")
+        head_extractor.extract_full = self._timed(full, "parse")
+        Product.__init__ = self._timed(init, "validate")
+
+    def uninstall(self):
+        feed, close, full, init = self._originals
+        head_extractor.HeadExtractor.feed = feed
+        head_extractor.HeadExtractor.close = close
+        head_extractor.extract_full = full
+        Product.__init__ = init
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_level(scraper, url: str, total: int, concurrency: int) -> Dict[str, Any]:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            try:
+                await scraper.scrape(url)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    profile = CpuProfile()
+    profile.install()
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one() for _ in range(total)))
+    finally:
+        profile.uninstall()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else None,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "cpu_parse_ms_per_req": round(profile.parse / total * 1000, 4),
+        "cpu_validate_ms_per_req": round(profile.validate / total * 1000, 4),
+    }
+
+
+async def peak_memory(scraper, url: str, total: int, concurrency: int) -> int:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            try:
+                await scraper.scrape(url)
+            except Exception:
+                pass
+
+    tracemalloc.start()
+    await asyncio.gather(*(one() for _ in range(total)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+async def main(args) -> Dict[str, Any]:
+    ScraperRegistry.bootstrap()
+    routes = {
+        path: (200, "text/html; charset=utf-8", build_page(fixture, args.page_kb))
+        for fixture, path in PAGES.values()
+    }
+    report: Dict[str, Any] = {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms,
+            "page_kb": args.page_kb,
+            "python": sys.version.split()[0],
+        },
+        "scrapers": {},
+    }
+
+    with StubServer(routes, latency=args.latency_ms / 1000) as srv:
+        await http_clients.start()
+        try:
+            for marketplace, (_, path) in PAGES.items():
+                scraper = ScraperRegistry._instances.get(marketplace)
+                if scraper is None:
+                    continue
+                url = srv.url(path)
+                await scraper.scrape(url)  # aquecimento (conexões do pool)
+                levels = [await run_level(scraper, url, args.requests, c) for c in args.concurrency]
+                peak = await peak_memory(scraper, url, min(args.requests, 50), max(args.concurrency))
+                report["scrapers"][marketplace.value] = {
+                    "levels": levels,
+                    "peak_traced_memory_kb": round(peak / 1024, 1),
+                }
+        finally:
+            await http_clients.close()
+
+    report["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return report
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Lista regressões de p50/p99 (maior é pior) e throughput (menor é pior)."""
+    problems = []
+    for name, data in current["scrapers"].items():
+        base = baseline.get("scrapers", {}).get(name)
+        if not base:
+            continue
+        base_levels = {lvl["concurrency"]: lvl for lvl in base["levels"]}
+        for lvl in data["levels"]:
+            ref = base_levels.get(lvl["concurrency"])
+            if not ref:
+                continue
+            for metric in ("p50_ms", "p99_ms"):
+                if ref[metric] and lvl[metric] and lvl[metric] > ref[metric] * (1 + max_regression):
+                    problems.append(f"{name} c={lvl['concurrency']} {metric}: {ref[metric]} -> {lvl[metric]}")
+            if ref["throughput_rps"] and lvl["throughput_rps"] < ref["throughput_rps"] * (1 - max_regression):
+                problems.append(
+                    f"{name} c={lvl['concurrency']} throughput_rps: {ref['throughput_rps']} -> {lvl['throughput_rps']}"
+                )
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--page-kb", type=int, default=512)
+    parser.add_argument("--output", help="grava o relatório JSON neste arquivo")
+    parser.add_argument("--baseline", help="relatório anterior para detectar regressões")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        pathlib.Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        regressions = compare(report, json.loads(pathlib.Path(args.baseline).read_text()), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSÃO: {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
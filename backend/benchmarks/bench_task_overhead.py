@@ -0,0 +1,72 @@
+"""
+Overhead por task do Celery: `asyncio.run` por task (loop e conexões novos a
+cada execução) contra o loop persistente do worker (app/core/worker_loop.py).
+
+A "task" faz o mínimo de trabalho real de um job: um GET no Redis e um
+find_one no Mongo. Precisa de Redis e Mongo locais (REDIS_URL / MONGO_URI).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_task_overhead [--iterations 200]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from app.core.cache import cache
+from app.core.http import http_clients
+from app.core.worker_loop import WorkerLoop
+from app.db.db import db_wrapper
+
+
+async def task_body():
+    await cache.get("bench:task_overhead")
+    await db_wrapper.database["jobs"].find_one({"_id": "bench"})
+
+
+async def per_task_loop():
+    # Comportamento anterior: cada task abre e fecha tudo
+    await cache.connect()
+    await http_clients.start()
+    await db_wrapper.connect()
+    try:
+        await task_body()
+    finally:
+        await db_wrapper.close()
+        await http_clients.close()
+        await cache.disconnect()
+
+
+def measure(run: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+
+def main(args) -> Dict[str, Any]:
+    report: Dict[str, Any] = {"iterations": args.iterations}
+    report["asyncio_run_per_task"] = measure(lambda: asyncio.run(per_task_loop()), args.iterations)
+
+    loop = WorkerLoop()
+    loop.start()
+    try:
+        report["persistent_worker_loop"] = measure(lambda: loop.run(task_body(), db=True), args.iterations)
+    finally:
+        loop.stop()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    print(json.dumps(main(parser.parse_args()), indent=2))
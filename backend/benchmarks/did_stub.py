@@ -0,0 +1,89 @@
+"""
+Substituto local da API de talks do D-ID, para testes e desenvolvimento offline.
+
+- POST /talks cria um talk e agenda a conclusão após `render_time` segundos;
+  se o payload trouxer `webhook`, o resultado é enviado para ele por POST.
+- GET /talks/{id} devolve o estado atual (polling / sweeper).
+
+Uso (a partir de backend/):
+    python -m benchmarks.did_stub --port 8099 --render-time 5
+    DID_API_URL=http://127.0.0.1:8099 DID_API_KEY=x uvicorn main:app
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import httpx
+
+from benchmarks.stub_server import Route, StubServer
+
+
+class FakeDID:
+    def __init__(self, render_time: float = 0.1, fail: bool = False, deliver_webhooks: bool = True, port: int = 0):
+        self.render_time = render_time
+        self.fail = fail
+        # Desligado, simula webhooks perdidos (só o polling enxerga o resultado)
+        self.deliver_webhooks = deliver_webhooks
+        self.talks: Dict[str, Dict[str, Any]] = {}
+        self.deliveries: list = []
+        self._lock = threading.Lock()
+        self.server = StubServer(handler=self.handle, port=port)
+
+    def url(self, path: str = "") -> str:
+        return self.server.url(path).rstrip("/")
+
+    @staticmethod
+    def _json(status: int, data: Any) -> Route:
+        return status, "application/json", json.dumps(data).encode()
+
+    def handle(self, method: str, path: str, body: bytes) -> Route:
+        path = path.split("?")[0].rstrip("/")
+        if method == "POST" and path == "/talks":
+            payload = json.loads(body or b"{}")
+            talk_id = f"tlk_{uuid.uuid4().hex[:12]}"
+            with self._lock:
+                self.talks[talk_id] = {"id": talk_id, "status": "created", "source_url": payload.get("source_url")}
+            threading.Timer(self.render_time, self._finish, (talk_id, payload.get("webhook"))).start()
+            return self._json(201, {"id": talk_id, "status": "created"})
+        if method == "GET" and path.startswith("/talks/"):
+            talk = self.talks.get(path.rsplit("/", 1)[1])
+            return self._json(200, talk) if talk else self._json(404, {"kind": "NotFoundError"})
+        return self._json(404, {"kind": "NotFoundError"})
+
+    def _finish(self, talk_id: str, webhook: Optional[str]):
+        with self._lock:
+            talk = self.talks[talk_id]
+            if self.fail:
+                talk.update(status="error", error={"kind": "FaceError", "description": "Rosto não detectado"})
+            else:
+                talk.update(status="done", result_url=f"https://d-id.example/{talk_id}.mp4")
+            talk = dict(talk)
+        if webhook and self.deliver_webhooks:
+            try:
+                response = httpx.post(webhook, json=talk, timeout=5.0)
+                self.deliveries.append((webhook, response.status_code))
+            except httpx.HTTPError as e:
+                self.deliveries.append((webhook, str(e)))
+
+    def __enter__(self) -> "FakeDID":
+        self.server.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--render-time", type=float, default=5.0)
+    parser.add_argument("--fail", action="store_true")
+    args = parser.parse_args()
+    fake = FakeDID(render_time=args.render_time, fail=args.fail, port=args.port)
+    with fake:
+        print(f"D-ID local em {fake.url()}")
+        while True:
+            time.sleep(3600)
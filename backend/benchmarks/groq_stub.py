@@ -0,0 +1,100 @@
+"""
+Substituto local da API de chat completions do Groq, para testes e desenvolvimento offline.
+
+- POST /openai/v1/chat/completions devolve `script` como resposta, gerado a
+  um token a cada `token_interval` segundos: sem stream, o JSON só termina de
+  chegar depois de todos; com `"stream": true`, em Server-Sent Events, um
+  token por pedaço (o uso de tokens vem no último, em `x_groq`).
+
+Uso (a partir de backend/):
+    python -m benchmarks.groq_stub --port 8098 --token-interval 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8098 GROQ_API_KEY=x uvicorn main:app
+"""
+import argparse
+import json
+import re
+import time
+from typing import Any, Dict, List
+
+from benchmarks.stub_server import Route, StubServer
+
+DEFAULT_SCRIPT = (
+    "Chegou o fone que todo mundo está comentando! Bateria para o dia inteiro, "
+    "som limpo e cancelamento de ruído. Garanta o seu antes que acabe!"
+)
+
+
+class FakeGroq:
+    def __init__(self, script: str = DEFAULT_SCRIPT, token_interval: float = 0.01, port: int = 0):
+        self.script = script
+        self.requests: List[Dict[str, Any]] = []
+        self.server = StubServer(handler=self.handle, port=port, chunk_interval=token_interval)
+
+    def url(self) -> str:
+        return self.server.url("").rstrip("/")
+
+    @property
+    def tokens(self) -> List[str]:
+        # Palavras com o espaço que as precede, como os deltas de um LLM
+        return re.findall(r"\s*\S+", self.script)
+
+    def _usage(self) -> Dict[str, int]:
+        completion = len(self.tokens)
+        return {"prompt_tokens": 20, "completion_tokens": completion, "total_tokens": 20 + completion}
+
+    def handle(self, method: str, path: str, body: bytes) -> Route:
+        if method != "POST" or path.split("?")[0] != "/openai/v1/chat/completions":
+            return 404, "application/json", b'{"error": {"message": "not found"}}'
+        payload = json.loads(body or b"{}")
+        self.requests.append(payload)
+        base = {"id": "chatcmpl-local", "created": int(time.time()), "model": payload.get("model", "")}
+
+        if not payload.get("stream"):
+            completion = {
+                **base,
+                "object": "chat.completion",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self.script},
+                    "finish_reason": "stop",
+                }],
+                "usage": self._usage(),
+            }
+            # Em pedaços, para a resposta levar o mesmo tempo de geração do stream
+            body = json.dumps(completion).encode()
+            size = -(-len(body) // len(self.tokens or [""]))
+            return 200, "application/json", [body[i:i + size] for i in range(0, len(body), size)]
+
+        def event(delta: Dict[str, Any], finish: Any = None, **extra: Any) -> bytes:
+            chunk = {
+                **base,
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                **extra,
+            }
+            return f"data: {json.dumps(chunk)}\n\n".encode()
+
+        chunks = [event({"role": "assistant", "content": ""})]
+        chunks += [event({"content": token}) for token in self.tokens]
+        chunks.append(event({}, "stop", x_groq={"id": "req_local", "usage": self._usage()}))
+        chunks.append(b"data: [DONE]\n\n")
+        return 200, "text/event-stream", chunks
+
+    def __enter__(self) -> "FakeGroq":
+        self.server.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--token-interval", type=float, default=0.05)
+    args = parser.parse_args()
+    fake = FakeGroq(token_interval=args.token_interval, port=args.port)
+    with fake:
+        print(f"Groq local em {fake.url()}")
+        while True:
+            time.sleep(3600)
@@ -0,0 +1,103 @@
+"""
+Replay de um log de URLs para comparar a taxa de acerto do cache de produtos
+com a chave antiga (MD5 da URL crua) e com a chave canônica (ID real do marketplace).
+
+Formato do log: uma URL por linha, opcionalmente precedida de um timestamp
+unix (`1718000000 https://...`). Com timestamps, entradas expiram após `--ttl`.
+
+Uso (a partir de backend/):
+    python -m benchmarks.replay_cache_keys urls.log [--ttl 7200] [--resolve]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from app.core.cache import CacheConfig
+from app.core.http import http_clients
+from app.services.product_service import ProductScraperService
+from app.services.scrapers.base import ScraperRegistry
+
+
+def parse_log(path: str) -> List[Tuple[Optional[float], str]]:
+    entries = []
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if len(parts) > 1:
+                entries.append((float(parts[0]), parts[1]))
+            else:
+                entries.append((None, parts[0]))
+    return entries
+
+
+def legacy_key(url: str) -> Optional[str]:
+    scraper = ScraperRegistry.get_scraper_for_url(url)
+    if not scraper:
+        return None
+    return f"product:{scraper.marketplace.value}:{hashlib.md5(url.encode()).hexdigest()[:12]}"
+
+
+async def canonical_key(url: str, resolve: bool) -> Optional[str]:
+    scraper = ScraperRegistry.get_scraper_for_url(url)
+    if not scraper:
+        return None
+    if resolve:
+        return (await ProductScraperService.resolve(url))[2]
+    return f"product:{scraper.marketplace.value}:{scraper.extract_product_id(scraper.canonicalize_url(url))}"
+
+
+def simulate(entries: List[Tuple[Optional[float], Optional[str]]], ttl: int) -> Dict[str, float]:
+    expires: Dict[str, float] = {}
+    hits = misses = 0
+    for ts, key in entries:
+        if key is None:
+            continue
+        now = ts if ts is not None else 0.0
+        if key in expires and (ts is None or expires[key] > now):
+            hits += 1
+        else:
+            misses += 1
+            expires[key] = now + ttl
+    total = hits + misses
+    return {
+        "requests": total,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+        "distinct_keys": len({k for _, k in entries if k is not None}),
+    }
+
+
+async def main(path: str, ttl: int, resolve: bool):
+    entries = parse_log(path)
+    await http_clients.start()
+    try:
+        canonical = [(ts, await canonical_key(url, resolve)) for ts, url in entries]
+    finally:
+        await http_clients.close()
+    legacy = [(ts, legacy_key(url)) for ts, url in entries]
+
+    before, after = simulate(legacy, ttl), simulate(canonical, ttl)
+    marketplaces = Counter(k.split(":")[1] for _, k in canonical if k)
+    print(json.dumps({
+        "log": path,
+        "ttl": ttl,
+        "legacy": before,
+        "canonical": after,
+        "hit_rate_gain": round(after["hit_rate"] - before["hit_rate"], 4),
+        "by_marketplace": dict(marketplaces),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("log")
+    parser.add_argument("--ttl", type=int, default=CacheConfig.PRODUCT_TTL)
+    parser.add_argument("--resolve", action="store_true", help="resolve links curtos via rede")
+    args = parser.parse_args()
+    asyncio.run(main(args.log, args.ttl, args.resolve))
@@ -0,0 +1,138 @@
+"""
+Servidor HTTP/1.1 local (keep-alive) para benchmarks offline.
+Roda em uma thread própria com event loop dedicado.
+"""
+import asyncio
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+# (status, content_type, body); uma lista de pedaços sai com Transfer-Encoding: chunked
+Route = Tuple[int, str, Union[bytes, List[bytes]]]
+
+
+class StubServer:
+    """
+    Serve respostas fixas por caminho, com latência e tamanho configuráveis.
+
+    Uso:
+        with StubServer({"/p": (200, "text/html", b"...")}, latency=0.01) as srv:
+            httpx.get(srv.url("/p"))
+    """
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, Route]] = None,
+        latency: float = 0.0,
+        handler: Optional[Callable[[str, str, bytes], Route]] = None,
+        port: int = 0,
+        chunk_interval: float = 0.0,
+    ):
+        self.routes = routes or {}
+        self.latency = latency
+        # Pausa entre os pedaços de respostas chunked (ex: tokens de um stream)
+        self.chunk_interval = chunk_interval
+        self.handler = handler
+        self.port = port
+        self.connections = 0
+        self._clients: Set[Tuple[asyncio.Task, asyncio.StreamWriter]] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def url(self, path: str = "/") -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def _resolve(self, method: str, path: str, body: bytes) -> Route:
+        if self.handler is not None:
+            return self.handler(method, path, body)
+        return self.routes.get(path.split("?")[0], (404, "text/plain", b"not found"))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        client = (asyncio.current_task(), writer)
+        self._clients.add(client)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, path, _ = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                length = int(headers.get("content-length", "0"))
+                body = await reader.readexactly(length) if length else b""
+
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, content_type, payload = self._resolve(method, path, body)
+                if isinstance(payload, list):
+                    await self._write_chunked(writer, status, content_type, payload)
+                    continue
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    "Connection: keep-alive\r\n\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.discard(client)
+            writer.close()
+
+    async def _write_chunked(self, writer: asyncio.StreamWriter, status: int, content_type: str, chunks: List[bytes]):
+        writer.write(
+            f"HTTP/1.1 {status} X\r\n"
+            f"Content-Type: {content_type}\r\n"
+            "Transfer-Encoding: chunked\r\n"
+            "Connection: keep-alive\r\n\r\n".encode("latin-1")
+        )
+        for i, chunk in enumerate(chunks):
+            if i and self.chunk_interval:
+                await asyncio.sleep(self.chunk_interval)
+            writer.write(f"{len(chunk):x}\r\n".encode("latin-1") + chunk + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, "127.0.0.1", self.port, backlog=1024)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    async def _shutdown(self):
+        # Fecha as conexões keep-alive abertas para os handlers terminarem antes do loop parar
+        self._server.close()
+        clients = list(self._clients)
+        for _, writer in clients:
+            writer.close()
+        if clients:
+            await asyncio.wait([task for task, _ in clients], timeout=1.0)
+
+    def stop(self):
+        if self._loop and self._server:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
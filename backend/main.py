@@ -8,6 +8,10 @@ from typing import Dict
 
 from app.api import router as api_root_router
 from app.db.db import db_wrapper
+from app.core.cache import cache
+from app.core.http import http_clients
+from app.services.scrapers.base import ScraperRegistry
+from app.services.job_executor import job_executor
 
 # Configuração de Logging básica
 logging.basicConfig(level=logging.INFO)
@@ -19,12 +23,24 @@ async def lifespan(app: FastAPI):
     try:
         await db_wrapper.connect()
         logger.info("🚀 Conexão com o MongoDB estabelecida com sucesso.")
+        await db_wrapper.ensure_indexes()
     except Exception as e:
         logger.error(f"❌ Erro crítico na conexão com Banco: {e}")
+    await cache.connect()
+    await http_clients.start()
+    ScraperRegistry.bootstrap()
+    await job_executor.start()
+    try:
+        await job_executor.recover()
+    except Exception as e:
+        logger.error(f"❌ Falha ao recuperar jobs locais pendentes: {e}")
     
     yield
     
     # SHUTDOWN
+    await job_executor.shutdown()
+    await http_clients.close()
+    await cache.disconnect()
     await db_wrapper.close()
     logger.info("💤 Conexão com o banco encerrada.")
 
@@ -0,0 +1,242 @@
+"""
+Dublês compartilhados pelos testes do orquestrador e do executor: a coleção
+`jobs` em memória, o deduplicador e um AdOrchestrator sem __init__ (os clientes
+de LLM/D-ID/YouTube não participam).
+"""
+import copy
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import pytest
+
+from app.services import orchestrator as orchestrator_module
+from app.services.orchestrator import AdOrchestrator
+
+_MISSING = object()
+
+
+def _get(doc: Dict[str, Any], field: str) -> Any:
+    for part in field.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return _MISSING
+        doc = doc[part]
+    return doc
+
+
+def _set(doc: Dict[str, Any], field: str, value: Any):
+    *path, last = field.split(".")
+    for part in path:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def _unset(doc: Dict[str, Any], field: str):
+    *path, last = field.split(".")
+    for part in path:
+        doc = doc.get(part, {})
+    doc.pop(last, None)
+
+
+def matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """Subconjunto dos filtros do Mongo usado pelo código: igualdade, $or, $in, $ne, $lt, $exists."""
+    for field, cond in query.items():
+        if field == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+            continue
+        value = _get(doc, field)
+        if isinstance(cond, dict) and any(op.startswith("$") for op in cond):
+            if "$exists" in cond and (value is not _MISSING) != cond["$exists"]:
+                return False
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+            if "$ne" in cond and value == cond["$ne"]:
+                return False
+            if "$lt" in cond and (value is _MISSING or not value < cond["$lt"]):
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    fields = {field.split(".")[0] for field, on in projection.items() if on}
+    return {k: v for k, v in doc.items() if k == "_id" or k in fields}
+
+
+class UpdateResult:
+    def __init__(self, matched: int):
+        self.matched_count = self.modified_count = matched
+
+
+class FakeCursor:
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.docs.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n: int):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length: Optional[int] = None):
+        return self.docs[:length] if length else self.docs
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeJobs:
+    """Coleção `jobs` em memória; `updates` registra (filtro, update) de cada escrita."""
+
+    def __init__(self, docs: Iterable[Dict[str, Any]] = ()):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.inserts: List[List[Dict[str, Any]]] = []
+        self.updates: List[tuple] = []
+
+    def _matching(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [doc for doc in self.docs.values() if matches(doc, query)]
+
+    @staticmethod
+    def _apply(doc: Dict[str, Any], update: Dict[str, Any]):
+        for field, value in update.get("$set", {}).items():
+            _set(doc, field, value)
+        for field in update.get("$unset", {}):
+            _unset(doc, field)
+        for field, amount in update.get("$inc", {}).items():
+            current = _get(doc, field)
+            _set(doc, field, (0 if current is _MISSING else current) + amount)
+
+    async def insert_one(self, doc):
+        self.docs[doc["_id"]] = copy.deepcopy(doc)
+        self.inserts.append([doc])
+
+    async def insert_many(self, docs, ordered=True):
+        docs = list(docs)
+        for doc in docs:
+            self.docs[doc["_id"]] = copy.deepcopy(doc)
+        self.inserts.append(docs)
+
+    def find(self, query, projection=None):
+        return FakeCursor([_project(doc, projection) for doc in self._matching(query)])
+
+    async def find_one(self, query, projection=None):
+        found = self._matching(query)
+        return _project(found[0], projection) if found else None
+
+    async def update_one(self, query, update):
+        self.updates.append((query, update))
+        found = self._matching(query)[:1]
+        for doc in found:
+            self._apply(doc, update)
+        return UpdateResult(len(found))
+
+    async def update_many(self, query, update):
+        self.updates.append((query, update))
+        found = self._matching(query)
+        for doc in found:
+            self._apply(doc, update)
+        return UpdateResult(len(found))
+
+    async def find_one_and_update(self, query, update, projection=None):
+        self.updates.append((query, update))
+        found = self._matching(query)
+        if not found:
+            return None
+        before = _project(found[0], projection)
+        self._apply(found[0], update)
+        return before
+
+    async def find_one_and_delete(self, query, projection=None):
+        found = self._matching(query)
+        if not found:
+            return None
+        return _project(self.docs.pop(found[0]["_id"]), projection)
+
+    def aggregate(self, pipeline):
+        # Só o formato usado pelo progresso de lotes: $match + $group por um campo com $sum: 1
+        match = next((stage["$match"] for stage in pipeline if "$match" in stage), {})
+        key = next(stage["$group"]["_id"] for stage in pipeline if "$group" in stage).lstrip("$")
+        counts = Counter(doc.get(key) for doc in self._matching(match))
+
+        async def rows():
+            for value, count in counts.items():
+                yield {"_id": value, "count": count}
+        return rows()
+
+
+class FakeDedupe:
+    """
+    Deduplicador programável: `artifacts` por fingerprint (dict) ou em sequência
+    (lista, uma resposta por lookup); `owners` em sequência (None = quem pediu).
+    """
+
+    def __init__(self, artifacts=None, owners=()):
+        self.artifacts = artifacts if artifacts is not None else {}
+        self.owners = list(owners)
+        self.hits: Counter = Counter()
+        self.released: List[tuple] = []
+
+    async def lookup(self, fingerprint):
+        if isinstance(self.artifacts, list):
+            return self.artifacts.pop(0)
+        return self.artifacts.get(fingerprint)
+
+    async def claim(self, fingerprint, job_id):
+        return (self.owners.pop(0) if self.owners else None) or job_id
+
+    async def release(self, fingerprint, job_id):
+        self.released.append((fingerprint, job_id))
+
+    async def record(self, fingerprint, job_id, result_url, script):
+        pass
+
+    async def record_hit(self, kind, count=1):
+        self.hits[kind] += count
+
+
+class SilentEvents:
+    """job_events que só guarda o que foi publicado."""
+
+    def __init__(self):
+        self.published: List[tuple] = []
+
+    async def publish(self, job_id, **fields):
+        self.published.append((job_id, fields))
+
+
+@pytest.fixture
+def fake_jobs():
+    return FakeJobs
+
+
+@pytest.fixture
+def fake_dedupe():
+    return FakeDedupe
+
+
+@pytest.fixture
+def orchestrator_with(monkeypatch):
+    """AdOrchestrator sem __init__ sobre `jobs` (e, se dados, deduplicador e eventos)."""
+
+    def build(jobs: FakeJobs, dedupe: Optional[FakeDedupe] = None, events: Optional[SilentEvents] = None):
+        monkeypatch.setattr(AdOrchestrator, "db", property(lambda self: {"jobs": jobs}))
+        if dedupe is not None:
+            monkeypatch.setattr(orchestrator_module, "job_dedupe", dedupe)
+        if events is not None:
+            monkeypatch.setattr(orchestrator_module, "job_events", events)
+        return AdOrchestrator.__new__(AdOrchestrator)
+
+    return build
+
+
+@pytest.fixture
+def silent_events():
+    return SilentEvents()
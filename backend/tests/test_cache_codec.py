@@ -0,0 +1,42 @@
+import pytest
+
+from app.core.cache import CacheConfig, ENVELOPE_MAGIC, decode_value, encode_value
+from app.models.product import Product, ProductPrice, ProductMetadata, Marketplace
+
+
+def sample_product() -> Product:
+    return Product(
+        name="Vestido Midi Floral",
+        description="Tecido leve e confortável. " * 80,
+        price=ProductPrice(amount=129.9, original_amount=199.9),
+        metadata=ProductMetadata(marketplace=Marketplace.SHEIN, marketplace_id="123", source_url="https://br.shein.com/x-p-123.html"),
+        raw_data={"json_ld": [{"@type": "Product", "sku": "123"}]},
+    )
+
+
+@pytest.mark.parametrize("codec", ["msgpack", "json"])
+def test_round_trip_with_compression(codec):
+    product = sample_product()
+    data = encode_value(product, codec=codec)
+    assert data[0] == ENVELOPE_MAGIC
+    assert data[3] == 1  # comprimido: payload acima de COMPRESS_MIN_BYTES
+    assert len(data) < len(product.model_dump_json())
+    assert decode_value(data, Product) == product
+
+
+def test_reads_legacy_json_entries():
+    product = sample_product()
+    assert decode_value(product.model_dump_json(), Product) == product
+
+
+def test_small_values_are_not_compressed():
+    data = encode_value(ProductPrice(amount=10))
+    assert len(data) < CacheConfig.COMPRESS_MIN_BYTES and data[3] == 0
+    assert decode_value(data, ProductPrice).amount == 10
+
+
+def test_unknown_envelope_version_is_rejected():
+    data = bytearray(encode_value(ProductPrice(amount=10)))
+    data[1] = 99
+    with pytest.raises(ValueError):
+        decode_value(bytes(data), ProductPrice)
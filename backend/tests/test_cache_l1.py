@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+from app.core.cache import CacheConfig, CacheEntry, LocalCache, RedisCache
+from app.models.product import ProductPrice
+
+
+class FakeRedis:
+    """Subconjunto do cliente Redis usado pelo get/set, contando round trips."""
+
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+        self.published = []
+
+    async def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def publish(self, channel, message):
+        self.published.append(json.loads(message))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args) for name, args in self.calls]
+
+
+def test_lru_evicts_oldest_and_tracks_memory():
+    local = LocalCache(max_items=2, max_ttl=60)
+    local.put("a", CacheEntry(ProductPrice(amount=1)), size=10, ttl=60)
+    local.put("b", CacheEntry(ProductPrice(amount=2)), size=20, ttl=60)
+    assert local.get("a", ProductPrice) is not None  # "a" passa a ser o mais recente
+    local.put("c", CacheEntry(ProductPrice(amount=3)), size=30, ttl=60)
+    assert local.get("b", ProductPrice) is None
+    assert local.stats()["l1_bytes"] == 40 and local.evictions == 1
+    local.put("d", CacheEntry(ProductPrice(amount=4)), size=5, ttl=0)  # já expirado
+    assert local.get("d", ProductPrice) is None
+
+
+def test_l1_serves_hot_keys_and_honors_remote_invalidation(monkeypatch):
+    monkeypatch.setattr(CacheConfig, "L1_ENABLED", True)
+    cache = RedisCache()
+    fake = FakeRedis()
+    monkeypatch.setattr(cache, "_client", fake)
+    monkeypatch.setattr(cache, "_raw", fake)
+    monkeypatch.setattr(cache, "_l1_ready", True)
+
+    async def scenario():
+        await cache.set("product:shopee:1", ProductPrice(amount=10))
+        assert fake.published[-1]["keys"] == ["product:shopee:1"]
+        for _ in range(3):
+            assert (await cache.get("product:shopee:1", ProductPrice)).amount == 10
+        assert fake.gets == 0
+
+        # Outra réplica (ainda com o formato JSON antigo) grava e publica a invalidação
+        fake.data["product:shopee:1"] = ProductPrice(amount=12).model_dump_json()
+        cache._apply_invalidation(json.dumps({"origin": "outra", "keys": ["product:shopee:1"], "pattern": None}))
+        assert (await cache.get("product:shopee:1", ProductPrice)).amount == 12
+        assert fake.gets == 1
+
+    try:
+        asyncio.run(scenario())
+        assert cache.stats()["l1_hits"] >= 3
+    finally:
+        cache._local.clear()
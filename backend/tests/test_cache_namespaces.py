@@ -0,0 +1,54 @@
+import asyncio
+from fnmatch import fnmatchcase
+
+from app.core.cache import CacheKey, RedisCache
+
+
+class FakeRedis:
+    def __init__(self, data):
+        self.data = dict(data)
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    async def scan_iter(self, match, count):
+        for key in list(self.data):
+            if fnmatchcase(key, match):
+                yield key
+
+    async def unlink(self, *keys):
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+
+def test_version_of_key():
+    ns = CacheKey.product_namespace("shopee")
+    assert CacheKey.version_of(ns, CacheKey.product("shopee", "1.2")) == 0
+    assert CacheKey.version_of(ns, CacheKey.product("shopee", "1.2", version=3)) == 3
+    assert CacheKey.version_of(ns, "product:shopee:vestido") == 0
+
+
+def test_bump_invalidates_namespace_and_sweep_removes_only_old_versions(monkeypatch):
+    cache = RedisCache()
+    ns = CacheKey.product_namespace("shopee")
+    fake = FakeRedis({
+        CacheKey.product("shopee", "1.2"): "{}",
+        CacheKey.product("aliexpress", "9"): "{}",
+    })
+    monkeypatch.setattr(cache, "_client", fake)
+    monkeypatch.setattr(cache, "_ns_versions", {})
+
+    async def scenario():
+        assert await cache.namespace_version(ns) == 0
+        assert await cache.bump_namespace(ns) == 1
+        assert await cache.namespace_version(ns) == 1
+        fake.data[CacheKey.product("shopee", "1.2", version=1)] = "{}"
+        assert await cache.sweep_namespace(ns) == 1
+
+    asyncio.run(scenario())
+    assert CacheKey.product("shopee", "1.2", version=1) in fake.data
+    assert CacheKey.product("aliexpress", "9") in fake.data
+    assert CacheKey.product("shopee", "1.2") not in fake.data
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from app.core.cache import CacheEntry, RedisCache, cached, decode_entry, encode_value
+from app.models.product import ProductPrice
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+def test_xfetch_refreshes_only_near_or_after_soft_expiry():
+    assert not CacheEntry(1, fresh_until=None).should_refresh()
+    assert not CacheEntry(1, fresh_until=time.time() + 3600, compute_time=0.5).should_refresh()
+    assert CacheEntry(1, fresh_until=time.time() - 1).should_refresh()
+
+
+def test_soft_ttl_survives_the_envelope():
+    fresh_until = time.time() + 60
+    entry = decode_entry(encode_value(ProductPrice(amount=10), fresh_until=fresh_until, compute_time=1.5), ProductPrice)
+    assert entry.value.amount == 10 and entry.fresh_until == fresh_until and entry.compute_time == 1.5
+
+
+def test_stale_value_is_served_while_a_single_refresh_runs(monkeypatch):
+    cache = RedisCache()
+    fake = FakeRedis()
+    fake.data["yt_analysis:abc"] = encode_value(ProductPrice(amount=10), fresh_until=time.time() - 5)
+    monkeypatch.setattr(cache, "_client", fake)
+    monkeypatch.setattr(cache, "_raw", fake)
+    calls = []
+
+    @cached(key=lambda video_id: f"yt_analysis:{video_id}", model=ProductPrice, ttl=60, soft_ttl=30, name="test_swr")
+    async def analyze(video_id):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ProductPrice(amount=12)
+
+    async def scenario():
+        results = await asyncio.gather(*(analyze("abc") for _ in range(10)))
+        assert [r.amount for r in results] == [10] * 10
+        await asyncio.gather(*list(cache._refreshing.values()))
+        entry = await cache.get_entry("yt_analysis:abc", ProductPrice)
+        assert entry.value.amount == 12 and not entry.is_stale
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+    assert analyze.cache_stats["stale_hits"] == 10
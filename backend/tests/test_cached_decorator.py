@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import CachedFailureError, RedisCache, cached
+from app.models.product import ProductPrice
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+class PriceService:
+    def __init__(self):
+        self.calls = 0
+
+    @cached(
+        key=lambda self, sku, refresh=False: f"price:{sku}",
+        model=ProductPrice,
+        ttl=60,
+        bypass="refresh",
+        negative_ttl=30,
+        negative_if=lambda e: isinstance(e, LookupError),
+        name="test_price",
+    )
+    async def price(self, sku: str, refresh: bool = False) -> ProductPrice:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if sku == "missing":
+            raise LookupError("SKU inexistente")
+        return ProductPrice(amount=10 + self.calls)
+
+
+@pytest.fixture
+def fake_cache(monkeypatch):
+    cache = RedisCache()
+    fake = FakeRedis()
+    monkeypatch.setattr(cache, "_client", fake)
+    monkeypatch.setattr(cache, "_raw", fake)
+    return fake
+
+
+def test_concurrent_misses_run_once_then_hit(fake_cache):
+    service = PriceService()
+
+    async def scenario():
+        first = await asyncio.gather(*(service.price("a") for _ in range(5)))
+        again = await service.price("a")
+        forced = await service.price("a", refresh=True)
+        return first, again, forced
+
+    first, again, forced = asyncio.run(scenario())
+    assert {p.amount for p in first} == {11} and again.amount == 11
+    assert forced.amount == 12 and service.calls == 2
+    stats = PriceService.price.cache_stats
+    assert (stats["misses"], stats["coalesced"], stats["hits"], stats["bypassed"]) == (1, 4, 1, 1)
+
+
+def test_failures_are_negative_cached(fake_cache):
+    service = PriceService()
+    with pytest.raises(LookupError):
+        asyncio.run(service.price("missing"))
+    with pytest.raises(CachedFailureError, match="SKU inexistente"):
+        asyncio.run(service.price("missing"))
+    assert service.calls == 1
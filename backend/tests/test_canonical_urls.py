@@ -0,0 +1,38 @@
+from app.services.scrapers.aliexpress import AliExpressScraper
+from app.services.scrapers.generic_scraper import GenericEcomScraper
+from app.services.scrapers.shein import SheinScraper
+from app.services.scrapers.shopee import ShopeeScraper
+
+
+def test_shopee_variants_share_item_id():
+    s = ShopeeScraper()
+    urls = [
+        "https://shopee.com.br/Fone-Bluetooth-i.123456.7890123?sp_atk=abc&xptdk=1",
+        "https://shopee.com.br/Fone-Bluetooth-i.123456.7890123?utm_source=ig",
+        "https://shopee.com.br/product/123456/7890123/",
+    ]
+    assert {s.extract_product_id(u) for u in urls} == {"123456.7890123"}
+    assert s.canonicalize_url(urls[0]) == "https://shopee.com.br/product/123456/7890123"
+
+
+def test_aliexpress_mobile_and_tracking_variants():
+    a = AliExpressScraper()
+    urls = [
+        "https://pt.aliexpress.com/item/1005001234567890.html?spm=a2g0o.home&gatewayAdapt=glo2bra",
+        "https://m.aliexpress.com/item/1005001234567890.html",
+    ]
+    assert {a.extract_product_id(u) for u in urls} == {"1005001234567890"}
+    assert a.canonicalize_url(urls[1]) == "https://www.aliexpress.com/item/1005001234567890.html"
+
+
+def test_shein_goods_id():
+    s = SheinScraper()
+    assert s.extract_product_id("https://br.shein.com/Vestido-p-12345678-cat-1727.html?src_identifier=x") == "12345678"
+    assert s.extract_product_id("https://m.shein.com/br/Vestido-p-12345678.html") == "12345678"
+
+
+def test_generic_strips_tracking_params_only():
+    g = GenericEcomScraper()
+    assert g.canonicalize_url("HTTPS://Loja.com/p/1/?utm_source=a&b=2&a=1&fbclid=z#x") == "https://loja.com/p/1?a=1&b=2"
+    assert g.extract_product_id("https://loja.com/p/1?b=2&a=1&gclid=q") == g.extract_product_id("https://loja.com/p/1/?a=1&b=2")
+    assert g.extract_product_id("https://loja.com/p/1?sku=1") != g.extract_product_id("https://loja.com/p/1?sku=2")
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.core.http import http_clients
+from app.services.orchestrator import AdOrchestrator
+from app.services.video_did import DIDConfig, DIDService
+from benchmarks.did_stub import FakeDID
+from benchmarks.stub_server import StubServer
+
+
+def test_webhook_token_is_bound_to_job(monkeypatch):
+    monkeypatch.setattr(DIDConfig, "WEBHOOK_SECRET", "s3cr3t")
+    token = DIDService.webhook_token("job-a")
+    assert DIDService.verify_webhook("job-a", token)
+    assert not DIDService.verify_webhook("job-b", token)
+    assert not DIDService.verify_webhook("job-a", "")
+
+
+def test_fake_did_delivers_result_to_webhook(monkeypatch):
+    received = []
+    delivered = threading.Event()
+
+    def receiver(method, path, body):
+        received.append((path, json.loads(body)))
+        delivered.set()
+        return 200, "application/json", b"{}"
+
+    monkeypatch.setenv("DID_API_KEY", "key")
+    with FakeDID(render_time=0.05) as did, StubServer(handler=receiver) as hook:
+        monkeypatch.setattr(DIDConfig, "API_URL", did.url())
+        service = DIDService()
+
+        async def scenario():
+            talk = await service.create_talk("https://img/avatar.png", "Olá!", webhook_url=hook.url("/cb?token=t"))
+            assert talk["status"] == "created"
+            await asyncio.get_running_loop().run_in_executor(None, delivered.wait, 5)
+            polled = await service.get_talk(talk["id"])
+            await http_clients.close()
+            return talk, polled
+
+        talk, polled = asyncio.run(scenario())
+
+    path, payload = received[0]
+    assert path == "/cb?token=t"
+    assert payload["id"] == talk["id"] and payload["status"] == "done"
+    assert polled["result_url"] == payload["result_url"]
+
+
+def rendering_job(fake_jobs, **fields):
+    job_id = ObjectId()
+    return str(job_id), fake_jobs([{"_id": job_id, "status": "rendering", **fields}])
+
+
+def test_complete_render_maps_talk_status_to_job(orchestrator_with, fake_jobs, silent_events):
+    job_id, jobs = rendering_job(fake_jobs)
+    orchestrator = orchestrator_with(jobs, events=silent_events)
+
+    assert asyncio.run(orchestrator.complete_render(job_id, {"id": "t1", "status": "started"})) == "ignored"
+    assert not jobs.updates
+
+    done = {"id": "t1", "status": "done", "result_url": "https://cdn/t1.mp4"}
+    assert asyncio.run(orchestrator.complete_render(job_id, done)) == "completed"
+    query, update = jobs.updates[-1]
+    assert query["status"] == {"$in": ["processing", "rendering"]}
+    assert update["$set"]["result_url"] == "https://cdn/t1.mp4"
+
+    job_id, jobs = rendering_job(fake_jobs)
+    orchestrator = orchestrator_with(jobs, events=silent_events)
+    error = {"id": "t1", "status": "error", "error": {"description": "Rosto não detectado"}}
+    assert asyncio.run(orchestrator.complete_render(job_id, error)) == "failed"
+    assert jobs.updates[-1][1]["$set"]["failed_stage"] == "video"
+    assert jobs.updates[-1][1]["$set"]["stages.video.status"] == "failed"
+
+    # Entrega duplicada: o filtro não casa mais e nada muda
+    assert asyncio.run(orchestrator.complete_render(job_id, done)) == "ignored"
+    assert next(iter(jobs.docs.values()))["status"] == "failed"
+
+
+def test_poll_render_times_out_without_reaching_did(orchestrator_with, fake_jobs, silent_events):
+    submitted = datetime.utcnow() - timedelta(seconds=DIDConfig.RENDER_TIMEOUT + 1)
+    job_id, jobs = rendering_job(fake_jobs, talk_id="t1", render_submitted_at=submitted)
+    orchestrator = orchestrator_with(jobs, events=silent_events)
+
+    class BrokenDID:
+        async def get_talk(self, talk_id):
+            raise RuntimeError("D-ID fora do ar")
+
+    orchestrator.did_service = BrokenDID()
+    assert asyncio.run(orchestrator.poll_render(job_id)) == "failed"
+    assert "Timeout" in jobs.updates[-1][1]["$set"]["error"]
+
+    # Dentro do prazo, a falha na consulta só adia para a próxima
+    job_id, jobs = rendering_job(fake_jobs, talk_id="t1", render_submitted_at=datetime.utcnow())
+    orchestrator = orchestrator_with(jobs, events=silent_events)
+    orchestrator.did_service = BrokenDID()
+    assert asyncio.run(orchestrator.poll_render(job_id)) == "rendering"
+    assert not jobs.updates
+
+
+def test_early_webhook_is_not_overwritten_by_the_video_checkpoint(monkeypatch, orchestrator_with, fake_jobs):
+    job_id, jobs = rendering_job(fake_jobs, style="fomo")
+    next(iter(jobs.docs.values()))["status"] = "queued"
+    orchestrator = orchestrator_with(jobs)
+
+    class Pipeline:
+        stages = {"product": None, "script": None, "video": None}
+
+        async def run(self, completed, checkpoint, on_start):
+            await checkpoint("script", {"status": "completed", "output": "Roteiro"})
+            # O D-ID responde antes de o worker gravar o checkpoint do vídeo
+            done = {"id": "t1", "status": "done", "result_url": "https://cdn/t1.mp4"}
+            assert await orchestrator.complete_render(job_id, done) == "completed"
+            video = {"talk_id": "t1", "result_url": None}
+            await checkpoint("video", {"status": "completed", "output": video})
+            return {"script": "Roteiro", "video": video}
+
+    monkeypatch.setattr(AdOrchestrator, "build_pipeline", lambda self, job, defer_render=False: Pipeline())
+
+    assert asyncio.run(orchestrator.process_job(job_id, defer_render=True)) == "completed"
+    doc = next(iter(jobs.docs.values()))
+    assert doc["status"] == "completed" and doc["result_url"] == "https://cdn/t1.mp4"
+    assert doc["stages"]["video"]["output"]["result_url"] == "https://cdn/t1.mp4"
+    assert "talk_id" not in doc
+
+
+def test_final_publish_clears_the_script_preview(orchestrator_with, fake_jobs, silent_events):
+    done = {"id": "t1", "status": "done", "result_url": "https://cdn/t1.mp4"}
+    error = {"id": "t1", "status": "error", "error": "Rosto não detectado"}
+    for talk in (done, error):
+        job_id, jobs = rendering_job(fake_jobs)
+        asyncio.run(orchestrator_with(jobs, events=silent_events).complete_render(job_id, talk))
+
+    published = [fields for _, fields in silent_events.published]
+    assert [(fields["status"], fields["script_preview"]) for fields in published] == [("completed", ""), ("failed", "")]
@@ -0,0 +1,56 @@
+import asyncio
+
+from app.core import tasks
+
+
+class FakeScheduler:
+    def __init__(self, accepts=True, batch=()):
+        self.accepts = accepts
+        self.batch = list(batch)
+        self.released = []
+        self.requeued = []
+
+    async def submit(self, job_id, user_id, tier):
+        return self.accepts
+
+    async def next_batch(self, tier):
+        return self.batch
+
+    async def release(self, tier, job_id):
+        self.released.append(job_id)
+
+    async def requeue(self, tier, jobs):
+        self.requeued.extend(jobs)
+
+
+def fake_broker(monkeypatch, down=()):
+    sent = []
+
+    def apply_async(args, queue, **kwargs):
+        if args[0] in down:
+            raise ConnectionError("broker offline")
+        sent.append((args, queue))
+
+    monkeypatch.setattr(tasks.process_job_task, "apply_async", apply_async)
+    return sent
+
+
+def test_jobs_that_miss_the_broker_release_their_slot(monkeypatch):
+    scheduler = FakeScheduler(batch=[("a", "u1"), ("b", "u2"), ("c", "u1")])
+    monkeypatch.setattr(tasks, "fair_scheduler", scheduler)
+    sent = fake_broker(monkeypatch, down={"b", "c"})
+
+    unsent = asyncio.run(tasks.schedule_job("c", "u1", "low"))
+
+    # Só o job desta requisição roda no processo; o de outro usuário volta à fila justa
+    assert unsent == ["c"] and scheduler.released == ["b", "c"]
+    assert scheduler.requeued == [("b", "u2")]
+    assert sent == [(["a", "low"], "jobs.low")]
+
+
+def test_without_redis_jobs_go_straight_to_the_tier_queue(monkeypatch):
+    monkeypatch.setattr(tasks, "fair_scheduler", FakeScheduler(accepts=False))
+    sent = fake_broker(monkeypatch)
+
+    assert asyncio.run(tasks.schedule_job("a", "u1", "high")) == []
+    assert sent == [(["a"], "jobs.high")]
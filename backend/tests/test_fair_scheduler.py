@@ -0,0 +1,90 @@
+import asyncio
+import os
+import uuid
+from collections import Counter
+
+import pytest
+from redis.asyncio import from_url
+
+from app.core.cache import cache
+from app.services.scheduler import FairScheduler, SchedulerConfig
+
+# Os scripts Lua rodam num Redis de verdade; sem ele os testes são pulados
+REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+def run_with_redis(monkeypatch, scenario, capacity):
+    """Executa `scenario(scheduler, tier)` num tier descartável; limpa as chaves no fim."""
+    tier = f"test-{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(SchedulerConfig, "CAPACITY", {tier: capacity})
+
+    async def run():
+        client = from_url(REDIS_URL, decode_responses=True)
+        try:
+            await client.ping()
+        except Exception:
+            await client.aclose()
+            return None
+        monkeypatch.setattr(cache, "_client", client)
+        try:
+            return await scenario(FairScheduler(), tier)
+        finally:
+            keys = [key async for key in client.scan_iter(f"fairq:{{{tier}}}:*")]
+            if keys:
+                await client.delete(*keys)
+            await client.aclose()
+
+    result = asyncio.run(run())
+    if result is None:
+        pytest.skip(f"Redis indisponível em {REDIS_URL}")
+    return result
+
+
+def test_bulk_submitter_does_not_starve_other_users(monkeypatch):
+    async def scenario(scheduler, tier):
+        await scheduler.submit_many([f"bulk-{i}" for i in range(50)], "bulk", tier)
+        await scheduler.submit_many(["small-0", "small-1"], "small", tier)
+        batch = await scheduler.next_batch(tier)
+        prefix = f"fairq:{{{tier}}}:"
+        return batch, await cache._client.get(prefix + "depth"), await cache._client.zcard(prefix + "running")
+
+    batch, depth, running = run_with_redis(monkeypatch, scenario, capacity=4)
+
+    # Quem chegou depois com 2 jobs não espera os 50 do outro
+    assert batch == [("bulk-0", "bulk"), ("small-0", "small"), ("bulk-1", "bulk"), ("small-1", "small")]
+    assert depth == "48" and running == 4
+
+
+def test_weights_set_each_users_share(monkeypatch):
+    async def scenario(scheduler, tier):
+        await scheduler.set_weight(tier, "premium", 3)
+        await scheduler.submit_many([f"p-{i}" for i in range(20)], "premium", tier)
+        await scheduler.submit_many([f"f-{i}" for i in range(20)], "free", tier)
+        return await scheduler.next_batch(tier)
+
+    batch = run_with_redis(monkeypatch, scenario, capacity=8)
+
+    assert Counter(user for _, user in batch) == {"premium": 6, "free": 2}
+    # Ordem dentro da sub-fila de cada usuário preservada
+    assert [job for job, user in batch if user == "premium"] == [f"p-{i}" for i in range(6)]
+
+
+def test_slots_are_freed_on_release_or_after_running_timeout(monkeypatch):
+    async def scenario(scheduler, tier):
+        await scheduler.submit_many(["a", "b", "c", "d"], "u1", tier)
+        first = await scheduler.next_batch(tier)
+        full = await scheduler.next_batch(tier)
+        await scheduler.release(tier, "a")
+        after_release = await scheduler.next_batch(tier)
+        # Worker que morreu sem liberar o slot: o prazo vence e o slot volta
+        monkeypatch.setattr(SchedulerConfig, "RUNNING_TIMEOUT", 0)
+        await asyncio.sleep(0.01)
+        after_timeout = await scheduler.next_batch(tier)
+        return first, full, after_release, after_timeout
+
+    first, full, after_release, after_timeout = run_with_redis(monkeypatch, scenario, capacity=2)
+
+    assert [job for job, _ in first] == ["a", "b"]
+    assert full == []
+    assert after_release == [("c", "u1")]
+    assert after_timeout == [("d", "u1")]
@@ -0,0 +1,48 @@
+import asyncio
+import pathlib
+
+from app.services.scrapers.head_extractor import JSON_LD, extract_from_stream
+
+sample_path = pathlib.Path(__file__).parent / 'fixtures' / 'shopee_sample.html'
+html = sample_path.read_bytes()
+
+
+class Chunks:
+    """Simula `response.aiter_bytes()` contando quanto foi lido da rede."""
+
+    def __init__(self, data: bytes, size: int = 64):
+        self.parts = [data[i:i + size] for i in range(0, len(data), size)]
+        self.read = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self.read >= len(self.parts):
+            raise StopAsyncIteration
+        self.read += 1
+        return self.parts[self.read - 1]
+
+
+def test_stops_reading_after_head():
+    body = b"<p>" + b"x" * 200_000 + b"</p></body></html>"
+    chunks = Chunks(html.replace(b"</body>\n</html>", body))
+    page = asyncio.run(extract_from_stream(chunks, required=("og:title", JSON_LD)))
+
+    assert page.head_complete and not page.full_parse
+    assert page.get("og:title") == "Sample Shopee Product"
+    assert page.get("og:image") == "https://example.com/image1.jpg"
+    assert page.first_json_ld()["offers"]["price"] == "49.90"
+    assert page.bytes_read < 1024
+    assert chunks.read < len(chunks.parts)
+
+
+def test_falls_back_to_full_parse_when_required_field_missing():
+    late_price = b'<meta property="product:price:amount" content="49.90" /></body>'
+    chunks = Chunks(html.replace(b"</body>", late_price))
+    page = asyncio.run(extract_from_stream(chunks, required=("og:title", "product:price:amount")))
+
+    assert page.full_parse
+    assert page.get("product:price:amount") == "49.90"
+    assert page.get("og:title") == "Sample Shopee Product"
+    assert chunks.read == len(chunks.parts)
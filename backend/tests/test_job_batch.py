@@ -0,0 +1,46 @@
+import asyncio
+
+from app.core.cache import cache
+from app.services.orchestrator import AdOrchestrator
+from app.services.product_service import ProductScraperService
+from app.services.scrapers.base import ScraperError
+
+
+def test_batch_is_validated_deduplicated_and_inserted_once(monkeypatch, orchestrator_with, fake_jobs, fake_dedupe):
+    async def resolve(url):
+        if "invalida" in url:
+            raise ScraperError("URL não suportada")
+        product_id = url.rsplit("/", 1)[1].split("?")[0]
+        return None, f"https://shopee.com.br/p/{product_id}", f"product:shopee:{product_id}"
+
+    monkeypatch.setattr(ProductScraperService, "resolve", staticmethod(resolve))
+    monkeypatch.setattr(AdOrchestrator, "_content_fingerprint", lambda self, key, yt, style: f"{key}|{style}")
+    monkeypatch.setattr(cache, "_client", object())
+    jobs = fake_jobs()
+    dedupe = fake_dedupe({"product:shopee:3|fomo": {"job_id": "old", "result_url": "https://cdn/3.mp4"}})
+    orchestrator = orchestrator_with(jobs, dedupe)
+
+    urls = ["https://shopee.com.br/p/1", "https://invalida.com/x", "https://shopee.com.br/p/1?utm=ig",
+            "https://shopee.com.br/p/2", "https://shopee.com.br/p/3"]
+    batch = asyncio.run(orchestrator.enqueue_batch(
+        [{"product_url": url, "style": "fomo"} for url in urls], user_id="agencia"
+    ))
+
+    assert len(jobs.inserts) == 1 and len(jobs.inserts[0]) == 4
+    assert batch["errors"] == [{"index": 1, "product_url": "https://invalida.com/x", "error": "URL não suportada"}]
+    status = {job["index"]: job for job in batch["jobs"]}
+    assert status[0]["status"] == "queued" and status[3]["status"] == "queued"
+    # Repetido dentro do lote (mesma URL canônica) segue o primeiro
+    doc = {d["batch_index"]: d for d in jobs.inserts[0]}
+    assert status[2]["status"] == "attached" and doc[2]["attached_to"] == status[0]["job_id"]
+    assert status[4]["status"] == "completed" and doc[4]["result_url"] == "https://cdn/3.mp4"
+    assert dedupe.hits == {"artifact": 1, "inflight": 1}
+
+
+def test_batch_status_comes_from_one_aggregation(orchestrator_with, fake_jobs):
+    statuses = ["completed"] * 3 + ["failed"] + ["processing"] * 4
+    jobs = fake_jobs([{"_id": i, "batch_id": "b1", "status": status} for i, status in enumerate(statuses)])
+    jobs.docs["outro"] = {"_id": "outro", "batch_id": "b2", "status": "queued"}
+    status = asyncio.run(orchestrator_with(jobs).batch_status("b1"))
+    assert status["total"] == 8 and status["progress"] == 50 and not status["done"]
+    assert status["counts"]["processing"] == 4
@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.services.dedupe import JobDeduplicator
+from app.services.orchestrator import AdOrchestrator
+
+
+def enqueue(monkeypatch, orchestrator_with, jobs, dedupe):
+    async def fingerprint(self, *args):
+        return "fp"
+
+    monkeypatch.setattr(AdOrchestrator, "_fingerprint", fingerprint)
+    orchestrator = orchestrator_with(jobs, dedupe)
+    job = asyncio.run(orchestrator.enqueue_job("https://shopee.com.br/p", "u1", "fomo"))
+    return job, next(iter(jobs.docs.values()))
+
+
+def test_fingerprint_depends_on_every_input():
+    base = JobDeduplicator.fingerprint("product:shopee:v1:1", "abc", "fomo", "llama")
+    assert base == JobDeduplicator.fingerprint("product:shopee:v1:1", "abc", "fomo", "llama")
+    assert base != JobDeduplicator.fingerprint("product:shopee:v2:1", "abc", "fomo", "llama")
+    assert base != JobDeduplicator.fingerprint("product:shopee:v1:1", None, "fomo", "llama")
+    assert base != JobDeduplicator.fingerprint("product:shopee:v1:1", "abc", "calmo", "llama")
+
+
+def test_completed_artifact_is_reused(monkeypatch, orchestrator_with, fake_jobs, fake_dedupe):
+    artifact = {"job_id": "j0", "result_url": "https://cdn/v.mp4", "script": "Roteiro"}
+    dedupe = fake_dedupe(artifacts=[artifact])
+    job, doc = enqueue(monkeypatch, orchestrator_with, fake_jobs(), dedupe)
+    assert job["status"] == "completed"
+    assert doc["result_url"] == "https://cdn/v.mp4" and doc["deduplicated_from"] == "j0"
+    assert dedupe.hits == {"artifact": 1}
+
+
+def test_identical_job_in_flight_gets_a_follower(monkeypatch, orchestrator_with, fake_jobs, fake_dedupe):
+    dedupe = fake_dedupe(artifacts=[None, None], owners=["j0", "j0"])
+    job, doc = enqueue(monkeypatch, orchestrator_with, fake_jobs(), dedupe)
+    assert job["status"] == "attached" and doc["attached_to"] == "j0"
+    assert dedupe.hits == {"inflight": 1}
+
+
+def test_owner_finishing_during_enqueue_is_not_missed(monkeypatch, orchestrator_with, fake_jobs, fake_dedupe):
+    # O dono termina entre o claim e o insert: o artefato já está no índice
+    artifact = {"job_id": "j0", "result_url": "https://cdn/v.mp4", "script": "Roteiro"}
+    dedupe = fake_dedupe(artifacts=[None, artifact], owners=["j0"])
+    job, doc = enqueue(monkeypatch, orchestrator_with, fake_jobs(), dedupe)
+    assert job["status"] == "completed" and doc["result_url"] == "https://cdn/v.mp4"
+
+    # O dono falhou: este job passa a ser o dono e precisa ser despachado
+    dedupe = fake_dedupe(artifacts=[None, None], owners=["j0", None])
+    job, doc = enqueue(monkeypatch, orchestrator_with, fake_jobs(), dedupe)
+    assert job["status"] == "queued" and "attached_to" not in doc
+
+
+class FailingPipeline:
+    stages = {"product": None}
+
+    async def run(self, **kwargs):
+        raise RuntimeError("scrape falhou")
+
+
+def test_only_the_last_attempt_fails_the_followers(monkeypatch, orchestrator_with, fake_jobs, silent_events):
+    job_id = ObjectId()
+    jobs = fake_jobs([{"_id": job_id, "status": "queued", "fingerprint": "fp"}])
+    orchestrator = orchestrator_with(jobs, events=silent_events)
+    monkeypatch.setattr(AdOrchestrator, "build_pipeline", lambda self, job, defer_render=False: FailingPipeline())
+    shared = []
+
+    async def share_result(self, job_id, fingerprint, **kwargs):
+        shared.append((job_id, kwargs["error"]))
+
+    monkeypatch.setattr(AdOrchestrator, "_share_result", share_result)
+
+    assert asyncio.run(orchestrator.process_job(str(job_id), final_attempt=False)) == "queued"
+    assert shared == [] and jobs.docs[job_id]["status"] == "queued"
+    assert asyncio.run(orchestrator.process_job(str(job_id))) == "failed"
+    assert shared == [(str(job_id), "scrape falhou")]
+
+
+def test_followers_of_a_missing_owner_are_requeued(orchestrator_with, fake_jobs, fake_dedupe, silent_events):
+    old = datetime.utcnow() - timedelta(hours=2)
+    ghost, first, second = ObjectId(), ObjectId(), ObjectId()
+    jobs = fake_jobs([
+        {"_id": first, "status": "attached", "attached_to": str(ghost), "fingerprint": "fp",
+         "user_id": "u1", "created_at": old, "updated_at": old},
+        {"_id": second, "status": "attached", "attached_to": str(ghost), "fingerprint": "fp",
+         "user_id": "u2", "created_at": old + timedelta(seconds=1), "updated_at": old},
+    ])
+    orchestrator = orchestrator_with(jobs, fake_dedupe(), silent_events)
+
+    stats = asyncio.run(orchestrator.sweep_orphan_followers())
+
+    assert stats["requeued"] == [{"job_id": str(first), "user_id": "u1", "priority": "default"}]
+    assert jobs.docs[first]["status"] == "queued" and "attached_to" not in jobs.docs[first]
+    assert jobs.docs[second]["attached_to"] == str(first)
@@ -0,0 +1,97 @@
+import asyncio
+
+from app.core.cache import cache
+from app.services.job_events import JobEvents
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.redis.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        self.redis.subscribers.clear()
+
+
+class FakeRedis:
+    """Hashes + pub/sub em memória, o suficiente para o JobEvents."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.subscribers = {}
+
+    async def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    async def expire(self, key, ttl):
+        pass
+
+    async def publish(self, channel, message):
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait({"type": "message", "data": message})
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return FakePubSub(self)
+
+    def pipeline(self, transaction=True):
+        redis = self
+        calls = []
+
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: calls.append((name, args, kwargs))
+
+            async def execute(self):
+                return [await getattr(redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+        return Pipeline()
+
+
+def test_stream_sends_snapshot_then_updates_until_terminal(monkeypatch):
+    monkeypatch.setattr(cache, "_client", FakeRedis())
+    events = JobEvents()
+
+    async def scenario():
+        await events.publish("j1", status="processing", progress=0)
+        received = []
+
+        async def consume():
+            async for state in events.stream("j1", heartbeat=0.01):
+                received.append(state)
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.03)  # ao menos um heartbeat
+        await events.publish("j1", stage="product", progress=25)
+        await events.publish("j1", status="completed", progress=100, result_url="https://cdn/v.mp4")
+        await asyncio.wait_for(consumer, 1)
+        return received, await events.get("j1")
+
+    received, final = asyncio.run(scenario())
+    states = [s for s in received if s is not None]
+    assert None in received
+    assert states[0]["status"] == "processing"
+    # Cada atualização chega como estado completo (snapshot + deltas)
+    assert states[1]["status"] == "processing" and states[1]["stage"] == "product"
+    assert states[-1]["status"] == "completed" and states[-1]["stage"] == "product"
+    assert final["progress"] == "100" and final["result_url"] == "https://cdn/v.mp4"
+
+
+def test_stream_ends_without_a_snapshot(monkeypatch):
+    monkeypatch.setattr(cache, "_client", FakeRedis())
+
+    async def scenario():
+        return [state async for state in JobEvents().stream("desconhecido", heartbeat=0.01)]
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 1)) == []
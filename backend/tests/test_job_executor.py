@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.core import tasks
+from app.db.db import db_wrapper
+from app.services.job_executor import ExecutorConfig, JobExecutor
+
+
+class FakeOrchestrator:
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.processed = []
+        self.discarded = []
+
+    async def process_job(self, job_id):
+        if self.gate:
+            await self.gate.wait()
+        self.processed.append(job_id)
+        return "completed"
+
+    async def discard_job(self, job_id):
+        self.discarded.append(job_id)
+
+
+def make_executor(monkeypatch, orchestrator, jobs, concurrency=1, queue_size=1):
+    monkeypatch.setattr(ExecutorConfig, "CONCURRENCY", concurrency)
+    monkeypatch.setattr(ExecutorConfig, "QUEUE_SIZE", queue_size)
+    monkeypatch.setattr(db_wrapper, "_db", {"jobs": jobs})
+    executor = JobExecutor()
+    executor._orchestrator = orchestrator
+    return executor
+
+
+def test_full_queue_rejects_and_shutdown_drains(monkeypatch, fake_jobs):
+    ids = [str(ObjectId()) for _ in range(3)]
+
+    async def scenario():
+        gate = asyncio.Event()
+        orchestrator = FakeOrchestrator(gate)
+        executor = make_executor(monkeypatch, orchestrator, fake_jobs())
+        await executor.start()
+        await executor.run_locally(ids[:1])
+        await asyncio.sleep(0)  # o worker pega o primeiro; o segundo ocupa a fila
+        rejected = await executor.run_locally(ids[1:])
+        retry_after = executor.retry_after()
+        full = not executor.has_capacity()
+        gate.set()
+        await executor.shutdown()
+        return orchestrator, rejected, retry_after, full, executor.stats()
+
+    orchestrator, rejected, retry_after, full, stats = asyncio.run(scenario())
+
+    assert rejected == [ids[2]] and orchestrator.discarded == [ids[2]]
+    assert orchestrator.processed == ids[:2]
+    assert retry_after >= 1 and full
+    assert stats["accepted"] == 2 and stats["rejected"] == 1 and not stats["accepting"]
+
+
+def test_recover_takes_over_jobs_whose_runner_stopped_beating(monkeypatch, fake_jobs):
+    old = datetime.utcnow() - timedelta(seconds=ExecutorConfig.STALE_AFTER * 2)
+    sent_id, local_id, taken_id, alive_id = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+    jobs = fake_jobs([
+        {"_id": sent_id, "user_id": "u1", "status": "queued", "runner": "pod-a:1", "runner_seen_at": old},
+        {"_id": local_id, "user_id": "u1", "priority": "high", "status": "processing",
+         "runner": "pod-a:1", "runner_seen_at": old},
+        {"_id": taken_id, "user_id": "u2", "status": "queued", "runner": "pod-a:1", "runner_seen_at": old},
+        # Outra réplica ainda viva: o heartbeat é recente
+        {"_id": alive_id, "user_id": "u3", "status": "queued", "runner": "pod-b:1", "runner_seen_at": datetime.utcnow()},
+    ])
+    find = jobs.find
+
+    def find_then_lose_race(query, projection):
+        cursor = find(query, projection)
+        # Outra réplica toma `taken_id` entre a busca e o update condicional
+        jobs.docs[taken_id].update(runner="pod-c:1", runner_seen_at=datetime.utcnow())
+        return cursor
+
+    jobs.find = find_then_lose_race
+
+    async def schedule_job(job_id, user_id, tier):
+        return [job_id] if job_id == str(local_id) else []
+
+    monkeypatch.setattr(tasks, "schedule_job", schedule_job)
+
+    async def scenario():
+        orchestrator = FakeOrchestrator()
+        executor = make_executor(monkeypatch, orchestrator, jobs, queue_size=5)
+        await executor.start()
+        recovered = await executor.recover()
+        await executor.shutdown()
+        return orchestrator, recovered
+
+    orchestrator, recovered = asyncio.run(scenario())
+
+    assert recovered == 2 and orchestrator.processed == [str(local_id)]
+    # Um foi para o Celery e o outro terminou aqui: nenhum dos dois fica marcado
+    assert "runner" not in jobs.docs[sent_id] and "runner" not in jobs.docs[local_id]
+    assert jobs.docs[taken_id]["runner"] == "pod-c:1" and jobs.docs[alive_id]["runner"] == "pod-b:1"
+
+
+def test_recover_stops_at_a_full_queue_without_dropping_jobs(monkeypatch, fake_jobs):
+    old = datetime.utcnow() - timedelta(seconds=ExecutorConfig.STALE_AFTER * 2)
+    ids = [ObjectId() for _ in range(4)]
+    jobs = fake_jobs([
+        {"_id": i, "user_id": "u1", "status": "queued", "runner": "pod-a:1", "runner_seen_at": old} for i in ids
+    ])
+
+    async def schedule_job(job_id, user_id, tier):
+        return [job_id]  # Celery fora: tudo fica local
+
+    monkeypatch.setattr(tasks, "schedule_job", schedule_job)
+
+    async def scenario():
+        gate = asyncio.Event()
+        orchestrator = FakeOrchestrator(gate)
+        executor = make_executor(monkeypatch, orchestrator, jobs, concurrency=1, queue_size=1)
+        await executor.start()
+        recovered = await executor.recover()
+        gate.set()
+        await executor.shutdown()
+        return orchestrator, recovered
+
+    orchestrator, recovered = asyncio.run(scenario())
+
+    # O primeiro ocupa a fila local; o segundo não cabe e a recuperação para ali
+    assert recovered == 1 and orchestrator.discarded == [] and orchestrator.processed == [str(ids[0])]
+    # A tomada foi desfeita: continua abandonado para o próximo heartbeat
+    assert jobs.docs[ids[1]]["runner"] == "pod-a:1" and jobs.docs[ids[1]]["runner_seen_at"] == old
+    assert all(jobs.docs[i]["runner"] == "pod-a:1" for i in ids[2:])
@@ -0,0 +1,41 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.services.orchestrator import AdOrchestrator
+
+
+def test_keyset_pages_cover_every_job_once(orchestrator_with, fake_jobs):
+    start = datetime(2026, 1, 1)
+    # Dois jobs por instante: o desempate é o _id
+    docs = [
+        {"_id": ObjectId(), "user_id": "u1", "status": "completed" if i % 3 else "failed",
+         "created_at": start + timedelta(seconds=i // 2), "script": "longo"}
+        for i in range(7)
+    ]
+    docs.append({"_id": ObjectId(), "user_id": "u2", "status": "completed", "created_at": start})
+    orchestrator = orchestrator_with(fake_jobs(docs))
+
+    async def all_pages(**filters):
+        seen, cursor = [], None
+        while True:
+            page = await orchestrator.list_jobs("u1", limit=3, cursor=cursor, **filters)
+            seen.extend(page["jobs"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                return seen
+
+    jobs = asyncio.run(all_pages())
+    expected = sorted(docs[:7], key=lambda d: (d["created_at"], d["_id"]), reverse=True)
+    assert [job["job_id"] for job in jobs] == [str(d["_id"]) for d in expected]
+    assert all("script" not in job for job in jobs)
+
+    failed = asyncio.run(all_pages(statuses=["failed"]))
+    assert {job["job_id"] for job in failed} == {str(d["_id"]) for d in docs[:7] if d["status"] == "failed"}
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        AdOrchestrator.decode_cursor("nao-e-um-cursor")
@@ -0,0 +1,74 @@
+import asyncio
+from collections import Counter
+
+from app.services import llm_cache as llm_cache_module
+from app.services.llm_cache import LLMCache, LLMCacheConfig, LLMCompletion
+from app.services.llm_service import LLMService
+
+
+class FakeRedis:
+    """Executa em Python os scripts do cache do LLM."""
+
+    def __init__(self):
+        self.lists = {}
+        self.counters = Counter()
+        self.hashes = {}
+
+    async def eval(self, script, keys, args):
+        if script == llm_cache_module._PICK_SCRIPT:
+            variants = self.lists.get(keys[0], [])
+            if not variants or len(variants) < int(args[0]):
+                return None
+            self.counters[keys[1]] += 1
+            return variants[(self.counters[keys[1]] - 1) % len(variants)]
+        if script == llm_cache_module._STORE_SCRIPT:
+            variants = self.lists.setdefault(keys[0], [])
+            if len(variants) < int(args[1]):
+                variants.append(args[0])
+            return 1
+        if script == llm_cache_module._COUNT_SCRIPT:
+            stats = self.hashes.setdefault(keys[0], Counter())
+            for field, amount in zip(args[::2], args[1::2]):
+                stats[field] += amount
+            return 1
+        raise AssertionError("script inesperado")
+
+    async def hgetall(self, key):
+        return {k: str(v) for k, v in self.hashes.get(key, {}).items()}
+
+
+def test_key_follows_the_prompt_text():
+    fone = {"name": "Fone  Bluetooth ", "price": "BRL 199.9", "highlights": ["bateria"]}
+    prompt = LLMService.ad_prompt(fone, "fomo")
+    key = LLMCache.key("m", 0.7, prompt)
+    # Preço e descrição não entram no prompt; espaços extras são colapsados nele
+    same = {"name": "Fone Bluetooth", "price": "BRL 149.9", "description": "outra", "highlights": ["bateria"]}
+    assert key == LLMCache.key("m", 0.7, LLMService.ad_prompt(same, "fomo"))
+    # Caixa diferente é outro prompt, logo outra chave
+    assert key != LLMCache.key("m", 0.7, LLMService.ad_prompt({**same, "name": "FONE BLUETOOTH"}, "fomo"))
+    assert key != LLMCache.key("m", 0.7, LLMService.ad_prompt(same, "luxo"))
+    assert key != LLMCache.key("m", 0.9, prompt)
+
+
+def test_variants_fill_then_rotate_and_report_savings(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(llm_cache_module, "cache", redis)
+    monkeypatch.setattr(LLMCacheConfig, "ENABLED", True)
+    monkeypatch.setattr(LLMCacheConfig, "VARIANTS", 2)
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        return LLMCompletion(content=f"roteiro {len(calls)}", total_tokens=100, latency_ms=2000)
+
+    async def scenario():
+        llm = LLMCache()
+        scripts = [await llm.complete("m", 0.7, "roteiro fomo: Fone", generate) for _ in range(5)]
+        return scripts, await llm.stats()
+
+    scripts, stats = asyncio.run(scenario())
+
+    assert len(calls) == 2
+    assert scripts == ["roteiro 1", "roteiro 2", "roteiro 1", "roteiro 2", "roteiro 1"]
+    assert stats["hits"] == 3 and stats["misses"] == 2 and stats["hit_rate"] == 0.6
+    assert stats["saved_tokens"] == 300 and stats["saved_latency_seconds"] == 6.0
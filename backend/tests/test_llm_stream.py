@@ -0,0 +1,70 @@
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import v2
+from app.services.llm_cache import llm_cache
+from app.services.llm_service import LLMService
+from app.services.orchestrator import AdOrchestrator
+from benchmarks.groq_stub import FakeGroq
+
+PRODUCT = {"name": "Fone Bluetooth", "price": "BRL 199.9", "highlights": ["bateria"]}
+
+
+def use_fake_groq(monkeypatch, groq):
+    monkeypatch.setenv("GROQ_API_KEY", "x")
+    monkeypatch.setenv("GROQ_BASE_URL", groq.url())
+    stored = []
+
+    async def lookup(key):
+        return None
+
+    async def store(key, completion):
+        stored.append(completion)
+
+    monkeypatch.setattr(llm_cache, "lookup", lookup)
+    monkeypatch.setattr(llm_cache, "store", store)
+    return stored
+
+
+def test_tokens_arrive_before_the_completion_ends(monkeypatch):
+    with FakeGroq(token_interval=0.02) as groq:
+        stored = use_fake_groq(monkeypatch, groq)
+
+        async def scenario():
+            start, arrivals = time.monotonic(), []
+            async for token in LLMService().stream_ad_script(PRODUCT, "fomo"):
+                arrivals.append((time.monotonic() - start, token))
+            return arrivals
+
+        arrivals = asyncio.run(scenario())
+
+    assert [token for _, token in arrivals] == groq.tokens
+    assert arrivals[0][0] < arrivals[-1][0] / 2
+    assert groq.requests[0]["stream"] is True
+    # O stream completo vira variante do cache, com o uso informado pelo Groq
+    assert stored[0].content == groq.script
+    assert stored[0].total_tokens == 20 + len(groq.tokens)
+
+
+def test_preview_endpoint_streams_tokens_then_the_full_script(monkeypatch):
+    async def preview_context(self, product_url, youtube_url=None):
+        return PRODUCT
+
+    monkeypatch.setattr(AdOrchestrator, "preview_context", preview_context)
+    app = FastAPI()
+    app.include_router(v2.router, prefix="/api/v2")
+
+    with FakeGroq() as groq:
+        use_fake_groq(monkeypatch, groq)
+        response = TestClient(app).get("/api/v2/scripts/stream", params={"product_url": "https://x.com/p/1"})
+
+    events = [block.split("\n", 1) for block in response.text.strip().split("\n\n")]
+    names = [name.removeprefix("event: ") for name, _ in events]
+    data = [json.loads(line.removeprefix("data: ")) for _, line in events]
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert names == ["token"] * len(groq.tokens) + ["done"]
+    assert "".join(d["text"] for d in data[:-1]) == data[-1]["script"] == groq.script
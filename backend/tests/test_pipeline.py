@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.pipeline import Stage, StageError, StageGraph
+
+
+def build(calls, fail=()) -> StageGraph:
+    def stage(name, delay=0.05):
+        async def fn(inputs):
+            calls.append(name)
+            await asyncio.sleep(delay)
+            if name in fail:
+                raise RuntimeError(f"{name} quebrou")
+            return f"{name}({','.join(sorted(inputs))})"
+        return fn
+
+    return StageGraph([
+        Stage("product", stage("product")),
+        Stage("youtube", stage("youtube")),
+        Stage("script", stage("script", 0), deps=("product", "youtube")),
+        Stage("video", stage("video", 0), deps=("product", "script")),
+    ])
+
+
+def test_independent_stages_run_concurrently_and_checkpoint():
+    calls, checkpoints = [], {}
+
+    async def checkpoint(stage, info):
+        checkpoints[stage] = info
+
+    async def scenario():
+        start = time.perf_counter()
+        outputs = await build(calls).run(checkpoint=checkpoint)
+        return outputs, time.perf_counter() - start
+
+    outputs, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.09  # product e youtube em paralelo
+    assert outputs["video"] == "video(product,script)"
+    assert calls.index("script") > max(calls.index("product"), calls.index("youtube"))
+    assert all(info["status"] == "completed" and info["duration_ms"] >= 0 for info in checkpoints.values())
+
+
+def test_resume_skips_completed_stages():
+    calls = []
+    completed = {"product": "product()", "youtube": "youtube()", "script": "script(product,youtube)"}
+    outputs = asyncio.run(build(calls).run(completed=completed))
+    assert calls == ["video"]
+    assert outputs["video"] == "video(product,script)"
+
+
+def test_failure_skips_dependents_but_keeps_independent_work():
+    calls, checkpoints = [], {}
+
+    async def checkpoint(stage, info):
+        checkpoints[stage] = info
+
+    with pytest.raises(StageError) as exc:
+        asyncio.run(build(calls, fail=("product",)).run(checkpoint=checkpoint))
+    assert exc.value.stage == "product"
+    assert checkpoints["product"]["status"] == "failed"
+    assert checkpoints["youtube"]["status"] == "completed"
+    assert "script" not in calls and "video" not in calls
+
+
+def test_cycles_are_rejected():
+    async def noop(inputs):
+        return None
+
+    with pytest.raises(ValueError):
+        StageGraph([Stage("a", noop, deps=("b",)), Stage("b", noop, deps=("a",))])
@@ -0,0 +1,35 @@
+from app.models.product import Product, ProductPrice, ProductMetadata, Marketplace
+from app.services.hot_products import RefreshConfig
+from app.services.price_refresher import PriceRefresher
+from app.services.product_service import ProductScraperService
+
+
+def candidate(ttl: int, score: float = 1.0, change_rate: float = 0.5, url: str = "https://shopee.com.br/p"):
+    return {"key": "product:shopee:1", "score": score, "ttl": ttl, "url": url,
+            "marketplace": "shopee", "change_rate": change_rate}
+
+
+def test_only_products_close_to_expiry_are_due():
+    assert PriceRefresher.is_due(candidate(ttl=RefreshConfig.REFRESH_AHEAD - 1))
+    assert PriceRefresher.is_due(candidate(ttl=-2))  # expirou: re-aquece
+    assert not PriceRefresher.is_due(candidate(ttl=RefreshConfig.REFRESH_AHEAD + 60))
+    assert not PriceRefresher.is_due(candidate(ttl=-1))
+    assert not PriceRefresher.is_due(candidate(ttl=10, url=""))
+
+
+def test_volatile_products_are_prioritized():
+    stable = candidate(ttl=10, score=10, change_rate=0.0)
+    volatile = candidate(ttl=10, score=6, change_rate=1.0)
+    assert PriceRefresher.priority(volatile) > PriceRefresher.priority(stable)
+
+
+def test_fingerprint_tracks_price_changes():
+    def product(amount: float) -> Product:
+        return Product(
+            name="Produto",
+            price=ProductPrice(amount=amount),
+            metadata=ProductMetadata(marketplace=Marketplace.SHOPEE, marketplace_id="1", source_url="https://shopee.com.br/p"),
+        )
+
+    assert ProductScraperService.fingerprint(product(10.0)) == ProductScraperService.fingerprint(product(10.0))
+    assert ProductScraperService.fingerprint(product(10.0)) != ProductScraperService.fingerprint(product(12.5))
@@ -0,0 +1,51 @@
+import asyncio
+
+from app.models.product import Product, ProductPrice, ProductMetadata, Marketplace
+from app.services.product_service import ProductScraperService
+from app.services.scrapers.base import BaseScraper, ScraperRegistry, ScraperError
+
+
+class FakeScraper(BaseScraper):
+    marketplace = Marketplace.SHOPEE
+
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    def validate_url(self, url: str) -> bool:
+        return True
+
+    async def scrape(self, url: str) -> Product:
+        self.calls.append(url)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if "broken" in url:
+            raise ScraperError("página quebrada")
+        return Product(
+            name=f"Produto {url}",
+            price=ProductPrice(amount=10.0),
+            metadata=ProductMetadata(marketplace=self.marketplace, marketplace_id=url[-4:], source_url=url),
+        )
+
+    async def scrape_with_retry(self, url: str) -> Product:
+        return await self.scrape(url)
+
+
+def test_scrape_batch_dedupes_limits_and_reports_errors(monkeypatch):
+    fake = FakeScraper()
+    monkeypatch.setattr(ScraperRegistry, "get_scraper_for_url", classmethod(lambda cls, url: fake))
+    monkeypatch.setattr(ProductScraperService, "BATCH_PER_MARKETPLACE", 2)
+
+    urls = [f"https://shopee.com.br/p{i:04d}" for i in range(10)]
+    urls += [urls[0], "https://shopee.com.br/broken"]
+    result = asyncio.run(ProductScraperService.scrape_batch(urls))
+
+    assert result.total == 12
+    assert len(result.products) == 11
+    assert len(fake.calls) == 11  # URL repetida não gera scrape extra
+    assert fake.peak <= 2
+    assert [e.index for e in result.errors] == [11]
+    assert "quebrada" in result.errors[0].error
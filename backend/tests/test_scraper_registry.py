@@ -0,0 +1,23 @@
+from app.models.product import Marketplace
+from app.services.scrapers.base import ScraperRegistry
+
+
+def route(url: str) -> Marketplace:
+    scraper = ScraperRegistry.get_scraper_for_url(url)
+    assert scraper is not None
+    return scraper.marketplace
+
+
+def test_routes_by_host_suffix():
+    assert route("https://shopee.com.br/Fone-i.1.2") == Marketplace.SHOPEE
+    assert route("https://s.shopee.com.br/abc") == Marketplace.SHOPEE
+    assert route("https://pt.aliexpress.com/item/1.html") == Marketplace.ALIEXPRESS
+    assert route("https://m.aliexpress.com/item/1.html") == Marketplace.ALIEXPRESS
+    assert route("https://br.shein.com/V-p-1.html") == Marketplace.SHEIN
+
+
+def test_unknown_hosts_fall_back_to_generic():
+    assert route("https://loja.com.br/produto") == Marketplace.CUSTOM
+    # Nome do marketplace no caminho ou em host parecido não desvia o roteamento
+    assert route("https://blog.com/review-shopee.com.br") == Marketplace.CUSTOM
+    assert route("https://notshein.com/p") == Marketplace.CUSTOM
@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.models.product import Product
+from app.services.scrapers.base import BaseScraper
+from app.services.scrapers.errors import CircuitOpenError, ErrorKind, ScraperError, classify_error
+from app.services.scrapers.resilience import BreakerConfig, RetryPolicy, circuit_breakers
+
+
+def status_error(status: int, headers=None) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://shopee.com.br/p")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError("erro", request=request, response=response)
+
+
+def test_classify_error():
+    assert classify_error(status_error(404)) == ErrorKind.PERMANENT
+    assert classify_error(status_error(503)) == ErrorKind.TRANSIENT
+    assert classify_error(status_error(429, {"Retry-After": "3"})) == ErrorKind.THROTTLED
+    assert classify_error(httpx.ConnectTimeout("timeout")) == ErrorKind.TRANSIENT
+    assert classify_error(ValueError("preço inválido")) == ErrorKind.PERMANENT
+    # Erros embrulhados são classificados pela causa
+    try:
+        try:
+            raise status_error(502)
+        except Exception as e:
+            raise ScraperError("Shopee Block") from e
+    except ScraperError as wrapped:
+        assert classify_error(wrapped) == ErrorKind.TRANSIENT
+
+
+class FlakyScraper(BaseScraper):
+    max_retries = 3
+    retry_policy = RetryPolicy(base_delay=0.001, max_delay=0.001)
+
+    def __init__(self, error: Exception):
+        self.error = error
+        self.calls = 0
+
+    def validate_url(self, url: str) -> bool:
+        return True
+
+    async def scrape(self, url: str) -> Product:
+        self.calls += 1
+        raise self.error
+
+
+def test_permanent_errors_are_not_retried():
+    scraper = FlakyScraper(status_error(404))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(scraper.scrape_with_retry("https://perm.example.com/p"))
+    assert scraper.calls == 1
+
+
+def test_long_retry_after_gives_up_immediately():
+    scraper = FlakyScraper(status_error(429, {"Retry-After": "600"}))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(scraper.scrape_with_retry("https://slow.example.com/p"))
+    assert scraper.calls == 1
+
+
+def test_breaker_opens_after_transient_failures_and_fails_fast(monkeypatch):
+    monkeypatch.setattr(BreakerConfig, "FAILURE_THRESHOLD", 3)
+    scraper = FlakyScraper(httpx.ConnectError("recusado"))
+    url = "https://down.example.com/p"
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(scraper.scrape_with_retry(url))
+    assert scraper.calls == 3
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(scraper.scrape_with_retry(url))
+    assert scraper.calls == 3
+
+    stats = asyncio.run(circuit_breakers.stats())["down.example.com"]
+    assert stats["state"] == "open" and stats["trips"] == 1
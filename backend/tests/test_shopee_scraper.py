@@ -1,31 +1,44 @@
 import asyncio
-from app.services.shopee_scraper import ShopeeScraper
-
 import pathlib
 
+import httpx
+
+from app.core.http import http_clients
+from app.services.scrapers.shopee import ShopeeScraper
+
 sample_path = pathlib.Path(__file__).parent / 'fixtures' / 'shopee_sample.html'
 html = sample_path.read_text()
 
-async def test_parse_ld_json():
-    s = ShopeeScraper()
-    # call parsing methods directly
-    from bs4 import BeautifulSoup
-    soup = BeautifulSoup(html, 'html.parser')
-    ld = s.parse_ld_json(soup)
+URL = "https://shopee.com.br/Sample-Shopee-Product-i.123.456?sp_atk=abc"
+
+
+def serve_fixture(monkeypatch):
+    """Troca o pool compartilhado por um transport local que serve o fixture."""
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, text=html, headers={"Content-Type": "text/html; charset=utf-8"})
+    )
+    monkeypatch.setattr(http_clients, "get", lambda name="default": httpx.AsyncClient(transport=transport))
+
+
+def test_parse_ld_json(monkeypatch):
+    serve_fixture(monkeypatch)
+    page = asyncio.run(ShopeeScraper().fetch_page(URL))
+    ld = page.first_json_ld()
     assert ld is not None
     assert ld.get('name') == 'Sample Shopee Product'
+    assert page.head_complete and not page.full_parse
+
+
+def test_normalize_from_ld(monkeypatch):
+    serve_fixture(monkeypatch)
+    prod = asyncio.run(ShopeeScraper().scrape(URL))
+    assert prod.name == 'Sample Shopee Product'
+    assert prod.price.amount == 49.90
+    assert prod.price.currency == 'BRL'
+    assert [i.url for i in prod.images] == ['https://example.com/image1.jpg', 'https://example.com/image2.jpg']
+    assert prod.metadata.marketplace_id == '123.456'
 
-async def test_normalize_from_ld():
-    s = ShopeeScraper()
-    from bs4 import BeautifulSoup
-    soup = BeautifulSoup(html, 'html.parser')
-    ld = s.parse_ld_json(soup)
-    fallback = s.extract_from_soup(soup)
-    prod = s.normalize(ld, fallback)
-    assert prod['title'] == 'Sample Shopee Product'
-    assert prod['price'] == '49.90' or prod['price'] == '49.90'
-
-# Run with pytest-asyncio or similar runner
+# Run with pytest
 if __name__ == '__main__':
-    asyncio.run(test_parse_ld_json())
-    asyncio.run(test_normalize_from_ld())
+    import pytest
+    pytest.main([__file__])
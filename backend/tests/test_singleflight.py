@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    executions = []
+
+    async def work():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["ok"] * 10
+    assert len(executions) == 1
+    assert flight.stats() == {"calls": 10, "executions": 1, "deduplicated": 9, "in_flight": 0}
+
+
+def test_errors_propagate_to_all_waiters_and_key_is_released():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        # Nova chamada após a falha executa de novo
+        with pytest.raises(ValueError):
+            await flight.do("k", fail)
+
+    asyncio.run(main())
+    assert flight.executions == 2
@@ -0,0 +1,58 @@
+import asyncio
+from collections import Counter
+
+from app.core import worker_loop as worker_loop_module
+from app.core.worker_loop import WorkerLoop
+
+
+def patch_resources(monkeypatch) -> Counter:
+    calls: Counter = Counter()
+
+    def fake(name):
+        async def call(*args, **kwargs):
+            calls[name] += 1
+        return call
+
+    monkeypatch.setattr(worker_loop_module.cache, "connect", fake("cache.connect"))
+    monkeypatch.setattr(worker_loop_module.cache, "disconnect", fake("cache.disconnect"))
+    monkeypatch.setattr(worker_loop_module.http_clients, "start", fake("http.start"))
+    monkeypatch.setattr(worker_loop_module.http_clients, "close", fake("http.close"))
+    monkeypatch.setattr(worker_loop_module.db_wrapper, "connect", fake("db.connect"))
+    monkeypatch.setattr(worker_loop_module.db_wrapper, "close", fake("db.close"))
+    return calls
+
+
+def test_tasks_share_one_loop_and_connect_once(monkeypatch):
+    calls = patch_resources(monkeypatch)
+    loop = WorkerLoop()
+
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    try:
+        first = loop.run(current_loop(), db=True)
+        second = loop.run(current_loop(), db=True)
+    finally:
+        loop.stop()
+
+    assert first is second
+    assert calls == {"cache.connect": 1, "http.start": 1, "db.connect": 1,
+                     "db.close": 1, "http.close": 1, "cache.disconnect": 1}
+    assert not loop.is_running
+
+
+def test_stop_drains_background_tasks(monkeypatch):
+    patch_resources(monkeypatch)
+    loop = WorkerLoop()
+    finished = []
+
+    async def spawn():
+        async def background():
+            await asyncio.sleep(0.05)
+            finished.append(True)
+        # Referência forte, como o HotProductTracker faz
+        spawn.task = asyncio.get_running_loop().create_task(background())
+
+    loop.run(spawn())
+    loop.stop()
+    assert finished == [True]